@@ -0,0 +1,292 @@
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cli import parse_generator_spec, parse_profile_spec
+from data.generator import DataGenerator
+from data.profiles import generate_profile_data
+from data.scenarios import ScenarioSpread, sample_scenarios
+from data.serialization import digest_center_data
+from models.center import CenterData
+from server.dispatch import run_task, solve_distributed
+from server.transport import ManagerTransport, PoolTransport, Transport
+from solvers.anytime import LinearProgram, solve_anytime
+from solvers.base import BaseSolver
+from solvers.center.criteria_1 import CenterCriteria1Solver
+from solvers.center.criteria_2 import CenterCriteria2Solver
+from solvers.center.decomposition import DecompositionSolver
+from solvers.center.robust import ScenarioDecompositionSolver
+from solvers.session import CenterSession
+from solvers.templates import ModelTemplates
+from utils.helpers import tab_out
+
+GOLDEN_PATH = Path(__file__).resolve().parent / "golden_objectives.json"
+
+# Objective, solution in the structure of the center solvers and the element optimums, if the engine reports them
+Outcome = Tuple[float, Dict[str, Any], Optional[List[float]]]
+
+
+@dataclass(frozen=True)
+class Variant:
+    """An engine solving center problems, compared with the reference CenterCriteria*Solver."""
+
+    name: str
+    solve: Callable[[CenterData, int, List[float]], Outcome]
+    tolerance: float = 1e-6  # Relative objective, element optimum and constraint violation tolerance
+    shared_resources: Optional[bool] = None  # Systems the engine accepts: with or without shared resources, or all
+
+    def applies(self, data: CenterData) -> bool:
+        return self.shared_resources is None or self.shared_resources == (data.shared_resources is not None)
+
+
+def center_solver(data: CenterData, criteria: int, delta: List[float], **kwargs: Any) -> BaseSolver:
+    if criteria == 1:
+        return CenterCriteria1Solver(data, **kwargs)
+    elif criteria == 2:
+        return CenterCriteria2Solver(data, delta, **kwargs)
+    raise NotImplementedError(f"Criteria {criteria} is not implemented")
+
+
+def element_optimums(solver: BaseSolver) -> List[float]:
+    return solver.f_1opt if isinstance(solver, CenterCriteria1Solver) else solver.f_2opt
+
+
+def solve_templates(templates: ModelTemplates) -> Callable[[CenterData, int, List[float]], Outcome]:
+    def solve(data: CenterData, criteria: int, delta: List[float]) -> Outcome:
+        solver = center_solver(data, criteria, delta, cache=templates)
+        solver.setup()
+        objective, solution = solver.solve()
+        return objective, solution, element_optimums(solver)
+
+    return solve
+
+
+def solve_presolved(data: CenterData, criteria: int, delta: List[float]) -> Outcome:
+    solver = center_solver(data, criteria, delta, presolve=True)
+    solver.setup()
+    objective, solution = solver.solve()
+    return objective, solution, element_optimums(solver)
+
+
+def solve_session(data: CenterData, criteria: int, delta: List[float]) -> Outcome:
+    session = CenterSession(data, criteria, delta)
+    objective, solution = session.solve()
+    return objective, solution, session.f_opt
+
+
+def solve_transported(new_transport: Callable[[], Transport]) -> Callable[[CenterData, int, List[float]], Outcome]:
+    def solve(data: CenterData, criteria: int, delta: List[float]) -> Outcome:
+        transport = new_transport()
+        try:
+            objective, solution, results = solve_distributed(data, transport, criteria, delta)
+        finally:
+            transport.close()
+        return objective, solution, [result.f_opt for result in results]
+
+    return solve
+
+
+def solve_decomposed(data: CenterData, criteria: int, delta: List[float]) -> Outcome:
+    with DecompositionSolver(data, criteria, delta) as solver:
+        objective, solution = solver.solve()
+    return objective, solution, solver.f_opt
+
+
+def solve_scenarios(data: CenterData, criteria: int, delta: List[float]) -> Outcome:
+    # A single scenario at the nominal inputs is the deterministic problem
+    scenarios = sample_scenarios(data, 1, ScenarioSpread(0., 0., 0.))
+    with ScenarioDecompositionSolver(scenarios, criteria, delta) as solver:
+        objective, solution = solver.solve()
+    return objective, solution, solver.f_opt
+
+
+def solve_first_order(iterations: int) -> Callable[[CenterData, int, List[float]], Outcome]:
+    def solve(data: CenterData, criteria: int, delta: List[float]) -> Outcome:
+        solver = center_solver(data, criteria, delta)
+        solver.setup()
+        result = solve_anytime(solver, iterations=iterations, tolerance=1e-6)
+        if result.infeasible:
+            return float("inf"), dict(), element_optimums(solver)
+        return result.objective, result.solution, element_optimums(solver)
+
+    return solve
+
+
+def default_variants(workers: int = 2, anytime_iterations: int = 200000) -> List[Variant]:
+    """
+    Every engine of the repository. The first order method is only expected to get close, within an iteration
+    rather than a time budget so its results do not depend on the machine.
+    """
+
+    return [
+        Variant("templates", solve_templates(ModelTemplates())),
+        Variant("presolve", solve_presolved),
+        Variant("session", solve_session, shared_resources=False),
+        Variant("distributed", solve_transported(lambda: PoolTransport(run_task, workers)), shared_resources=False),
+        # The task board served to local worker processes over TCP, as remote workers use it
+        Variant("manager", solve_transported(lambda: ManagerTransport(handler=run_task, local_workers=workers,
+                                                                      poll_timeout=.1)),
+                shared_resources=False),
+        Variant("decomposition", solve_decomposed, shared_resources=True),
+        Variant("scenarios", solve_scenarios),
+        Variant("anytime", solve_first_order(anytime_iterations), tolerance=1e-2),
+    ]
+
+
+def relative_difference(value: float, reference: float) -> float:
+    """|value - reference| / (1 + |reference|), 0 if both are infinite (not solved)."""
+
+    if not np.isfinite(value) or not np.isfinite(reference):
+        return 0. if value == reference else float("inf")
+    return abs(value - reference) / (1 + abs(reference))
+
+
+def solution_violation(program: LinearProgram, solver: BaseSolver, solution: Dict[str, Any]) -> float:
+    """Largest relative violation of the constraints of the reference model by a solution, inf if it has none."""
+
+    if not solution:
+        return float("inf")
+    values = [solution[kind][e] for e, (_, _, variables) in enumerate(solver.element_layouts())
+              for kind, _ in variables]
+    return program.primal_violation(np.concatenate(values).astype(np.float64))
+
+
+def load_golden(path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return dict()
+
+
+def compare(cases: List[Tuple[str, CenterData, List[float]]], criteria: List[int], variants: List[Variant],
+            golden: Dict[str, Dict[str, Any]], update_golden: bool = False) -> Tuple[List[Tuple], int]:
+    """
+    Run every case through the reference and each variant, returning the report rows and the number of mismatches.
+
+    Objectives are compared with the reference and with the golden objective of the case, unless its input digest
+    changed; feasibility is checked on the reference model of the case. With update_golden, the reference
+    objectives become the new golden ones.
+    """
+
+    rows, mismatches = list(), 0
+    for case, data, delta in cases:
+        digest = digest_center_data(data)
+        entry = golden.get(case)
+        if entry is not None and entry["digest"] != digest:
+            rows.append((case, "-", "golden", "-", "-", "-", "-", "-", "-", "input changed"))
+            entry = None
+        if update_golden:
+            entry = golden[case] = {"digest": digest, "objectives": dict()}
+
+        for c in criteria:
+            start = perf_counter()
+            reference_solver = center_solver(data, c, delta)
+            reference_solver.setup()
+            objective, solution = reference_solver.solve()
+            f_opt = element_optimums(reference_solver)
+            reference_time = perf_counter() - start
+            program = LinearProgram(reference_solver)
+
+            # Golden objectives of systems without an optimal solution are stored as null
+            if update_golden:
+                entry["objectives"][str(c)] = objective if np.isfinite(objective) else None
+                status = "stored"
+            elif entry is None or str(c) not in entry["objectives"]:
+                status = "no golden"
+            else:
+                golden_objective = entry["objectives"][str(c)]
+                golden_difference = relative_difference(
+                    objective, float("inf") if golden_objective is None else float(golden_objective))
+                status = "ok" if golden_difference <= 1e-6 else f"golden mismatch {golden_difference:.1e}"
+                mismatches += status != "ok"
+            rows.append((case, c, "reference", f"{objective:.6f}", "-", "-",
+                         f"{solution_violation(program, reference_solver, solution):.1e}", f"{reference_time:.3f}",
+                         "1.0x", status))
+
+            for variant in filter(lambda variant: variant.applies(data), variants):
+                start = perf_counter()
+                try:
+                    variant_objective, variant_solution, variant_f_opt = variant.solve(data, c, delta)
+                except Exception as error:
+                    mismatches += 1
+                    rows.append((case, c, variant.name, "-", "-", "-", "-", "-", "-",
+                                 f"error {type(error).__name__}: {error}"))
+                    continue
+                elapsed = perf_counter() - start
+
+                difference = relative_difference(variant_objective, objective)
+                f_opt_difference = max((relative_difference(value, reference)
+                                        for value, reference in zip(variant_f_opt, f_opt)), default=0.) \
+                    if variant_f_opt is not None else None
+                violation = solution_violation(program, reference_solver, variant_solution) \
+                    if np.isfinite(objective) else 0.
+                problems = [name for name, value in (("objective", difference), ("f_opt", f_opt_difference),
+                                                     ("infeasible", violation))
+                            if value is not None and value > variant.tolerance]
+                mismatches += bool(problems)
+                rows.append((case, c, variant.name, f"{variant_objective:.6f}", f"{difference:.1e}",
+                             "-" if f_opt_difference is None else f"{f_opt_difference:.1e}", f"{violation:.1e}",
+                             f"{elapsed:.3f}", f"{reference_time / elapsed:.1f}x",
+                             "mismatch: " + ", ".join(problems) if problems else "ok"))
+    return rows, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential correctness and speed of the TLOPS engines")
+    parser.add_argument("-g", "--generate", action="append", metavar="SPEC",
+                        help='generator spec of systems without the seed, see cli.py, "K=12,n=20,n1=6,n2=3,m=6" '
+                             'and "shared_resources,K=12" profile systems by default')
+    parser.add_argument("-p", "--profile", action="append", metavar="SPEC",
+                        help="generator profile spec of systems without the seed, see cli.py")
+    parser.add_argument("--systems", type=int, default=5, help="number of seeded systems per spec")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first system")
+    parser.add_argument("-c", "--criteria", type=int, nargs="+", default=[1, 2], choices=[1, 2])
+    parser.add_argument("--variants", nargs="+", help="variants to run, all by default")
+    parser.add_argument("--workers", type=int, default=2, help="processes of the distributed and manager variants")
+    parser.add_argument("--anytime-iterations", type=int, default=200000, help="iterations of the anytime variant")
+    parser.add_argument("--golden", type=Path, default=GOLDEN_PATH, help="JSON file of golden objectives")
+    parser.add_argument("--update-golden", action="store_true", help="store the reference objectives as golden")
+    args = parser.parse_args()
+
+    if args.generate is None and args.profile is None:
+        args.generate, args.profile = ["K=12,n=20,n1=6,n2=3,m=6"], ["shared_resources,K=12"]
+
+    cases = list()
+    for seed in range(args.seed, args.seed + args.systems):
+        for spec in args.generate or list():
+            system_config, _ = parse_generator_spec(f"{spec},seed={seed}")
+            cases.append((f"generate:{spec},seed={seed}", DataGenerator(system_config, seed).generate_system_data(),
+                          system_config.DELTA))
+        for spec in args.profile or list():
+            system_config, data = generate_profile_data(**parse_profile_spec(f"{spec},seed={seed}"))
+            cases.append((f"profile:{spec},seed={seed}", data, system_config.DELTA))
+
+    variants = default_variants(args.workers, args.anytime_iterations)
+    if args.variants:
+        unknown = set(args.variants) - {variant.name for variant in variants}
+        assert not unknown, f"Unknown variants {sorted(unknown)}, expected some of {[v.name for v in variants]}"
+        variants = [variant for variant in variants if variant.name in args.variants]
+
+    golden = load_golden(args.golden)
+    rows, mismatches = compare(cases, args.criteria, variants, golden, args.update_golden)
+    tab_out("Engines compared with the reference solvers", rows,
+            ["System", "Criteria", "Variant", "Objective", "Difference", "f_opt difference", "Violation",
+             "Time (s)", "Speedup", "Status"])
+
+    if args.update_golden:
+        with open(args.golden, "w") as f:
+            json.dump(golden, f, indent=2, sort_keys=True)
+            f.write("\n")
+    print(f"\n{mismatches} mismatches")
+    sys.exit(int(mismatches > 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+
+from utils.helpers import tab_out
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+# Modules loaded by the command line, the job server workers and data-only scripts
+MODULES = ["data.generator", "data.serialization", "solvers.session", "cli", "server.job_server"]
+
+# Dependencies every module used to load eagerly before the solver and report imports became lazy
+HEAVY_MODULES = ["ortools.linear_solver.pywraplp", "tabulate"]
+
+PROBE = """
+import json, sys
+from time import perf_counter
+start = perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+print(json.dumps({"seconds": perf_counter() - start, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def measure(modules: List[str], runs: int) -> Dict[str, object]:
+    """Median import time of the modules in fresh interpreters, and the heavy modules they loaded."""
+
+    samples, loaded = list(), list()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE % HEAVY_MODULES, *modules], cwd=SRC_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output)
+        samples.append(result["seconds"])
+        loaded = result["loaded"]
+    return {"seconds": median(samples), "loaded": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the TLOPS entry points")
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    rows = list()
+    for module in MODULES:
+        lazy = measure([module], args.runs)
+        eager = measure([module, *HEAVY_MODULES], args.runs)
+        rows.append((
+            module,
+            f"{lazy['seconds'] * 1000:.1f}",
+            f"{eager['seconds'] * 1000:.1f}",
+            f"{eager['seconds'] / lazy['seconds']:.1f}x",
+            ", ".join(lazy["loaded"]) or "-",
+        ))
+
+    tab_out("Import time, median of fresh interpreters", rows,
+            ["Module", "Lazy (ms)", "Eager (ms)", "Speedup", "Heavy modules loaded"])
+
+
+if __name__ == "__main__":
+    main()
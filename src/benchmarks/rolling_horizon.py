@@ -0,0 +1,106 @@
+import argparse
+import copy
+import sys
+from time import perf_counter
+from typing import List, Tuple
+
+import numpy as np
+
+from cli import parse_generator_spec, parse_profile_spec
+from data.generator import DataGenerator
+from data.horizon import sample_arrivals
+from data.profiles import generate_profile_data
+from models.center import CenterData
+from solvers.horizon import RollingHorizon
+from utils.helpers import tab_out
+
+# Largest relative difference of the warm and cold objectives of a window
+TOLERANCE = 1e-6
+
+# System of the default criteria 2 case, feasible over the default shifts and arrivals
+DEFAULT_CRITERIA_2_SPEC = "K=10,n=8,n1=5,n2=2,m=3,seed=13"
+
+
+def cold_solve(horizon: RollingHorizon) -> Tuple[float, int, float]:
+    """Objective, simplex iterations and time of the current window solved from scratch, f_opt included."""
+
+    cold = copy.deepcopy(horizon)
+    cold.warm_start = False
+    for window in cold.windows:
+        window.f_opt = None
+    start = perf_counter()
+    objective, _ = cold.solve()
+    return objective, cold.iterations, perf_counter() - start
+
+
+def run_case(data: CenterData, criteria: int, delta: List[float],
+             args: argparse.Namespace) -> Tuple[List[Tuple], int, int]:
+    """Rows of the steps of a rolling horizon, its mismatches and the steps infeasible in both runs."""
+
+    horizon, rows, mismatches, infeasible = RollingHorizon(data, criteria, delta), list(), 0, 0
+    for shift in range(args.shifts + 1):
+        duration = args.length if shift else 0.
+        arrivals = sample_arrivals(data, horizon.now + duration, args.rate, args.directive_share,
+                                   args.seed + shift) if shift else None
+        step = horizon.step(duration, arrivals)
+        objective, iterations, cold_time = cold_solve(horizon)
+        if np.isfinite(objective) or np.isfinite(step.objective):
+            difference = abs(step.objective - objective) / max(1., abs(objective))
+            mismatches += not difference <= TOLERANCE
+            status = f"{difference:.1e}"
+        else:
+            # Infeasible windows are counted, since they compare nothing
+            infeasible += 1
+            status = "infeasible"
+        rows.append((
+            shift, f"{step.now:g}", step.products, step.retired, f"{step.objective:.4f}", status,
+            f"{step.f_opt_solves}/{data.config.num_elements}", f"{step.iterations}/{iterations}",
+            f"{step.solve_time:.3f}", f"{cold_time:.3f}", f"{cold_time / step.solve_time:.2f}x",
+        ))
+    return rows, mismatches, infeasible
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-planning latency of the rolling horizon, warm against cold")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-g", "--generate", metavar="SPEC", help="generator spec of the system, see cli.py")
+    group.add_argument("-p", "--profile", metavar="SPEC", help="generator profile spec of the system, see cli.py")
+    parser.add_argument("-c", "--criteria", type=int, default=1, choices=[1, 2])
+    parser.add_argument("--delta", type=float, help="delta of every element, the one of the system config by default")
+    parser.add_argument("--shifts", type=int, default=12, help="re-planning steps after the initial plan")
+    parser.add_argument("--length", type=float, default=10., help="clock time between the steps")
+    parser.add_argument("--rate", type=float, default=.5, help="mean orders arriving per element and shift")
+    parser.add_argument("--directive-share", type=float, default=0., help="directive amount share of the orders")
+    parser.add_argument("--seed", type=int, default=1810, help="seed of the arrivals")
+    args = parser.parse_args()
+
+    if args.generate is None and args.profile is None:
+        # A large criteria 1 system, and a criteria 2 one whose plans fall short of the element optimums
+        cases = [("profile", "production,K=100", 1, None), ("generate", DEFAULT_CRITERIA_2_SPEC, 2, .3)]
+    elif args.generate is not None:
+        cases = [("generate", args.generate, args.criteria, args.delta)]
+    else:
+        cases = [("profile", args.profile, args.criteria, args.delta)]
+
+    total_mismatches = 0
+    for kind, spec, criteria, delta in cases:
+        if kind == "generate":
+            system_config, seed = parse_generator_spec(spec)
+            data = DataGenerator(system_config, seed).generate_system_data()
+        else:
+            system_config, data = generate_profile_data(**parse_profile_spec(spec))
+        num_elements = data.config.num_elements
+        delta = list(np.broadcast_to(system_config.DELTA if delta is None else delta, num_elements))
+        rows, mismatches, infeasible = run_case(data, criteria, delta, args)
+        total_mismatches += mismatches
+
+        tab_out(f"Rolling horizon of {kind}:{spec} with criteria {criteria}, warm started against the same windows "
+                f"solved cold", rows,
+                ["Shift", "Now", "Products", "Retired", "Objective", "Difference", "f_opt solves", "Iterations",
+                 "Warm (s)", "Cold (s)", "Speedup"])
+        print(f"\n{mismatches} mismatches, {infeasible} infeasible steps")
+    sys.exit(int(total_mismatches > 0))
+
+
+if __name__ == "__main__":
+    main()
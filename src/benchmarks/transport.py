@@ -0,0 +1,138 @@
+import argparse
+import sys
+from time import perf_counter, sleep
+from typing import Callable, List, Tuple
+
+from server.transport import ManagerTransport, TaskBoard, new_run, task_id, task_index, task_run
+from utils.helpers import tab_out
+
+
+def reverse(payload: bytes) -> bytes:
+    """Task handler of the ManagerTransport checks, failing on the payload b"fail"."""
+
+    if payload == b"fail":
+        raise ValueError("failing task")
+    return payload[::-1]
+
+
+def check_run_tokens() -> None:
+    run = new_run()
+    assert new_run() != run, "Runs share a token"
+    task = task_id(run, 12345)
+    assert (task_run(task), task_index(task)) == (run, 12345), f"Task id {task} does not round trip"
+
+
+def check_work_stealing() -> None:
+    board = TaskBoard()
+    owner = board.register()
+    run = new_run()
+    board.submit([(task_id(run, e), float(e + 1), bytes([e])) for e in range(4)])
+    thief = board.register()
+    # The largest tasks come first in the deque of the owner, the thief takes the smallest from its back
+    assert board.take(owner)[0] == task_id(run, 3), "The owner does not take the front of its deque"
+    assert board.take(thief)[0] == task_id(run, 0), "The thief does not steal the back of the most loaded deque"
+    assert board.get_stats()["stolen"] == 1, f"Steals counted {board.get_stats()}"
+    assert board.loads[owner] == 2. + 3., f"Load of the owner {board.loads[owner]} after the steal"
+
+
+def check_lease_expiry() -> None:
+    board = TaskBoard(lease_time=.01)
+    first, second = board.register(), board.register()
+    task = task_id(new_run(), 0)
+    board.submit([(task, 1., b"task")])
+    assert board.take(first) == (task, b"task"), "The task is not handed out"
+    assert board.take(second) is None, "A leased task is handed out again before its lease expired"
+    sleep(.02)
+    assert board.take(second) == (task, b"task"), "An expired lease is not handed out again"
+    assert board.get_stats()["expired"] == 1, f"Expired leases counted {board.get_stats()}"
+
+
+def check_duplicate_results() -> None:
+    board = TaskBoard(lease_time=0.)
+    first, second = board.register(), board.register()
+    task = task_id(new_run(), 0)
+    board.submit([(task, 1., b"task")])
+    board.take(first)
+    board.take(second)
+    board.complete(task, b"first")
+    board.complete(task, b"second")
+    board.fail(task, "late error")
+    assert board.result(timeout=1.) == (task, b"first", None), "The first result is not kept"
+    assert board.completed.empty(), "A task completed twice is reported twice"
+    assert board.get_stats()["completed"] == 1, f"Completions counted {board.get_stats()}"
+
+
+def check_cancel() -> None:
+    board = TaskBoard()
+    worker = board.register()
+    failed, current = new_run(), new_run()
+    board.submit([(task_id(failed, e), 2., b"failed") for e in range(3)])
+    leased = board.take(worker)[0]
+    board.submit([(task_id(current, e), 1., b"current") for e in range(2)])
+    board.cancel(failed)
+    assert board.loads[worker] == 2., f"Load {board.loads[worker]} of the cancelled tasks is kept"
+    board.complete(leased, b"late")
+    assert board.completed.empty(), "The late result of a cancelled run is reported"
+    taken = [board.take(worker) for _ in range(3)]
+    assert [task_run(task) for task, _ in taken[:2]] == [current] * 2 and taken[2] is None, \
+        f"Tasks {taken} are handed out after cancelling run {failed}"
+
+
+def check_manager_transport() -> None:
+    transport = ManagerTransport(handler=reverse, local_workers=2, poll_timeout=.1)
+    try:
+        # A run failing on one of its tasks, cancelled like solve_distributed does, and the next run
+        failed, current = new_run(), new_run()
+        transport.submit([(task_id(failed, e), 1., b"fail" if e == 0 else b"failed") for e in range(8)])
+        try:
+            list(transport.results(failed, 8))
+            raise AssertionError("The error of a task does not fail its run")
+        except RuntimeError:
+            # A result of the failed run completed just before its cancellation stays queued
+            transport.board.completed.put((task_id(failed, 7), b"stale", None))
+            transport.cancel(failed)
+        transport.submit([(task_id(current, e), 1., bytes([e, 255])) for e in range(16)])
+        results = dict(transport.results(current, 16))
+        assert results == {task_id(current, e): bytes([255, e]) for e in range(16)}, \
+            f"Results of (run, task) {sorted((task_run(task), task_index(task)) for task in results)} after a " \
+            f"cancelled run"
+    finally:
+        transport.close()
+
+
+CHECKS: List[Tuple[str, Callable[[], None]]] = [
+    ("run tokens", check_run_tokens),
+    ("work stealing", check_work_stealing),
+    ("lease expiry", check_lease_expiry),
+    ("duplicate results", check_duplicate_results),
+    ("cancel", check_cancel),
+    ("manager transport", check_manager_transport),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks of the task board and the manager transport")
+    parser.add_argument("--checks", nargs="+", choices=[name for name, _ in CHECKS],
+                        help="checks to run, all by default")
+    args = parser.parse_args()
+
+    rows, failures = list(), 0
+    for name, check in CHECKS:
+        if args.checks and name not in args.checks:
+            continue
+        start = perf_counter()
+        try:
+            check()
+            status = "ok"
+        except AssertionError as error:
+            failures += 1
+            status = f"failed: {error}"
+        rows.append((name, f"{perf_counter() - start:.3f}", status))
+
+    tab_out("Task board and manager transport", rows, ["Check", "Time (s)", "Status"])
+    print(f"\n{failures} failures")
+    sys.exit(int(failures > 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from data.config import SystemConfig
+from data.generator import DataGenerator
+from data.profiles import generate_profile_data
+from data.scenarios import ScenarioSpread, sample_scenarios
+from data.results import ResultsStore, RunWriter
+from data.serialization import load_center_data
+from data.shared import SharedSystem, call_with_system
+from models.center import CenterData
+from server.dispatch import run_task, solve_distributed
+from server.transport import ManagerTransport, Transport, is_loopback, parse_address
+from solvers.anytime import solve_anytime
+from solvers.center.criteria_1 import CenterCriteria1Solver
+from solvers.center.criteria_2 import CenterCriteria2Solver
+from solvers.center.decomposition import DecompositionSolver
+from solvers.center.robust import ScenarioDecompositionSolver
+from solvers.cache import ModelCache, ModelStore
+from solvers.scenarios import RISK_MEASURES
+from solvers.templates import ModelTemplates
+from utils import memory, tracing
+from utils.assertions import assert_bounds, assert_positive
+from utils.validators import validate_center_data
+
+# KKT error at which the anytime method stops, and largest relative violation of an approximate plan
+ANYTIME_TOLERANCE = 1e-4
+
+GENERATOR_KEYS = {
+    "K": "NUM_ELEMENTS",
+    "n": "NUM_DECISION_VARIABLES",
+    "n1": "NUM_AGGREGATED_PRODUCTS",
+    "n2": "NUM_SOFT_DEADLINE_PRODUCTS",
+    "m": "NUM_CONSTRAINTS",
+}
+
+
+def parse_generator_spec(spec: str) -> Tuple[SystemConfig, int]:
+    """
+    Parse a generator spec such as "K=40,n=30,n1=4,n2=2,m=10,seed=7" into a system configuration and a seed.
+
+    Sizes are given once for all elements, or per element separated by "|" (e.g. "K=3,n=6|4|3").
+    The spec "default" stands for the default SystemConfig.
+    """
+
+    defaults, seed, values = SystemConfig(), 1810, dict()
+    if spec != "default":
+        for item in spec.split(","):
+            key, _, value = item.partition("=")
+            key = key.strip()
+            if key == "seed":
+                seed = int(value)
+            else:
+                assert key in GENERATOR_KEYS, f"Unknown generator key {key}, expected one of {list(GENERATOR_KEYS)}"
+                values[GENERATOR_KEYS[key]] = [int(v) for v in value.split("|")]
+
+    num_elements = values.pop("NUM_ELEMENTS", [defaults.NUM_ELEMENTS])[0]
+    assert_positive(num_elements, "K")
+
+    sizes = dict()
+    for name, sizes_e in values.items():
+        assert len(sizes_e) in (1, num_elements), f"{name} needs 1 or {num_elements} values, got {len(sizes_e)}"
+        sizes[name] = sizes_e * num_elements if len(sizes_e) == 1 else sizes_e
+
+    for name in GENERATOR_KEYS.values():
+        if name != "NUM_ELEMENTS" and name not in sizes:
+            default_sizes = getattr(defaults, name)
+            assert len(default_sizes) == num_elements, f"{name} must be given for K={num_elements}"
+            sizes[name] = default_sizes
+
+    delta = defaults.DELTA if len(defaults.DELTA) == num_elements else [0.] * num_elements
+    return SystemConfig(NUM_ELEMENTS=num_elements, DELTA=delta, **sizes), seed
+
+
+PROFILE_KEYS = {
+    "preset": "preset",
+    "K": "num_elements",
+    "n": "num_decision_variables",
+    "m": "num_constraints",
+    "R": "shared_resources",
+    "seed": "seed",
+}
+
+
+def parse_profile_spec(spec: str) -> Dict[str, Any]:
+    """
+    Parse a profile spec such as "production,preset=medium,K=1000,seed=7" into generate_profile_data arguments.
+
+    The first item names the data.profiles generator profile, sizes default to the "small" preset.
+    """
+
+    name, *items = spec.split(",")
+    arguments = {"profile": name.strip()}
+    for item in items:
+        key, _, value = item.partition("=")
+        key = key.strip()
+        assert key in PROFILE_KEYS, f"Unknown profile key {key}, expected one of {list(PROFILE_KEYS)}"
+        arguments[PROFILE_KEYS[key]] = value.strip() if key == "preset" else int(value)
+    return arguments
+
+
+def parse_delta(value: Optional[str], num_elements: int, default: List[float]) -> List[float]:
+    """Delta vector from a single value for all elements or a comma separated value per element."""
+
+    if value is None:
+        return default
+    delta = [float(d) for d in value.split(",")]
+    assert len(delta) in (1, num_elements), f"delta needs 1 or {num_elements} values, got {len(delta)}"
+    delta = delta * num_elements if len(delta) == 1 else delta
+    for e, (d) in enumerate(delta):
+        assert_bounds(d, (0, 1), f"delta[{e}]")
+    return delta
+
+
+def load_systems(args: argparse.Namespace) -> Iterator[Tuple[str, CenterData, List[float]]]:
+    """Input systems with their names and delta vectors."""
+
+    for path in args.inputs:
+        data = load_center_data(path)
+        validate_center_data(data)
+        yield path, data, parse_delta(args.delta, data.config.num_elements, [0.] * data.config.num_elements)
+
+    for spec in args.generate:
+        system_config, seed = parse_generator_spec(spec)
+        data = DataGenerator(system_config, seed).generate_system_data()
+        validate_center_data(data)
+        yield f"generate:{spec}", data, parse_delta(args.delta, system_config.NUM_ELEMENTS, system_config.DELTA)
+
+    for spec in args.profile:
+        system_config, data = generate_profile_data(**parse_profile_spec(spec))
+        validate_center_data(data)
+        yield f"profile:{spec}", data, parse_delta(args.delta, system_config.NUM_ELEMENTS, system_config.DELTA)
+
+
+@tracing.traced("solve_system", "cli")
+def solve_system(system: str, data: CenterData, criteria: int, delta: List[float],
+                 with_solution: bool = True, cache: Optional[ModelStore] = None,
+                 presolve: bool = False) -> Dict[str, Any]:
+    """Solve one system with one criteria and describe the result as a JSON-compatible record."""
+
+    start = perf_counter()
+    if criteria == 1:
+        solver = CenterCriteria1Solver(data, cache=cache, presolve=presolve)
+        f_opt = solver.f_1opt
+    elif criteria == 2:
+        solver = CenterCriteria2Solver(data, delta, cache=cache, presolve=presolve)
+        f_opt = solver.f_2opt
+    else:
+        raise NotImplementedError(f"Criteria {criteria} is not implemented")
+
+    solver.setup()
+    objective, solution = solver.solve()
+    return result_record(system, data, criteria, delta, objective, solution, f_opt, solver.order,
+                         perf_counter() - start, with_solution)
+
+
+def solve_shared_system(data: CenterData, system: str, criteria: int, delta: List[float],
+                        with_solution: bool = True, cache: Optional[ModelStore] = None,
+                        presolve: bool = False) -> Dict[str, Any]:
+    """solve_system with the arguments in the order of data.shared.call_with_system."""
+
+    return solve_system(system, data, criteria, delta, with_solution, cache, presolve)
+
+
+@tracing.traced("solve_system", "cli")
+def solve_system_distributed(system: str, data: CenterData, criteria: int, delta: List[float],
+                             transport: Transport, with_solution: bool = True) -> Dict[str, Any]:
+    """Solve one system with its element subproblems executed by the workers of a transport."""
+
+    start = perf_counter()
+    objective, solution, results = solve_distributed(data, transport, criteria, delta)
+    return result_record(system, data, criteria, delta, objective, solution, [result.f_opt for result in results],
+                         [result.order for result in results], perf_counter() - start, with_solution)
+
+
+@tracing.traced("solve_system", "cli")
+def solve_system_decomposed(system: str, data: CenterData, criteria: int, delta: List[float],
+                            processes: int = 1, with_solution: bool = True) -> Dict[str, Any]:
+    """Solve one system with shared resources by decomposition, pricing its elements in processes."""
+
+    start = perf_counter()
+    with DecompositionSolver(data, criteria, delta, processes=processes) as solver:
+        objective, solution = solver.solve()
+    record = result_record(system, data, criteria, delta, objective, solution, solver.f_opt, solver.order,
+                           perf_counter() - start, with_solution)
+    record.update(iterations=solver.iterations, bound=solver.bound if solution else None,
+                  gap=solver.gap if solution else None)
+    return record
+
+
+@tracing.traced("solve_system", "cli")
+def solve_system_robust(system: str, data: CenterData, criteria: int, delta: List[float], num_scenarios: int,
+                        risk: str, spread: float, processes: int = 1, with_solution: bool = True) -> Dict[str, Any]:
+    """Solve one system over sampled scenarios of its uncertain inputs by scenario decomposition."""
+
+    start = perf_counter()
+    scenarios = sample_scenarios(data, num_scenarios, ScenarioSpread(spread, spread, spread))
+    with ScenarioDecompositionSolver(scenarios, criteria, delta, risk, processes=processes) as solver:
+        objective, solution = solver.solve()
+    record = result_record(system, data, criteria, delta, objective, solution, solver.f_opt, solver.order,
+                           perf_counter() - start, with_solution)
+    record.update(scenarios=num_scenarios, risk=risk, iterations=solver.iterations,
+                  bound=solver.bound if solution else None, gap=solver.gap if solution else None,
+                  violation=solver.violation if solution else None)
+    return record
+
+
+@tracing.traced("solve_system", "cli")
+def solve_system_anytime(system: str, data: CenterData, criteria: int, delta: List[float], time_limit: float,
+                         with_solution: bool = True) -> Dict[str, Any]:
+    """Solve one system approximately within a time limit, recording the gap and violations of the plan."""
+
+    start = perf_counter()
+    if criteria == 1:
+        solver = CenterCriteria1Solver(data)
+        f_opt = solver.f_1opt
+    elif criteria == 2:
+        solver = CenterCriteria2Solver(data, delta)
+        f_opt = solver.f_2opt
+    else:
+        raise NotImplementedError(f"Criteria {criteria} is not implemented")
+
+    solver.setup()
+    result = solve_anytime(solver, time_limit=time_limit, tolerance=ANYTIME_TOLERANCE)
+    objective, solution = (float("inf"), dict()) if result.infeasible else (result.objective, result.solution)
+    record = result_record(system, data, criteria, delta, objective, solution, f_opt, solver.order,
+                           perf_counter() - start, with_solution)
+    # Plans violating the constraints beyond the tolerance when the time is up are not approximate solutions
+    status = "infeasible" if result.infeasible else \
+        "approximate" if result.primal_violation <= ANYTIME_TOLERANCE else "not_converged"
+    record.update(status=status, iterations=result.iterations, bound=result.bound, gap=result.gap,
+                  primal_violation=result.primal_violation, dual_violation=result.dual_violation)
+    return record
+
+
+def result_record(system: str, data: CenterData, criteria: int, delta: List[float], objective: float,
+                  solution: Dict[str, Any], f_opt: List[float], order: List[List[int]], solve_time: float,
+                  with_solution: bool) -> Dict[str, Any]:
+    """JSON-compatible record of the result of one system and criteria."""
+
+    record = {
+        "system": system,
+        "criteria": criteria,
+        "delta": delta if criteria == 2 else None,
+        "num_elements": data.config.num_elements,
+        "status": "optimal" if solution else "not_solved",
+        "objective": objective if solution else None,
+        "f_opt": [float(f) for f in f_opt],
+        "solve_time": solve_time,
+    }
+    if with_solution and solution:
+        record.update(solution=solution, order=order)
+    return record
+
+
+def run(args: argparse.Namespace) -> int:
+    """Solve every input system with every requested criteria, writing one JSON line per result."""
+
+    writer = ResultsStore(args.store).run() if args.store else None
+    # Memory is accounted in the spans, so it needs tracing as well
+    trace_directory = mkdtemp(prefix="tlops-trace-") if args.trace or args.memory else None
+    if trace_directory is not None:
+        # Enabled before any worker process starts, so the workers trace too
+        tracing.enable(trace_directory)
+        if args.memory:
+            memory.enable(args.memory)
+    try:
+        return solve_systems(args, writer)
+    finally:
+        if writer is not None:
+            writer.close()
+        if trace_directory is not None:
+            if args.trace:
+                tracing.write_trace(args.trace)
+            if args.memory:
+                print(memory.phase_report(tracing.read_events()), file=sys.stderr)
+                memory.disable()
+            tracing.disable()
+            rmtree(trace_directory, ignore_errors=True)
+
+
+def solve_systems(args: argparse.Namespace, writer: Optional[RunWriter] = None) -> int:
+    """run() appending the records of solved systems to a run of a results store, if any."""
+
+    def emit(record: Dict[str, Any], data: Optional[CenterData] = None) -> None:
+        with tracing.span("report", "cli", system=record["system"], criteria=record["criteria"]):
+            if writer is not None and data is not None:
+                writer.add(record, data)
+            if args.summary:
+                record = {key: value for key, value in record.items() if key not in ("solution", "order")}
+            args.output.write(json.dumps(record) + "\n")
+            args.output.flush()
+
+    def on_error(system: str, criteria: int, error: Exception) -> None:
+        nonlocal failed
+        failed += 1
+        emit({"system": system, "criteria": criteria, "status": "error",
+              "error": f"{type(error).__name__}: {error}"})
+
+    failed = 0
+    cache = ModelCache(args.model_cache) if args.model_cache else ModelTemplates() if args.templates else None
+    # Solutions are kept for the results store even if the output is a summary
+    with_solution = not args.summary or args.store is not None
+    tasks = ((system, data, criteria, delta, with_solution, cache)
+             for system, data, delta in load_systems(args) for criteria in args.criteria)
+
+    if args.anytime is not None:
+        for system, data, criteria, delta, with_solution, _ in tasks:
+            try:
+                emit(solve_system_anytime(system, data, criteria, delta, args.anytime, with_solution), data)
+            except Exception as error:
+                on_error(system, criteria, error)
+        return int(failed > 0)
+
+    if args.scenarios is not None:
+        for system, data, criteria, delta, with_solution, _ in tasks:
+            try:
+                emit(solve_system_robust(system, data, criteria, delta, args.scenarios, args.risk, args.spread,
+                                         args.jobs, with_solution), data)
+            except Exception as error:
+                on_error(system, criteria, error)
+        return int(failed > 0)
+
+    if args.decompose:
+        for system, data, criteria, delta, with_solution, _ in tasks:
+            try:
+                if data.shared_resources is None:
+                    emit(solve_system(system, data, criteria, delta, with_solution, presolve=args.presolve), data)
+                else:
+                    emit(solve_system_decomposed(system, data, criteria, delta, args.jobs, with_solution), data)
+            except Exception as error:
+                on_error(system, criteria, error)
+        return int(failed > 0)
+
+    if args.dispatch:
+        # main() accepts no TLOPS_AUTHKEY only on loopback, where the transport generates a key
+        authkey = os.environ["TLOPS_AUTHKEY"].encode() if os.environ.get("TLOPS_AUTHKEY") else None
+        transport = ManagerTransport(parse_address(args.dispatch), authkey, run_task, local_workers=args.jobs)
+        if authkey is None:
+            print(f"TLOPS_AUTHKEY={transport.authkey.decode()} for the workers of {transport.address[0]}:"
+                  f"{transport.address[1]}", file=sys.stderr)
+        try:
+            for system, data, criteria, delta, with_solution, _ in tasks:
+                try:
+                    emit(solve_system_distributed(system, data, criteria, delta, transport, with_solution), data)
+                except Exception as error:
+                    on_error(system, criteria, error)
+        finally:
+            transport.close()
+        return int(failed > 0)
+
+    if args.jobs == 1:
+        for task in tasks:
+            try:
+                emit(solve_system(*task, presolve=args.presolve), task[1])
+            except Exception as error:
+                on_error(task[0], task[2], error)
+        return int(failed > 0)
+
+    # Each system is placed in shared memory once and read by the workers of all its criteria without copies
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures, remaining = dict(), dict()
+        try:
+            for system, data, delta in load_systems(args):
+                shared = SharedSystem(data)
+                remaining[shared] = len(args.criteria)
+                for criteria in args.criteria:
+                    future = pool.submit(call_with_system, shared.handle, solve_shared_system, system, criteria,
+                                         delta, with_solution, cache, args.presolve)
+                    # Systems are only kept in this process for the records of the results store
+                    futures[future] = (system, criteria, shared, data if writer is not None else None)
+
+            for future in as_completed(futures):
+                system, criteria, shared, data = futures[future]
+                try:
+                    emit(future.result(), data)
+                except Exception as error:
+                    on_error(system, criteria, error)
+                remaining[shared] -= 1
+                if remaining[shared] == 0:
+                    shared.close()
+                    del remaining[shared]
+        finally:
+            for shared in remaining:
+                shared.close()
+    return int(failed > 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch solving of TLOPS systems with JSON lines output")
+    parser.add_argument("inputs", nargs="*", help="JSON files written by data.serialization.save_center_data")
+    parser.add_argument("-g", "--generate", action="append", default=list(), metavar="SPEC",
+                        help='generated system, e.g. "K=40,n=30,n1=4,n2=2,m=10,seed=7" or "default"')
+    parser.add_argument("-p", "--profile", action="append", default=list(), metavar="SPEC",
+                        help='system of a generator profile, e.g. "production,preset=medium,K=1000,seed=7"')
+    parser.add_argument("-c", "--criteria", type=int, nargs="+", default=[1, 2], choices=[1, 2])
+    parser.add_argument("-d", "--delta", help="delta for all elements or comma separated per element")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes")
+    parser.add_argument("-o", "--output", type=argparse.FileType("w"), default=sys.stdout)
+    parser.add_argument("--summary", action="store_true", help="omit solution vectors from the output")
+    parser.add_argument("--dispatch", metavar="HOST:PORT",
+                        help="solve elements on workers connecting to this address (python -m server.worker), "
+                             "--jobs local workers included; the authkey is read from TLOPS_AUTHKEY, which "
+                             "addresses beyond loopback require, or generated and printed on stderr")
+    parser.add_argument("--decompose", action="store_true",
+                        help="solve systems with shared resources by decomposition, pricing elements in --jobs processes")
+    parser.add_argument("--store", metavar="DIR",
+                        help="append the records with their solutions to the columnar results store in DIR")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write a Chrome / Perfetto trace of all phases, worker processes included, to FILE")
+    parser.add_argument("--memory", nargs="?", const="python", choices=memory.MODES,
+                        help="account Python allocations (tracemalloc, several times slower model building) and "
+                             "RSS, or only RSS with --memory rss, of every phase and element sub-solve, worker "
+                             "processes included, and report them next to the timings on stderr")
+    parser.add_argument("--anytime", type=float, metavar="SECONDS",
+                        help="solve approximately by first-order iterations within SECONDS per system and criteria, "
+                             "recording the gap and constraint violations of the plan")
+    parser.add_argument("--scenarios", type=int, metavar="S",
+                        help="plan robustly over S sampled scenarios of the plan times, directive terms and resource "
+                             "limits of every element by scenario decomposition, in --jobs processes")
+    parser.add_argument("--risk", default="expected", choices=RISK_MEASURES,
+                        help="quality of an element over its scenarios optimized with --scenarios")
+    parser.add_argument("--spread", type=float, default=.1,
+                        help="relative deviation of the uncertain inputs of the --scenarios from their nominal values")
+    models = parser.add_mutually_exclusive_group()
+    models.add_argument("--model-cache", metavar="DIR", help="directory of built models reused across runs")
+    models.add_argument("--templates", action="store_true",
+                        help="build models of equally shaped elements from shared structural templates")
+    parser.add_argument("--presolve", action="store_true",
+                        help="reduce the element data before building the f_opt models, dropping dominated resource "
+                             "rows, fixed columns and deadlines that cannot be missed")
+    args = parser.parse_args()
+
+    if not args.inputs and not args.generate and not args.profile:
+        args.generate = ["default"]
+    assert_positive(args.jobs, "jobs")
+    if args.anytime is not None:
+        assert_positive(args.anytime, "anytime")
+    if args.scenarios is not None:
+        assert_positive(args.scenarios, "scenarios")
+        assert_bounds(args.spread, (0, 1), "spread")
+
+    # Whoever knows the authkey runs code on the coordinator and the workers, so a public address needs a secret one
+    if args.dispatch and not os.environ.get("TLOPS_AUTHKEY") and not is_loopback(parse_address(args.dispatch)[0]):
+        parser.error("--dispatch beyond loopback needs a secret authkey in TLOPS_AUTHKEY")
+
+    # Solving modes that build their models without the presolve, the model cache or the templates
+    modes = {"--anytime": args.anytime is not None, "--scenarios": args.scenarios is not None,
+             "--dispatch": args.dispatch is not None, "--decompose": args.decompose}
+    options = {"--presolve": args.presolve, "--model-cache": args.model_cache is not None,
+               "--templates": args.templates}
+    for mode, selected in modes.items():
+        for option, given in options.items():
+            # --decompose presolves the systems without shared resources, which it solves as usual
+            if selected and given and (mode, option) != ("--decompose", "--presolve"):
+                parser.error(f"{option} is not supported with {mode}")
+
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
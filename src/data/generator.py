@@ -3,6 +3,7 @@ import numpy as np
 from models.center import CenterData, CenterConfig
 from models.element import ElementData, ElementConfig, ElementType
 from utils.assertions import assert_positive
+from utils.tracing import traced
 from .config import SystemConfig
 
 
@@ -32,7 +33,7 @@ class DataGenerator:
             num_soft_deadline_products=self.config.NUM_SOFT_DEADLINE_PRODUCTS[element_idx],
             num_constraints=m,
             free_order=np.random.choice([True, False]),
-            type=ElementType(np.random.choice([0, 1], p=[.4, .6])),
+            type=ElementType(np.random.choice([ElementType.PARALLEL, ElementType.SEQUENTIAL], p=[.4, .6])),
         )
 
         element_data = ElementData(
@@ -48,6 +49,12 @@ class DataGenerator:
 
         return element_data
 
+    def _generate_center_coeffs(self, element_idx: int) -> np.ndarray:
+        """Generate random center functional coefficients for a single element."""
+
+        return np.random.randint(1, 3, self.config.NUM_DECISION_VARIABLES[element_idx])
+
+    @traced("generate", "data")
     def generate_system_data(self) -> CenterData:
         """Generate complete system data."""
 
@@ -57,7 +64,7 @@ class DataGenerator:
         ]
 
         center_coeffs = [
-            np.random.randint(1, 3, self.config.NUM_DECISION_VARIABLES[i])
+            self._generate_center_coeffs(i)
             for i in range(self.config.NUM_ELEMENTS)
         ]
 
@@ -0,0 +1,43 @@
+from typing import Dict
+
+import numpy as np
+
+from models.center import CenterData
+from models.horizon import NewProducts
+from utils.assertions import assert_bounds, assert_non_negative
+
+
+def sample_arrivals(data: CenterData, now: float, rate: float, directive_share: float = 1.,
+                    seed: int = 1810) -> Dict[int, NewProducts]:
+    """
+    Orders arriving in a shift: a Poisson(rate) number of products per element, each a copy of a random
+    aggregated product of the element in data whose directive term is counted from now and whose directive
+    amount is directive_share of the original one.
+
+    Orders of full directive amounts soon overload elements with tight resources, whose windows are then
+    infeasible; a share of 0 keeps every window feasible.
+    """
+
+    assert_non_negative(rate, "rate")
+    assert_bounds(directive_share, (0, 1), "directive_share")
+    rng = np.random.default_rng(seed)
+    shared = data.shared_resources
+    arrivals = dict()
+    for e, (element) in enumerate(data.elements):
+        count = int(rng.poisson(rate))
+        if count == 0:
+            continue
+        n1, n2 = element.config.num_aggregated_products, element.config.num_soft_deadline_products
+        picks = rng.integers(0, n1, count)
+        arrivals[e] = NewProducts(
+            coeffs_functional=element.coeffs_functional[picks],
+            center_coeffs=data.coeffs_functional[e][picks],
+            aggregated_plan_costs=element.aggregated_plan_costs[:, picks],
+            aggregated_plan_times=element.aggregated_plan_times[picks],
+            directive_terms=now + element.directive_terms[picks],
+            num_directive_products=directive_share * element.num_directive_products[picks],
+            fines_for_deadline=element.fines_for_deadline[picks],
+            soft_deadline=picks < n2,
+            shared_costs=None if shared is None else shared.costs[e][:, picks],
+        )
+    return arrivals
@@ -0,0 +1,283 @@
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.center import CenterData, SharedResources
+from models.element import ElementData, ElementConfig, ElementType
+from utils.helpers import calculate_priority_order, copy_element_coeffs
+from .config import SystemConfig
+from .generator import DataGenerator
+
+
+@dataclass(frozen=True)
+class GeneratorProfile:
+    """Distributions of the numbers drawn for each element by ProfileGenerator."""
+
+    name: str
+    sequential_share: float = .6  # share of SEQUENTIAL elements
+    free_order_share: float = .5  # share of elements with a free priority order
+    cost_density: float = 1.  # share of non-zero MS_AGGREGATED_PLAN_COSTS entries
+    cost_range: Tuple[int, int] = (1, 5)
+    profit_range: Tuple[int, int] = (1, 10)  # C_e
+    center_profit_range: Tuple[int, int] = (1, 3)  # center coefficients
+    time_range: Tuple[int, int] = (1, 5)  # VS_AGGREGATED_PLAN_TIMES
+    demand_median: float = 3.  # median of the directive amounts y_assigned_e
+    demand_sigma: float = .3  # log-normal sigma of the directive amounts, heavy tailed above 1
+    deadline_clusters: int = 0  # number of common due dates, 0 for deadlines following each product
+    deadline_spread: float = .05  # relative deviation of deadlines around their cluster
+    fine_range: Tuple[int, int] = (1, 10)
+    resource_slack: float = 1.  # resources exceed the load of the directive amounts by this share
+    shared_resources: int = 0  # number of center-level resources shared by all elements
+    shared_tightness: float = .3  # limits: load of the center optimums + this share of the one the element optimums add
+
+
+PROFILES: Dict[str, GeneratorProfile] = {profile.name: profile for profile in (
+    GeneratorProfile("balanced"),
+    GeneratorProfile("sparse_costs", cost_density=.1, cost_range=(1, 20)),
+    GeneratorProfile("heavy_tail", demand_sigma=1.5, profit_range=(1, 100)),
+    GeneratorProfile("clustered_deadlines", deadline_clusters=3, deadline_spread=.02),
+    GeneratorProfile("sequential", sequential_share=.9, free_order_share=.8),
+    GeneratorProfile("tight", resource_slack=.05),
+    GeneratorProfile("slack", resource_slack=5.),
+    GeneratorProfile("shared_resources", shared_resources=3),
+    GeneratorProfile("production", sequential_share=.85, free_order_share=.7, cost_density=.15, cost_range=(1, 20),
+                     profit_range=(1, 100), demand_sigma=1.2, deadline_clusters=4, deadline_spread=.03,
+                     resource_slack=.2),
+)}
+
+
+@dataclass(frozen=True)
+class SizePreset:
+    """Dimensions of a generated system, element sizes varying around the given ones."""
+
+    num_elements: int  # K
+    num_decision_variables: int  # n
+    num_constraints: int  # m
+    aggregated_share: float = .3  # n1 = share * n
+    soft_deadline_share: float = .5  # n2 = share * n1
+    size_spread: float = .5  # element sizes vary within (1 -+ spread) times the preset ones
+    delta: float = .1
+
+
+PRESETS: Dict[str, SizePreset] = {
+    "small": SizePreset(num_elements=10, num_decision_variables=20, num_constraints=5),
+    "medium": SizePreset(num_elements=200, num_decision_variables=100, num_constraints=20),
+    "huge": SizePreset(num_elements=2000, num_decision_variables=300, num_constraints=30),
+}
+
+
+def preset_config(preset: SizePreset, seed: int = 1810) -> SystemConfig:
+    """System configuration with element sizes drawn around the preset dimensions."""
+
+    rng = np.random.default_rng(seed)
+    k = preset.num_elements
+
+    def spread(size: int) -> np.ndarray:
+        factors = rng.uniform(1 - preset.size_spread, 1 + preset.size_spread, k)
+        return np.maximum(1, np.round(size * factors)).astype(int)
+
+    n = spread(preset.num_decision_variables)
+    n1 = np.clip(np.round(n * preset.aggregated_share), 1, n).astype(int)
+    n2 = np.round(n1 * preset.soft_deadline_share).astype(int)
+    m = spread(preset.num_constraints)
+
+    return SystemConfig(
+        NUM_ELEMENTS=k,
+        NUM_DECISION_VARIABLES=n.tolist(),
+        NUM_AGGREGATED_PRODUCTS=n1.tolist(),
+        NUM_SOFT_DEADLINE_PRODUCTS=n2.tolist(),
+        NUM_CONSTRAINTS=m.tolist(),
+        DELTA=[preset.delta] * k,
+    )
+
+
+class ProfileGenerator(DataGenerator):
+    """
+    Generates system data with the distributions of a GeneratorProfile.
+
+    Every system drawn is feasible: each product uses at least one resource, so no plan is unbounded, and
+    resources always cover the directive amounts of the aggregated products. The fines of an element are bounded
+    so that its optimums with the element and the center coefficients are positive, as criteria 2 needs.
+    """
+
+    def __init__(self, config: SystemConfig, profile: GeneratorProfile, seed: int = 1810):
+        super().__init__(config, seed)
+        self.profile = profile
+        self.rng = np.random.default_rng(seed)
+
+    def _generate_costs(self, m: int, n: int) -> np.ndarray:
+        """MS_AGGREGATED_PLAN_COSTS with the profile density and at least one non-zero entry per product."""
+
+        low, high = self.profile.cost_range
+        costs = self.rng.integers(low, high, (m, n))
+        mask = self.rng.random((m, n)) < self.profile.cost_density
+        mask[self.rng.integers(0, m, n), np.arange(n)] = True
+        return np.where(mask, costs, 0)
+
+    def _generate_deadlines(self, completion: np.ndarray) -> np.ndarray:
+        """
+        Directive terms shortly after the completion times of the directive amounts, or at the next of a few
+        common due dates, since hard deadlines are fined both for earliness and for lateness.
+        """
+
+        n1 = len(completion)
+        if self.profile.deadline_clusters > 0:
+            centers = np.sort(np.quantile(completion, self.rng.uniform(0, 1, self.profile.deadline_clusters)))
+            centers[-1] = completion.max()
+            deadlines = centers[np.searchsorted(centers, completion)]
+            deadlines = deadlines * (1 + self.rng.normal(0, self.profile.deadline_spread, n1))
+        else:
+            deadlines = completion * self.rng.uniform(.9, 1.3, n1)
+        return np.maximum(1, np.round(deadlines))
+
+    def _generate_element_data(self, element_idx: int) -> ElementData:
+        """Generate profile data for a single element."""
+
+        profile = self.profile
+        n = self.config.NUM_DECISION_VARIABLES[element_idx]
+        m = self.config.NUM_CONSTRAINTS[element_idx]
+        n1 = self.config.NUM_AGGREGATED_PRODUCTS[element_idx]
+
+        element_config = ElementConfig(
+            id=element_idx,
+            num_decision_variables=n,
+            num_aggregated_products=n1,
+            num_soft_deadline_products=self.config.NUM_SOFT_DEADLINE_PRODUCTS[element_idx],
+            num_constraints=m,
+            free_order=self.rng.random() < profile.free_order_share,
+            type=ElementType.SEQUENTIAL if self.rng.random() < profile.sequential_share else ElementType.PARALLEL,
+        )
+
+        costs = self._generate_costs(m, n)
+        times = self.rng.integers(*profile.time_range, n1)
+        demand = np.maximum(1, np.round(self.rng.lognormal(np.log(profile.demand_median), profile.demand_sigma, n1)))
+
+        # Completion times of the directive amounts: T_e_i = sum_j={0..i-1}(VS_AGGREGATED_PLAN_TIMES[e][order[j]] * y_assigned_e[order[j]])
+        durations = (times * demand).astype(float)
+        if element_config.type == ElementType.SEQUENTIAL:
+            completion = np.concatenate([[0], np.cumsum(durations)[:-1]])
+        else:
+            completion = durations
+        deadlines = self._generate_deadlines(completion)
+        if element_config.type == ElementType.SEQUENTIAL and element_config.free_order:
+            # The priority order ranks products by their deadlines, so they are drawn again for the ranked positions
+            order = np.flip(np.argsort(durations / deadlines))
+            deadlines = self._generate_deadlines(np.concatenate([[0], np.cumsum(durations[order])[:-1]]))
+
+        # Resources: (1 + slack) * MS_AGGREGATED_PLAN_COSTS[e][:, :n1] * y_assigned_e, lightly loaded rows get the mean load
+        load = costs[:, :n1] @ demand
+        resources = np.ceil((1 + profile.resource_slack) * np.maximum(load, load.mean()))
+
+        element_data = ElementData(
+            config=element_config,
+            coeffs_functional=self.rng.integers(*profile.profit_range, n),
+            resource_constraints=resources,
+            aggregated_plan_costs=costs,
+            aggregated_plan_times=times,
+            directive_terms=deadlines,
+            num_directive_products=demand,
+            fines_for_deadline=self.rng.integers(*profile.fine_range, n1),
+        )
+
+        return element_data
+
+    def _generate_center_coeffs(self, element_idx: int) -> np.ndarray:
+        """Generate profile center functional coefficients for a single element."""
+
+        return self.rng.integers(*self.profile.center_profit_range, self.config.NUM_DECISION_VARIABLES[element_idx])
+
+    def _generate_shared_resources(self, elements: List[ElementData],
+                                   coeffs_functional: List[np.ndarray]) -> SharedResources:
+        """
+        Shared resources between the load of the element optimums with the center coefficients, which both
+        criteria need to fit, and the load of the element optimums with their own coefficients, which the
+        elements would use without them, so that the limits bind.
+        """
+
+        # Element problems are solved only for profiles with shared resources, so generating data stays solver free
+        from solvers.element.default import ElementSolver
+
+        r, density = self.profile.shared_resources, self.profile.cost_density
+        low, high = self.profile.cost_range
+        costs = [np.where(self.rng.random((r, element.config.num_decision_variables)) < density,
+                          self.rng.integers(low, high, (r, element.config.num_decision_variables)), 0)
+                 for element in elements]
+
+        center_load, element_load = np.zeros(r), np.zeros(r)
+        for element, center_coeffs, element_costs in zip(elements, coeffs_functional, costs):
+            # Profile elements are feasible and bounded, so both problems have an optimum. The center coefficients
+            # come first, as in f_opt of the criteria, then the same model is re-solved with the element ones
+            solver = ElementSolver(copy_element_coeffs(element, center_coeffs))
+            solver.setup()
+            center_load += element_costs @ np.asarray(solver.solve()[1]["y_e"])
+            objective = solver.solver.Objective()
+            for variable, coeff in zip(solver.y_e, element.coeffs_functional):
+                objective.SetCoefficient(variable, float(coeff))
+            solver.invalidate()
+            element_load += element_costs @ np.asarray(solver.solve()[1]["y_e"])
+
+        limits = center_load + self.profile.shared_tightness * np.maximum(0, element_load - center_load)
+        return SharedResources(costs=costs, limits=np.ceil(limits))
+
+    @staticmethod
+    def _bound_fines(element: ElementData, center_coeffs: np.ndarray) -> ElementData:
+        """
+        Element with its fines scaled down where they would take more than half of the profit of the directive
+        amounts, with the element or the center coefficients, at their deviations in the priority order.
+
+        The directive amounts are a feasible plan, so the element optimums are at least the other half: positive.
+        """
+
+        n1, n2 = element.config.num_aggregated_products, element.config.num_soft_deadline_products
+        durations = element.aggregated_plan_times * element.num_directive_products
+        if element.config.type == ElementType.SEQUENTIAL:
+            # T_e[i] = sum_j={0..i-1}(VS_AGGREGATED_PLAN_TIMES[e][order[j]] * y_assigned_e[order[j]]), t_0_e[order[0]] = 0
+            order = calculate_priority_order(element)
+            completion = np.concatenate([[0.], np.cumsum(durations[order])[:-1]])
+            deviations = np.where(np.arange(n1) < n2, np.maximum(completion - element.directive_terms, 0.),
+                                  np.abs(completion - element.directive_terms))
+        else:
+            # Parallel products start at 0, or at D_e_i - T when a hard deadline is later than the production time T
+            deviations = np.maximum(durations - element.directive_terms, 0.)
+
+        profit = min(element.coeffs_functional[:n1] @ element.num_directive_products,
+                     center_coeffs[:n1] @ element.num_directive_products)
+        penalty = element.fines_for_deadline @ deviations
+        if 2 * penalty < profit:
+            return element
+        return replace(element, fines_for_deadline=np.floor(element.fines_for_deadline * profit / (2 * penalty)))
+
+    def generate_system_data(self) -> CenterData:
+        """Generate profile system data, with shared resources if the profile has any."""
+
+        data = super().generate_system_data()
+        data = replace(data, elements=[self._bound_fines(element, coeffs)
+                                       for element, coeffs in zip(data.elements, data.coeffs_functional)])
+        if self.profile.shared_resources == 0:
+            return data
+        return replace(data, shared_resources=self._generate_shared_resources(data.elements, data.coeffs_functional))
+
+
+def generate_profile_data(profile: str = "production", preset: str = "small", seed: int = 1810,
+                          num_elements: Optional[int] = None, num_decision_variables: Optional[int] = None,
+                          num_constraints: Optional[int] = None,
+                          shared_resources: Optional[int] = None) -> Tuple[SystemConfig, CenterData]:
+    """
+    System of a named profile and size preset, optionally scaled to other K, n and m, and with another number
+    of shared resources.
+
+    E.g. generate_profile_data("sparse_costs", "medium", num_elements=1000) draws 1000 elements of medium size.
+    """
+
+    assert profile in PROFILES, f"Unknown generator profile {profile}, expected one of {list(PROFILES)}"
+    assert preset in PRESETS, f"Unknown size preset {preset}, expected one of {list(PRESETS)}"
+
+    sizes = {name: value for name, value in (("num_elements", num_elements),
+                                             ("num_decision_variables", num_decision_variables),
+                                             ("num_constraints", num_constraints)) if value is not None}
+    config = preset_config(replace(PRESETS[preset], **sizes), seed)
+    generator_profile = PROFILES[profile]
+    if shared_resources is not None:
+        generator_profile = replace(generator_profile, shared_resources=shared_resources)
+    return config, ProfileGenerator(config, generator_profile, seed).generate_system_data()
@@ -0,0 +1,246 @@
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from uuid import uuid4
+
+import numpy as np
+
+from models.center import CenterData
+from .serialization import digest_center_data
+
+INDEX_NAME = "index.jsonl"
+
+# Columns with one value per record, per element, and one vector per element
+RECORD_COLUMNS = ("objective", "solve_time")
+ELEMENT_COLUMNS = ("f_opt", "delta", "element_quality", "center_quality")
+VECTOR_COLUMNS = ("y", "z", "t_0", "order")
+COLUMNS = RECORD_COLUMNS + ELEMENT_COLUMNS + VECTOR_COLUMNS
+
+# Keys of a result record stored in the chunk columns or the index fields instead of its stats
+RECORD_KEYS = {"system", "criteria", "delta", "num_elements", "status", "objective", "f_opt", "solve_time",
+               "solution", "order"}
+
+
+def element_qualities(data: CenterData, solution: Dict[str, Any]) -> np.ndarray:
+    """
+    Element and center qualities of each element of a solution, as a (2, K) array.
+
+    Element quality: C_e^T * y_e - sum_j={1..n1_e}(FINES_FOR_DEADLINE[e][j] * z_e_j)
+    Center quality: VS_COEFFS_CENTER_FUNCTIONAL[e]^T * y_e - sum_j={1..n1_e}(FINES_FOR_DEADLINE[e][j] * z_e_j)
+    """
+
+    qualities = np.full((2, data.config.num_elements), np.nan)
+    if not solution:
+        return qualities
+    for e, (element) in enumerate(data.elements):
+        y_e, z_e = np.asarray(solution["y"][e], dtype=np.float64), np.asarray(solution["z"][e], dtype=np.float64)
+        fines = float(np.dot(element.fines_for_deadline, z_e))
+        qualities[0, e] = float(np.dot(element.coeffs_functional, y_e)) - fines
+        qualities[1, e] = float(np.dot(data.coeffs_functional[e], y_e)) - fines
+    return qualities
+
+
+def ragged(vectors: Sequence[Sequence[float]], dtype: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectors of different lengths as one flat array and the offsets of each vector in it."""
+
+    lengths = np.fromiter((len(vector) for vector in vectors), dtype=np.int64, count=len(vectors))
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    values = np.fromiter((value for vector in vectors for value in vector), dtype=dtype, count=int(offsets[-1]))
+    return values, offsets
+
+
+class RunWriter:
+    """
+    Appends the results of one run to a ResultsStore.
+
+    Records are buffered and written as a chunk of columns every chunk_records records and on close(). Each chunk
+    is written completely before its index lines, so readers never see entries of a missing chunk.
+    """
+
+    def __init__(self, store: "ResultsStore", run_id: str, chunk_records: int = 64):
+        self.store = store
+        self.run_id = run_id
+        self.chunk_records = chunk_records
+        self.pending: List[Dict[str, Any]] = list()
+        self.chunks = 0
+
+    def add(self, record: Dict[str, Any], data: CenterData) -> None:
+        """Buffer a result record of cli.result_record for the system it was solved for."""
+
+        solution = record.get("solution") or dict()
+        num_elements = data.config.num_elements
+        delta = record.get("delta")
+        self.pending.append({
+            "record": record,
+            "digest": digest_center_data(data),
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "delta": [0.] * num_elements if delta is None else delta,
+            "qualities": element_qualities(data, solution),
+            "vectors": {**{name: solution.get(name, [[]] * num_elements) for name in ("y", "z", "t_0")},
+                        "order": record.get("order") or [[]] * num_elements},
+        })
+        if len(self.pending) >= self.chunk_records:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+
+        pending, name = self.pending, f"{self.run_id}-{self.chunks:04d}.npz"
+        records = [item["record"] for item in pending]
+        element_counts = [len(item["delta"]) for item in pending]
+        columns = {
+            "objective": np.array([np.nan if record["objective"] is None else record["objective"]
+                                   for record in records], dtype=np.float64),
+            "solve_time": np.array([record["solve_time"] for record in records], dtype=np.float64),
+            "element_offsets": np.concatenate([[0], np.cumsum(element_counts)]).astype(np.int64),
+            "f_opt": np.concatenate([np.asarray(record["f_opt"], dtype=np.float64) for record in records]),
+            "delta": np.concatenate([np.asarray(item["delta"], dtype=np.float64) for item in pending]),
+            "element_quality": np.concatenate([item["qualities"][0] for item in pending]),
+            "center_quality": np.concatenate([item["qualities"][1] for item in pending]),
+        }
+        for vector in VECTOR_COLUMNS:
+            columns[vector], columns[f"{vector}_offsets"] = ragged(
+                [values for item in pending for values in item["vectors"][vector]],
+                np.int64 if vector == "order" else np.float64)
+
+        self.store.write_chunk(name, columns)
+        self.store.append_index([{
+            "run": self.run_id,
+            "chunk": name,
+            "row": row,
+            "time": item["time"],
+            "system": item["record"]["system"],
+            "criteria": item["record"]["criteria"],
+            "digest": item["digest"],
+            "status": item["record"]["status"],
+            "objective": item["record"]["objective"],
+            "num_elements": element_counts[row],
+            "stats": {key: value for key, value in item["record"].items() if key not in RECORD_KEYS},
+        } for row, (item) in enumerate(pending)])
+        self.pending = list()
+        self.chunks += 1
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "RunWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ResultsStore:
+    """
+    Append-only directory of batch results: chunks of columns in NPZ files and a JSON lines index.
+
+    Every record of a run (one system solved with one criteria) has an index entry with its run, time, system,
+    criteria, input digest, status, objective and solver stats, and its arrays in the columns of a chunk: the
+    objective and solve time, per element f_opt, delta and the element and center qualities, and the y, z, t_0
+    and order vectors of each element. Queries filter the index, then read only the requested columns of the
+    chunks holding the selected entries, since NPZ members are loaded on access.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / INDEX_NAME
+
+    def run(self, run_id: Optional[str] = None, chunk_records: int = 64) -> RunWriter:
+        """Writer of a new run, named after the current time unless run_id is given."""
+
+        if run_id is None:
+            run_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid4().hex[:8]}"
+        return RunWriter(self, run_id, chunk_records)
+
+    def write_chunk(self, name: str, columns: Dict[str, np.ndarray]) -> None:
+        """Write a chunk atomically, uncompressed so each column is read without decompressing the others."""
+
+        with NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+            np.savez(f, **columns)
+        os.replace(f.name, self.directory / name)
+
+    def append_index(self, entries: List[Dict[str, Any]]) -> None:
+        """Append index entries with one write, so concurrent runs do not interleave lines."""
+
+        with open(self.index_path, "a") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """All index entries, oldest first."""
+
+        try:
+            with open(self.index_path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return list()
+
+    def runs(self) -> List[str]:
+        """Run ids, oldest first."""
+
+        return list(dict.fromkeys(entry["run"] for entry in self.entries()))
+
+    def select(self, run: Optional[str] = None, system: Optional[str] = None, criteria: Optional[int] = None,
+               digest: Optional[str] = None, status: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Index entries matching all given fields; since and until bound the ISO times, e.g. "2026-09-01"."""
+
+        fields = {"run": run, "system": system, "criteria": criteria, "digest": digest, "status": status}
+        return [entry for entry in self.entries()
+                if all(value is None or entry[name] == value for name, value in fields.items())
+                and (since is None or entry["time"] >= since) and (until is None or entry["time"] < until)]
+
+    def load(self, entries: Iterable[Dict[str, Any]], columns: Sequence[str] = COLUMNS,
+             elements: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Columns of the given index entries, one dict per entry with the entry fields and the columns.
+
+        Record columns are scalars, element columns arrays over the elements (or only the selected elements),
+        vector columns lists with one array per element.
+        """
+
+        unknown = [column for column in columns if column not in COLUMNS]
+        assert not unknown, f"Unknown columns {unknown}, expected some of {list(COLUMNS)}"
+
+        entries = list(entries)
+        chunks: Dict[str, List[int]] = dict()
+        for i, (entry) in enumerate(entries):
+            chunks.setdefault(entry["chunk"], list()).append(i)
+
+        loaded: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+        for name, positions in chunks.items():
+            with np.load(self.directory / name) as chunk:
+                cache: Dict[str, np.ndarray] = dict()
+
+                def column(key: str) -> np.ndarray:
+                    if key not in cache:
+                        cache[key] = chunk[key]
+                    return cache[key]
+
+                for i in positions:
+                    entry = entries[i]
+                    row = entry["row"]
+                    start, stop = column("element_offsets")[row:row + 2]
+                    if elements is None:
+                        selected = np.arange(start, stop)
+                    else:
+                        indices = np.asarray(elements, dtype=np.int64)
+                        assert np.all((0 <= indices) & (indices < entry["num_elements"])), \
+                            f"Element out of range for {entry['num_elements']} elements"
+                        selected = start + indices
+
+                    values = dict(entry)
+                    for key in columns:
+                        if key in RECORD_COLUMNS:
+                            values[key] = float(column(key)[row])
+                        elif key in ELEMENT_COLUMNS:
+                            values[key] = column(key)[selected]
+                        else:
+                            offsets, flat = column(f"{key}_offsets"), column(key)
+                            values[key] = [flat[offsets[e]:offsets[e + 1]] for e in selected]
+                    loaded[i] = values
+        return loaded
@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from models.center import CenterData
+from models.scenarios import ElementScenarios, ScenarioData
+from utils.assertions import assert_bounds, assert_positive
+
+
+@dataclass(frozen=True)
+class ScenarioSpread:
+    """Relative deviations of the uncertain inputs of the scenarios drawn by sample_scenarios."""
+
+    plan_times: float = .2  # VS_AGGREGATED_PLAN_TIMES
+    directive_terms: float = .1  # D_e
+    resource_constraints: float = .1  # VS_RESOURCE_CONSTRAINTS
+
+
+def sample_scenarios(data: CenterData, num_scenarios: int, spread: ScenarioSpread = ScenarioSpread(),
+                     seed: int = 1810) -> ScenarioData:
+    """
+    Draw num_scenarios equally likely variants of the uncertain inputs of every element.
+
+    Each uncertain number is its nominal value times an independent factor uniform in (1 -+ spread), drawn for
+    all scenarios of an element at once; a zero spread repeats the nominal element.
+    """
+
+    assert_positive(num_scenarios, "num_scenarios")
+    for name in ("plan_times", "directive_terms", "resource_constraints"):
+        assert_bounds(getattr(spread, name), (0, 1), f"spread.{name}")
+
+    rng = np.random.default_rng(seed)
+
+    def draw(nominal: np.ndarray, deviation: float) -> np.ndarray:
+        return nominal * rng.uniform(1 - deviation, 1 + deviation, (num_scenarios, len(nominal)))
+
+    return ScenarioData(data=data, scenarios=[
+        ElementScenarios(
+            aggregated_plan_times=draw(element.aggregated_plan_times, spread.plan_times),
+            directive_terms=draw(element.directive_terms, spread.directive_terms),
+            resource_constraints=draw(element.resource_constraints, spread.resource_constraints),
+            probabilities=np.full(num_scenarios, 1 / num_scenarios),
+        )
+        for element in data.elements
+    ])
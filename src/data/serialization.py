@@ -0,0 +1,111 @@
+import json
+from dataclasses import asdict
+from hashlib import sha256
+from typing import Any, Dict
+
+import numpy as np
+
+from models.center import CenterData, CenterConfig, SharedResources
+from models.element import ElementData, ElementConfig, ElementType, ARRAY_FIELDS
+
+ELEMENT_ARRAYS = list(ARRAY_FIELDS)
+
+
+def element_config_to_dict(config: ElementConfig) -> Dict[str, Any]:
+    """Convert an element configuration into JSON-compatible values."""
+
+    values = asdict(config)
+    values["type"] = config.type.name
+    return {name: value.item() if isinstance(value, np.generic) else value for name, value in values.items()}
+
+
+def element_data_to_dict(element: ElementData) -> Dict[str, Any]:
+    """Convert element data into JSON-compatible structures."""
+
+    return {
+        "config": element_config_to_dict(element.config),
+        **{name: getattr(element, name).tolist() for name in ELEMENT_ARRAYS},
+    }
+
+
+def element_data_from_dict(payload: Dict[str, Any]) -> ElementData:
+    """Create element data from the structures produced by element_data_to_dict."""
+
+    config = dict(payload["config"])
+    config["type"] = ElementType[config["type"]]
+    return ElementData(
+        config=ElementConfig(**config),
+        **{name: np.array(payload[name]) for name in ELEMENT_ARRAYS},
+    )
+
+
+def center_data_to_dict(data: CenterData) -> Dict[str, Any]:
+    """Convert center data into JSON-compatible structures."""
+
+    payload = {
+        "config": asdict(data.config),
+        "coeffs_functional": [coeffs.tolist() for coeffs in data.coeffs_functional],
+        "elements": [element_data_to_dict(element) for element in data.elements],
+    }
+    if data.shared_resources is not None:
+        payload["shared_resources"] = {
+            "costs": [costs.tolist() for costs in data.shared_resources.costs],
+            "limits": data.shared_resources.limits.tolist(),
+        }
+    return payload
+
+
+def center_data_from_dict(payload: Dict[str, Any]) -> CenterData:
+    """Create center data from the structures produced by center_data_to_dict."""
+
+    shared = payload.get("shared_resources")
+    return CenterData(
+        config=CenterConfig(**payload["config"]),
+        coeffs_functional=[np.array(coeffs) for coeffs in payload["coeffs_functional"]],
+        elements=[element_data_from_dict(element) for element in payload["elements"]],
+        shared_resources=None if shared is None else SharedResources(
+            costs=[np.array(costs, dtype=np.float64).reshape(len(shared["limits"]), -1) for costs in shared["costs"]],
+            limits=np.array(shared["limits"], dtype=np.float64),
+        ),
+    )
+
+
+def save_center_data(data: CenterData, path: str) -> None:
+    """Write center data to a JSON file."""
+
+    with open(path, "w") as f:
+        json.dump(center_data_to_dict(data), f)
+
+
+def load_center_data(path: str) -> CenterData:
+    """Read center data from a JSON file."""
+
+    with open(path) as f:
+        return center_data_from_dict(json.load(f))
+
+
+def digest_element_data(element: ElementData) -> str:
+    """Content hash of element data, independent of the array dtypes used to store the values."""
+
+    digest = sha256(repr(sorted(element_config_to_dict(element.config).items())).encode())
+    for name in ELEMENT_ARRAYS:
+        array = np.ascontiguousarray(getattr(element, name), dtype=np.float64)
+        digest.update(repr(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def digest_center_data(data: CenterData) -> str:
+    """Content hash of center data, independent of the array dtypes used to store the values."""
+
+    digest = sha256(repr(asdict(data.config)).encode())
+    for coeffs, element in zip(data.coeffs_functional, data.elements):
+        digest.update(np.ascontiguousarray(coeffs, dtype=np.float64).tobytes())
+        digest.update(digest_element_data(element).encode())
+    if data.shared_resources is not None:
+        digest.update(b"shared_resources")
+        for costs in data.shared_resources.costs + [data.shared_resources.limits]:
+            array = np.ascontiguousarray(costs, dtype=np.float64)
+            digest.update(repr(array.shape).encode())
+            digest.update(array.tobytes())
+    return digest.hexdigest()
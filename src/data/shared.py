@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from models.center import CenterData, CenterConfig, SharedResources
+from models.element import ElementData, ElementConfig, ARRAY_FIELDS
+from utils.validators import is_validated, mark_validated
+
+ALIGNMENT = 64  # Arrays start on cache line boundaries
+
+T = TypeVar("T")
+
+_escaped: List[SharedMemory] = list()
+
+
+@dataclass(frozen=True)
+class ArraySlot:
+    """Position of one array in a shared memory block."""
+
+    offset: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+@dataclass(frozen=True)
+class SharedElementHandle:
+    """Everything a worker needs to rebuild one element and its center coefficients from shared memory."""
+
+    name: str
+    config: ElementConfig
+    arrays: Tuple[ArraySlot, ...]  # In ARRAY_FIELDS order
+    center_coeffs: ArraySlot
+    validated: bool
+
+
+@dataclass(frozen=True)
+class SharedSystemHandle:
+    """Everything a worker needs to rebuild a whole system from shared memory."""
+
+    name: str
+    elements: Tuple[SharedElementHandle, ...]
+    validated: bool
+    shared_costs: Tuple[ArraySlot, ...] = ()  # Shared resources of the system, if any
+    shared_limits: Optional[ArraySlot] = None
+
+
+class SharedSystem:
+    """
+    Arrays of a CenterData placed once in a shared memory block.
+
+    Tasks for worker processes carry a small handle (block name, configurations and array offsets) instead of
+    the pickled arrays, and the workers rebuild the data as read-only views of the block without copying.
+    The block lives until close() is called by the process that created it.
+    """
+
+    def __init__(self, data: CenterData):
+        layout, size = list(), 0
+
+        def place(array: np.ndarray) -> ArraySlot:
+            nonlocal size
+            slot = ArraySlot(offset=size, shape=array.shape, dtype=array.dtype.str)
+            layout.append((slot, array))
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+            return slot
+
+        slots = [(tuple(place(getattr(element, name)) for name in ARRAY_FIELDS),
+                  place(np.ascontiguousarray(data.coeffs_functional[e], dtype=np.float64)))
+                 for e, (element) in enumerate(data.elements)]
+        shared = data.shared_resources
+        shared_costs = tuple() if shared is None else tuple(place(costs) for costs in shared.costs)
+        shared_limits = None if shared is None else place(shared.limits)
+
+        self.memory = SharedMemory(create=True, size=max(size, 1))
+        for slot, array in layout:
+            view(self.memory, slot, writeable=True)[...] = array
+
+        validated = is_validated(data)
+        self.handle = SharedSystemHandle(
+            name=self.memory.name,
+            elements=tuple(SharedElementHandle(self.memory.name, element.config, arrays, center_coeffs, validated)
+                           for element, (arrays, center_coeffs) in zip(data.elements, slots)),
+            validated=validated,
+            shared_costs=shared_costs,
+            shared_limits=shared_limits,
+        )
+
+    def element(self, e: int) -> SharedElementHandle:
+        return self.handle.elements[e]
+
+    def close(self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self) -> "SharedSystem":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def view(memory: SharedMemory, slot: ArraySlot, writeable: bool = False) -> np.ndarray:
+    """Array of the slot over the shared memory block, read-only unless writeable."""
+
+    array = np.ndarray(slot.shape, dtype=np.dtype(slot.dtype), buffer=memory.buf, offset=slot.offset)
+    array.flags.writeable = writeable
+    return array
+
+
+def element_from_memory(memory: SharedMemory, handle: SharedElementHandle) -> Tuple[ElementData, np.ndarray]:
+    element = ElementData(handle.config, *(view(memory, slot) for slot in handle.arrays))
+    if handle.validated:
+        mark_validated(element)
+    return element, view(memory, handle.center_coeffs)
+
+
+def call_with_memory(name: str, function: Callable[[SharedMemory], T]) -> T:
+    """
+    Call function with the shared memory block opened for its duration.
+
+    Arrays viewing the block must not outlive the call, results are expected to hold only their own data
+    (pickling results sent back to the parent copies them anyway).
+    """
+
+    memory = SharedMemory(name=name)
+    try:
+        return function(memory)
+    finally:
+        try:
+            memory.close()
+        except BufferError:
+            # A view escaped the call: keep the block mapped for the lifetime of the process
+            _escaped.append(memory)
+
+
+def call_with_element(handle: SharedElementHandle, function: Callable[..., T], *args: Any) -> T:
+    """function(element, center_coeffs, *args) over read-only views of the shared block."""
+
+    return call_with_memory(handle.name, lambda memory: function(*element_from_memory(memory, handle), *args))
+
+
+def call_with_system(handle: SharedSystemHandle, function: Callable[..., T], *args: Any) -> T:
+    """function(data, *args) with the whole system as read-only views of the shared block."""
+
+    def call(memory: SharedMemory) -> T:
+        elements = [element_from_memory(memory, element) for element in handle.elements]
+        data = CenterData(
+            config=CenterConfig(num_elements=len(elements)),
+            coeffs_functional=[center_coeffs for _, center_coeffs in elements],
+            elements=[element for element, _ in elements],
+            shared_resources=None if handle.shared_limits is None else SharedResources(
+                costs=[view(memory, slot) for slot in handle.shared_costs],
+                limits=view(memory, handle.shared_limits),
+            ),
+        )
+        if handle.validated:
+            mark_validated(data)
+        del elements
+        return function(data, *args)
+
+    return call_with_memory(handle.name, call)
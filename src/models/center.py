@@ -1,22 +1,62 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
 
 import numpy as np
 
-from .element import ElementData
+from .element import ElementData, canonical_array, COMPACT_DTYPE
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CenterConfig:
     """Configuration data for the system center."""
 
     num_elements: int
 
+    def __post_init__(self):
+        object.__setattr__(self, "num_elements", int(self.num_elements))
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
+class SharedResources:
+    """Center-level resources shared by all elements: sum_e(costs[e] * y_e) <= limits."""
+
+    costs: List[np.ndarray]  # (num_shared_resources, n_e) per element
+    limits: np.ndarray  # (num_shared_resources,)
+
+    def __post_init__(self):
+        object.__setattr__(self, "costs", [canonical_array(costs) for costs in self.costs])
+        object.__setattr__(self, "limits", canonical_array(self.limits))
+
+    @property
+    def num_resources(self) -> int:
+        return len(self.limits)
+
+    def compact(self) -> "SharedResources":
+        """Copy with float32 costs; the limits keep their precision."""
+
+        return replace(self, costs=[canonical_array(costs, COMPACT_DTYPE) for costs in self.costs])
+
+
+@dataclass(frozen=True, slots=True)
 class CenterData:
     """Data container for center-specific optimization parameters."""
 
     config: CenterConfig
     coeffs_functional: List[np.ndarray]
     elements: List[ElementData]
+    shared_resources: Optional[SharedResources] = None  # Constraints coupling the elements, if any
+    _validated: bool = field(default=False, init=False, repr=False, compare=False)  # Set by utils.validators
+
+    def __post_init__(self):
+        object.__setattr__(self, "coeffs_functional", [canonical_array(coeffs) for coeffs in self.coeffs_functional])
+        object.__setattr__(self, "elements", list(self.elements))
+
+    def compact(self) -> "CenterData":
+        """Copy of the system with float32 arrays in the center and all elements."""
+
+        return replace(
+            self,
+            coeffs_functional=[canonical_array(coeffs, COMPACT_DTYPE) for coeffs in self.coeffs_functional],
+            elements=[element.compact() for element in self.elements],
+            shared_resources=None if self.shared_resources is None else self.shared_resources.compact(),
+        )
@@ -1,8 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, replace
 from enum import IntEnum, auto
+from typing import Any, Dict, Tuple
 
+import numpy as np
 from numpy import ndarray
 
+# Arrays are stored as float64, or float32 after compact(); other input dtypes are converted to float64
+FLOAT_DTYPES = (np.dtype(np.float64), np.dtype(np.float32))
+COMPACT_DTYPE = np.dtype(np.float32)
+
 
 class ElementType(IntEnum):
     """Enumeration of element types in the system."""
@@ -14,7 +20,30 @@ class ElementType(IntEnum):
         return f"{self.__class__.__name__}.{self.name}"
 
 
-@dataclass(frozen=True)
+def canonical_array(value: Any, dtype: np.dtype = None) -> ndarray:
+    """
+    Contiguous read-only array of value in one of the canonical dtypes.
+
+    Canonical read-only arrays are shared as they are and other arrays of a canonical dtype are wrapped
+    in a read-only view, so data can be passed between objects without copies. Anything else is
+    converted into a new array.
+    """
+
+    array = np.asarray(value)
+    if dtype is None:
+        dtype = array.dtype if array.dtype in FLOAT_DTYPES else FLOAT_DTYPES[0]
+
+    if array.dtype == dtype and array.flags.c_contiguous:
+        if not array.flags.writeable:
+            return array
+        array = array.view()
+    else:
+        array = np.array(array, dtype=dtype, order="C")
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True, slots=True)
 class ElementConfig:
     """Configuration data for an element in the system."""
 
@@ -26,8 +55,31 @@ class ElementConfig:
     free_order: bool
     type: ElementType
 
+    def __post_init__(self):
+        # Normalize NumPy scalars coming from generators and UI widgets to plain Python values
+        for name in ("id", "num_decision_variables", "num_aggregated_products", "num_soft_deadline_products",
+                     "num_constraints"):
+            object.__setattr__(self, name, int(getattr(self, name)))
+        object.__setattr__(self, "free_order", bool(self.free_order))
+        object.__setattr__(self, "type", ElementType(self.type))
+
+
+def element_shapes(config: ElementConfig) -> Dict[str, Tuple[int, ...]]:
+    """Expected shape of each ElementData array for the configuration."""
 
-@dataclass(frozen=True)
+    n, n1, m = config.num_decision_variables, config.num_aggregated_products, config.num_constraints
+    return {
+        "coeffs_functional": (n,),
+        "resource_constraints": (m,),
+        "aggregated_plan_costs": (m, n),
+        "aggregated_plan_times": (n1,),
+        "directive_terms": (n1,),
+        "num_directive_products": (n1,),
+        "fines_for_deadline": (n1,),
+    }
+
+
+@dataclass(frozen=True, slots=True)
 class ElementData:
     """Data container for element-specific optimization parameters."""
 
@@ -39,3 +91,18 @@ class ElementData:
     directive_terms: ndarray
     num_directive_products: ndarray
     fines_for_deadline: ndarray
+    _validated: bool = field(default=False, init=False, repr=False, compare=False)  # Set by utils.validators
+    # Structures derived from the inputs, shared by all solvers of the element, see utils.helpers.derived
+    _derived: Dict[str, Tuple[Any, Any]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        for name in ARRAY_FIELDS:
+            object.__setattr__(self, name, canonical_array(getattr(self, name)))
+
+    def compact(self) -> "ElementData":
+        """Copy of the element with float32 arrays, halving the memory of its numbers."""
+
+        return replace(self, **{name: canonical_array(getattr(self, name), COMPACT_DTYPE) for name in ARRAY_FIELDS})
+
+
+ARRAY_FIELDS = tuple(f.name for f in fields(ElementData) if f.init and f.name != "config")
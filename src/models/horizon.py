@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from numpy import ndarray
+
+from .element import canonical_array
+
+
+@dataclass(frozen=True, slots=True)
+class NewProducts:
+    """Aggregated products of orders arriving at an element, one entry (cost column) per product."""
+
+    coeffs_functional: ndarray  # (k,) C_e of the products
+    center_coeffs: ndarray  # (k,) VS_COEFFS_CENTER_FUNCTIONAL[e] of the products
+    aggregated_plan_costs: ndarray  # (m, k)
+    aggregated_plan_times: ndarray  # (k,)
+    directive_terms: ndarray  # (k,) absolute times on the clock of the rolling horizon
+    num_directive_products: ndarray  # (k,)
+    fines_for_deadline: ndarray  # (k,)
+    soft_deadline: ndarray  # (k,) whether each product has a soft deadline
+    shared_costs: Optional[ndarray] = None  # (R, k) costs of the shared resources, zero if None
+
+    def __post_init__(self):
+        for name in ("coeffs_functional", "center_coeffs", "aggregated_plan_costs", "aggregated_plan_times",
+                     "directive_terms", "num_directive_products", "fines_for_deadline"):
+            object.__setattr__(self, name, canonical_array(getattr(self, name)))
+        object.__setattr__(self, "soft_deadline", np.asarray(self.soft_deadline, dtype=bool))
+        if self.shared_costs is not None:
+            object.__setattr__(self, "shared_costs", canonical_array(self.shared_costs))
+
+        k = self.num_products
+        for name in ("center_coeffs", "aggregated_plan_times", "directive_terms", "num_directive_products",
+                     "fines_for_deadline", "soft_deadline"):
+            assert getattr(self, name).shape == (k,), f"{name} has shape {getattr(self, name).shape}, expected ({k},)"
+        assert self.aggregated_plan_costs.ndim == 2 and self.aggregated_plan_costs.shape[1] == k, \
+            f"aggregated_plan_costs has shape {self.aggregated_plan_costs.shape}, expected (m, {k})"
+        assert self.shared_costs is None or self.shared_costs.ndim == 2 and self.shared_costs.shape[1] == k, \
+            f"shared_costs has shape {self.shared_costs.shape}, expected (R, {k})"
+
+    @property
+    def num_products(self) -> int:
+        return len(self.coeffs_functional)
@@ -0,0 +1,59 @@
+from dataclasses import dataclass, replace
+from typing import List
+
+import numpy as np
+from numpy import ndarray
+
+from .center import CenterData
+from .element import ElementData, canonical_array
+
+# Inputs of an element that differ between scenarios, all its other numbers are certain
+UNCERTAIN_FIELDS = ("aggregated_plan_times", "directive_terms", "resource_constraints")
+
+
+@dataclass(frozen=True, slots=True)
+class ElementScenarios:
+    """Sampled variants of the uncertain inputs of an element, one row per scenario, with their probabilities."""
+
+    aggregated_plan_times: ndarray  # (S, n1)
+    directive_terms: ndarray  # (S, n1)
+    resource_constraints: ndarray  # (S, m)
+    probabilities: ndarray  # (S,)
+
+    def __post_init__(self):
+        for name in UNCERTAIN_FIELDS + ("probabilities",):
+            object.__setattr__(self, name, canonical_array(getattr(self, name)))
+
+    @property
+    def num_scenarios(self) -> int:
+        return len(self.probabilities)
+
+    def scenario(self, element: ElementData, s: int) -> ElementData:
+        """The element with the inputs of scenario s."""
+
+        return replace(element, **{name: getattr(self, name)[s] for name in UNCERTAIN_FIELDS})
+
+
+@dataclass(frozen=True, slots=True)
+class ScenarioData:
+    """A system whose elements carry S sampled scenarios of their uncertain inputs each."""
+
+    data: CenterData
+    scenarios: List[ElementScenarios]
+
+    def __post_init__(self):
+        object.__setattr__(self, "scenarios", list(self.scenarios))
+        assert len(self.scenarios) == self.data.config.num_elements, \
+            f"Expected scenarios of {self.data.config.num_elements} elements, got {len(self.scenarios)}"
+
+        for e, (element, scenarios) in enumerate(zip(self.data.elements, self.scenarios)):
+            num_scenarios = scenarios.num_scenarios
+            n1, m = element.config.num_aggregated_products, element.config.num_constraints
+            for name, shape in (("aggregated_plan_times", (num_scenarios, n1)),
+                                ("directive_terms", (num_scenarios, n1)),
+                                ("resource_constraints", (num_scenarios, m))):
+                assert getattr(scenarios, name).shape == shape, \
+                    f"scenarios[{e}].{name} has shape {getattr(scenarios, name).shape}, expected {shape}"
+            assert num_scenarios > 0 and np.all(scenarios.probabilities >= 0) \
+                   and abs(float(scenarios.probabilities.sum()) - 1) <= 1e-9, \
+                f"scenarios[{e}].probabilities must be non-negative and sum to 1"
@@ -0,0 +1,120 @@
+import pickle
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from numpy import ndarray
+
+from data.shared import SharedElementHandle, SharedSystem, call_with_element
+from models.center import CenterData
+from models.element import ElementData
+from server.transport import Transport, new_run, task_id, task_index
+from solvers.session import BlockResult, aggregate_block_results, assert_separable, solve_block
+from utils.tracing import span
+
+RESULT_FIELDS = [f.name for f in fields(BlockResult) if f.name != "element"]
+
+
+@dataclass(frozen=True)
+class ElementTask:
+    """Inputs of one element subproblem of a center problem: the element and its center block data."""
+
+    element: ElementData
+    center_coeffs: ndarray
+    criteria: int
+    delta: float
+    f_opt: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class SharedElementTask:
+    """Element subproblem whose arrays are in shared memory, for workers on the same machine."""
+
+    handle: SharedElementHandle
+    criteria: int
+    delta: float
+    f_opt: Optional[float] = None
+
+
+def task_cost(task: ElementTask) -> float:
+    """Estimated solve cost of a task, the size of its block model: n_e * (m_e + n1_e)."""
+
+    config = task.element.config
+    return float(config.num_decision_variables * (config.num_constraints + config.num_aggregated_products))
+
+
+def encode_task(task: Union[ElementTask, SharedElementTask]) -> bytes:
+    return pickle.dumps(task, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def solve_block_fields(element: ElementData, center_coeffs: ndarray, criteria: int, delta: float,
+                       f_opt: Optional[float] = None) -> Dict[str, Any]:
+    """Fields of the BlockResult of an element but the element, which the caller already has."""
+
+    result = solve_block(element, center_coeffs, criteria, delta, f_opt)
+    return {name: getattr(result, name) for name in RESULT_FIELDS}
+
+
+def run_task(payload: bytes) -> bytes:
+    """Solve an encoded task, returning its encoded result without the element the coordinator already has."""
+
+    with span("task", "worker", bytes=len(payload)):
+        task = pickle.loads(payload)
+        if isinstance(task, SharedElementTask):
+            result = call_with_element(task.handle, solve_block_fields, task.criteria, task.delta, task.f_opt)
+        else:
+            result = solve_block_fields(task.element, task.center_coeffs, task.criteria, task.delta, task.f_opt)
+        return pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_result(payload: bytes, task: ElementTask) -> BlockResult:
+    return BlockResult(element=task.element, **pickle.loads(payload))
+
+
+def element_tasks(data: CenterData, criteria: int = 1, delta: Optional[List[float]] = None,
+                  f_opt: Optional[List[float]] = None) -> List[ElementTask]:
+    """Element subproblems of a center problem."""
+
+    delta = [0.] * data.config.num_elements if delta is None else delta
+    return [ElementTask(element, data.coeffs_functional[e], criteria, delta[e], None if f_opt is None else f_opt[e])
+            for e, (element) in enumerate(data.elements)]
+
+
+def solve_distributed(data: CenterData, transport: Transport, criteria: int = 1,
+                      delta: Optional[List[float]] = None, f_opt: Optional[List[float]] = None,
+                      share_memory: bool = False) -> Tuple[float, Dict[str, Any], List[BlockResult]]:
+    """
+    Solve a center problem with its element subproblems executed by the workers of a transport.
+
+    Returns the objective and solution in the structure of CenterCriteria1Solver / CenterCriteria2Solver
+    together with the block result of each element, whose f_opt are the element optimums. With
+    share_memory, for workers on this machine only, tasks refer to the arrays placed in shared memory.
+
+    Task ids carry a token of the run, so a transport reused for several systems never mixes their results, and
+    the tasks of a run that fails are cancelled.
+    """
+
+    assert_separable(data)
+    tasks = element_tasks(data, criteria, delta, f_opt)
+    shared = SharedSystem(data) if share_memory else None
+    run = new_run()
+    try:
+        transport.submit([
+            (task_id(run, e), task_cost(task),
+             encode_task(task if shared is None else
+                         SharedElementTask(shared.element(e), task.criteria, task.delta, task.f_opt)))
+            for e, (task) in enumerate(tasks)
+        ])
+
+        results: List[Optional[BlockResult]] = [None] * len(tasks)
+        for task, payload in transport.results(run, len(tasks)):
+            e = task_index(task)
+            results[e] = decode_result(payload, tasks[e])
+    except BaseException:
+        transport.cancel(run)
+        raise
+    finally:
+        if shared is not None:
+            shared.close()
+
+    objective, solution = aggregate_block_results(results)
+    return objective, solution, results
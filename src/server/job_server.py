@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from data.serialization import center_data_from_dict, digest_center_data
+from data.shared import SharedSystem, call_with_element
+from models.center import CenterData
+from server.dispatch import solve_block_fields
+from solvers.session import BlockResult, assert_separable
+from utils.assertions import assert_bounds, assert_valid_dimensions
+from utils.validators import validate_center_data
+
+TERMINAL_EVENTS = ("done", "error")
+MAX_LINE_BYTES = 1 << 28  # Whole systems are sent as one JSON line
+
+
+def block_result_to_dict(e: int, result: BlockResult) -> Dict[str, Any]:
+    """JSON event with the solution of one element block."""
+
+    return {
+        "event": "element",
+        "element": e,
+        "f_opt": result.f_opt,
+        "objective": result.objective if result.solution else None,
+        "y_e": result.solution.get("y_e"),
+        "z_e": result.solution.get("z_e"),
+        "t_0_e": result.solution.get("t_0_e"),
+        "order": result.order,
+        "element_quality": result.element_quality,
+        "center_quality": result.center_quality,
+        "solve_time": result.solve_time,
+    }
+
+
+class Job:
+    """One solve request, shared by all identical requests received while it is in flight."""
+
+    def __init__(self, key: str, data: CenterData, criteria: int, delta: List[float]):
+        self.key = key
+        self.data = data
+        self.criteria = criteria
+        self.delta = delta
+        self.events: List[Dict[str, Any]] = list()
+        self.subscribers: List[asyncio.Queue] = list()
+        self.submitted = perf_counter()
+        self.started: Optional[float] = None
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Record an event and forward it to every subscriber."""
+
+        self.events.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue receiving the events published so far followed by the future ones."""
+
+        queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        self.subscribers.append(queue)
+        return queue
+
+
+class JobServer:
+    """
+    Local asyncio server solving center problems in a process pool.
+
+    Clients connect over a Unix socket or localhost TCP and exchange JSON lines. A request
+    {"id": ..., "op": "solve", "system": {...}, "criteria": 1 | 2, "delta": [...]} is queued, its element
+    blocks are solved in the worker processes and every finished block is streamed back as an "element"
+    event, followed by a "done" event. Identical requests arriving while the first one is in flight share
+    its job. {"op": "metrics"} returns the queue depth and latency statistics.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_running_jobs: int = 2, latency_window: int = 1000):
+        self.workers = workers
+        self.max_running_jobs = max_running_jobs
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.in_flight: Dict[str, Job] = dict()
+        self.running_tasks = 0
+        self.counters = {"requests": 0, "deduplicated": 0, "completed": 0, "failed": 0}
+        self.queue_latencies: Deque[float] = deque(maxlen=latency_window)
+        self.total_latencies: Deque[float] = deque(maxlen=latency_window)
+        self.dispatchers: List[asyncio.Task] = list()
+
+    async def start(self, path: Optional[str] = None, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """Start the worker pool, the job dispatchers and the listening socket."""
+
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.queue = asyncio.Queue()
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.max_running_jobs)]
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_client, path=path, limit=MAX_LINE_BYTES)
+        return await asyncio.start_server(self.handle_client, host=host, port=port, limit=MAX_LINE_BYTES)
+
+    async def close(self) -> None:
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        self.pool.shutdown(cancel_futures=True)
+
+    def submit(self, data: CenterData, criteria: int, delta: List[float]) -> Job:
+        """Queue a new job, or join the in-flight job with the same inputs."""
+
+        self.counters["requests"] += 1
+        key = json.dumps([digest_center_data(data), criteria, delta])
+        if key in self.in_flight:
+            self.counters["deduplicated"] += 1
+            return self.in_flight[key]
+
+        job = Job(key, data, criteria, delta)
+        self.in_flight[key] = job
+        self.queue.put_nowait(job)
+        job.publish({"event": "queued", "position": self.queue.qsize()})
+        return job
+
+    async def dispatch(self) -> None:
+        """Take jobs from the queue and solve their element blocks in the worker pool."""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.started = perf_counter()
+            self.queue_latencies.append(job.started - job.submitted)
+            job.publish({"event": "started", "num_elements": job.data.config.num_elements})
+
+            # Workers read the arrays of the job from shared memory instead of receiving them pickled per element
+            shared = SharedSystem(job.data)
+            futures = dict()
+            for e in range(job.data.config.num_elements):
+                future = loop.run_in_executor(self.pool, call_with_element, shared.element(e), solve_block_fields,
+                                              job.criteria, job.delta[e])
+                futures[future] = e
+            self.running_tasks += len(futures)
+
+            objective, failed, pending = 0., False, set(futures)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    self.running_tasks -= len(done)
+                    for future in done:
+                        e = futures[future]
+                        result = BlockResult(element=job.data.elements[e], **future.result())
+                        objective = objective + result.objective if result.solution else float("inf")
+                        job.publish(block_result_to_dict(e, result))
+            except Exception as error:
+                failed = True
+                self.counters["failed"] += 1
+                job.publish({"event": "error", "message": f"{type(error).__name__}: {error}"})
+                for future in pending:
+                    future.cancel()
+                self.running_tasks -= len(pending)
+            finally:
+                shared.close()
+
+            if not failed:
+                latency = perf_counter() - job.submitted
+                self.total_latencies.append(latency)
+                self.counters["completed"] += 1
+                job.publish({
+                    "event": "done",
+                    "status": "optimal" if objective != float("inf") else "not_solved",
+                    "objective": objective if objective != float("inf") else None,
+                    "latency": latency,
+                })
+            del self.in_flight[job.key]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, counters and latency percentiles in seconds."""
+
+        def summary(values: Deque[float]) -> Dict[str, Optional[float]]:
+            if not values:
+                return {"mean": None, "p50": None, "p95": None, "max": None}
+            array = np.array(values)
+            return {"mean": float(array.mean()), "p50": float(np.percentile(array, 50)),
+                    "p95": float(np.percentile(array, 95)), "max": float(array.max())}
+
+        return {
+            "event": "metrics",
+            "queued_jobs": self.queue.qsize(),
+            "in_flight_jobs": len(self.in_flight),
+            "running_element_tasks": self.running_tasks,
+            **self.counters,
+            "queue_latency": summary(self.queue_latencies),
+            "total_latency": summary(self.total_latencies),
+        }
+
+    def parse_request(self, request: Dict[str, Any]) -> Job:
+        """Validate a solve request and submit its job."""
+
+        data = center_data_from_dict(request["system"])
+        validate_center_data(data)
+        assert_separable(data)
+        criteria = int(request.get("criteria", 1))
+        assert criteria in (1, 2), f"Criteria {criteria} is not implemented"
+        delta = [float(d) for d in request.get("delta", [0.] * data.config.num_elements)]
+        assert_valid_dimensions([np.array(delta)], [(data.config.num_elements,)], ["delta"])
+        for e, (d) in enumerate(delta):
+            assert_bounds(d, (0, 1), f"delta[{e}]")
+        return self.submit(data, criteria, delta)
+
+    async def handle_request(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock) -> None:
+        async def send(event: Dict[str, Any]) -> None:
+            async with lock:
+                writer.write(json.dumps({"id": request_id, **event}).encode() + b"\n")
+                await writer.drain()
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            op = request.get("op", "solve")
+            if op == "metrics":
+                await send(self.metrics())
+                return
+            assert op == "solve", f"Unknown operation {op}"
+            job = self.parse_request(request)
+        except Exception as error:
+            await send({"event": "error", "message": f"{type(error).__name__}: {error}"})
+            return
+
+        queue = job.subscribe()
+        try:
+            while True:
+                event = await queue.get()
+                await send(event)
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            # Also when the connection closes and the request is cancelled
+            job.subscribers.remove(queue)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve every request line of a connection concurrently."""
+
+        lock = asyncio.Lock()
+        requests = set()
+        try:
+            try:
+                while line := await reader.readline():
+                    if line.strip():
+                        task = asyncio.create_task(self.handle_request(line, writer, lock))
+                        requests.add(task)
+                        task.add_done_callback(requests.discard)
+            except ValueError as error:
+                # A line over MAX_LINE_BYTES: the stream cannot be read past it, so no further request is read
+                async with lock:
+                    writer.write(json.dumps({"id": None, "event": "error",
+                                             "message": f"Request line over {MAX_LINE_BYTES} bytes: {error}"})
+                                 .encode() + b"\n")
+                    await writer.drain()
+            await asyncio.gather(*requests)
+        except ConnectionError:
+            pass
+        finally:
+            # Requests still waiting for their jobs when the connection fails stop before the writer closes
+            for task in requests:
+                task.cancel()
+            await asyncio.gather(*requests, return_exceptions=True)
+            writer.close()
+
+
+async def serve(path: Optional[str], host: str, port: int, workers: Optional[int], max_running_jobs: int) -> None:
+    server = JobServer(workers, max_running_jobs)
+    listener = await server.start(path, host, port)
+    addresses = ", ".join(str(socket.getsockname()) for socket in listener.sockets)
+    print(f"TLOPS job server listening on {addresses}", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local TLOPS job server")
+    parser.add_argument("--socket", help="Unix socket path, localhost TCP is used otherwise")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--jobs", type=int, default=2, help="Number of jobs dispatched at the same time")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.socket, args.host, args.port, args.workers, args.jobs))
+
+
+if __name__ == "__main__":
+    main()
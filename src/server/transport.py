@@ -0,0 +1,339 @@
+import ipaddress
+import secrets
+import socket
+import threading
+from collections import deque
+from itertools import count as counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Process
+from multiprocessing.managers import BaseManager
+from queue import Queue, Empty
+from time import perf_counter, sleep
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Protocol, Tuple
+
+# (task id, estimated cost, encoded task) and (task id, encoded result)
+Task = Tuple[int, float, bytes]
+Result = Tuple[int, bytes]
+
+# Bits of a task id below the token of its run, so results of earlier runs are told apart from those of the current one
+INDEX_BITS = 32
+
+_runs = counter(1)
+
+
+def new_run() -> int:
+    """Token of a new run of tasks, unique in this process."""
+
+    return next(_runs)
+
+
+def task_id(run: int, index: int) -> int:
+    return run << INDEX_BITS | index
+
+
+def task_run(task: int) -> int:
+    return task >> INDEX_BITS
+
+
+def task_index(task: int) -> int:
+    return task & ((1 << INDEX_BITS) - 1)
+
+
+class Transport(Protocol):
+    """Execution of encoded tasks by workers, local or remote."""
+
+    def submit(self, tasks: List[Task]) -> None:
+        """Hand tasks over to the workers."""
+
+    def results(self, run: int, count: int) -> Iterator[Result]:
+        """Yield the results of count submitted tasks of a run as they complete, dropping those of other runs."""
+
+    def cancel(self, run: int) -> None:
+        """Forget the tasks of a run, e.g. one that failed, so none of them is solved or yielded later."""
+
+    def close(self) -> None:
+        """Stop the workers and release the transport."""
+
+
+class PoolTransport:
+    """Transport running tasks in a local process pool."""
+
+    def __init__(self, handler: Callable[[bytes], bytes], workers: Optional[int] = None):
+        self.handler = handler
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.futures = dict()
+
+    def submit(self, tasks: List[Task]) -> None:
+        for task, _, payload in tasks:
+            self.futures[self.pool.submit(self.handler, payload)] = task
+
+    def results(self, run: int, count: int) -> Iterator[Result]:
+        futures = [future for future, task in self.futures.items() if task_run(task) == run][:count]
+        for future in as_completed(futures):
+            yield self.futures.pop(future), future.result()
+
+    def cancel(self, run: int) -> None:
+        for future in [future for future, task in self.futures.items() if task_run(task) == run]:
+            # Running tasks cannot be cancelled, their results are dropped with the future
+            future.cancel()
+            del self.futures[future]
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+class TaskBoard:
+    """
+    Task deques of the workers connected to a coordinator, with work stealing.
+
+    Submitted tasks are spread over the deques of the registered workers, largest first onto the least
+    loaded deque. A worker takes tasks from the front of its own deque and, once it is empty, steals from
+    the back of the most loaded one, so fast workers keep busy until all tasks are taken. Tasks taken by
+    a worker that has not completed them within the lease time are handed out again.
+    """
+
+    def __init__(self, lease_time: float = 600.):
+        self.lock = threading.Lock()
+        self.lease_time = lease_time
+        self.deques: Dict[int, Deque[Task]] = dict()
+        self.loads: Dict[int, float] = dict()
+        self.unassigned: Deque[Task] = deque()
+        self.leases: Dict[int, Tuple[Task, float]] = dict()
+        self.completed: Queue = Queue()
+        self.closed = False
+        self.stats: Dict[str, int] = {"submitted": 0, "completed": 0, "stolen": 0, "expired": 0}
+
+    def register(self) -> int:
+        """Register a worker and return its id."""
+
+        with self.lock:
+            worker = len(self.deques)
+            self.deques[worker] = deque()
+            self.loads[worker] = 0.
+            # Tasks submitted before any worker connected go to the first one, from which the others steal
+            while self.unassigned:
+                self._push(worker, self.unassigned.popleft())
+            return worker
+
+    def _push(self, worker: int, task: Task) -> None:
+        self.deques[worker].append(task)
+        self.loads[worker] += task[1]
+
+    def _pop(self, worker: int, front: bool) -> Task:
+        task = self.deques[worker].popleft() if front else self.deques[worker].pop()
+        self.loads[worker] -= task[1]
+        return task
+
+    def submit(self, tasks: List[Task]) -> None:
+        with self.lock:
+            self.stats["submitted"] += len(tasks)
+            for task in sorted(tasks, key=lambda task: -task[1]):
+                if self.deques:
+                    self._push(min(self.loads, key=self.loads.get), task)
+                else:
+                    self.unassigned.append(task)
+
+    def take(self, worker: int) -> Optional[Tuple[int, bytes]]:
+        """Next task of the worker: its own, a stolen one or an expired lease; None when there is none."""
+
+        with self.lock:
+            if self.deques[worker]:
+                task = self._pop(worker, front=True)
+            else:
+                victim = max(self.loads, key=lambda w: len(self.deques[w]))
+                if self.deques[victim]:
+                    task = self._pop(victim, front=False)
+                    self.stats["stolen"] += 1
+                else:
+                    task = self._expired_task()
+                    if task is None:
+                        return None
+            self.leases[task[0]] = (task, perf_counter())
+            return task[0], task[2]
+
+    def _expired_task(self) -> Optional[Task]:
+        now = perf_counter()
+        for task, taken in self.leases.values():
+            if now - taken > self.lease_time:
+                self.stats["expired"] += 1
+                return task
+        return None
+
+    def complete(self, task: int, payload: bytes) -> None:
+        """
+        Record the result of a task; results of tasks completed twice after an expired lease, and of cancelled
+        tasks, are dropped.
+        """
+
+        with self.lock:
+            if self.leases.pop(task, None) is None:
+                return
+            self.stats["completed"] += 1
+        self.completed.put((task, payload, None))
+
+    def fail(self, task: int, error: str) -> None:
+        """Report a task whose handler raised, failing the run of the coordinator."""
+
+        with self.lock:
+            if self.leases.pop(task, None) is None:
+                return
+        self.completed.put((task, None, error))
+
+    def cancel(self, run: int) -> None:
+        """Remove the waiting and leased tasks of a run, whose late results are then dropped."""
+
+        with self.lock:
+            for worker, tasks in self.deques.items():
+                self.deques[worker] = deque(task for task in tasks if task_run(task[0]) != run)
+                self.loads[worker] = sum(task[1] for task in self.deques[worker])
+            self.unassigned = deque(task for task in self.unassigned if task_run(task[0]) != run)
+            for task in [task for task in self.leases if task_run(task) == run]:
+                del self.leases[task]
+
+    def result(self, timeout: Optional[float] = None) -> Tuple[int, Optional[bytes], Optional[str]]:
+        return self.completed.get(timeout=timeout)
+
+    def close(self) -> None:
+        self.closed = True
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats)
+
+
+class BoardManager(BaseManager):
+    """Manager sharing a TaskBoard with workers over a socket."""
+
+
+BoardManager.register("board")
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a host name or address only accepts connections from this machine."""
+
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def new_authkey() -> bytes:
+    """Random authkey, printable so that it can be handed to workers through TLOPS_AUTHKEY."""
+
+    return secrets.token_hex(16).encode()
+
+
+def run_worker(address: Tuple[str, int], authkey: bytes, handler: Callable[[bytes], bytes],
+               poll_interval: float = .05) -> int:
+    """Solve tasks of the TaskBoard served at address until it is closed, returning the number of tasks solved."""
+
+    manager = BoardManager(address=address, authkey=authkey)
+    manager.connect()
+    board = manager.board()
+    worker, solved = board.register(), 0
+    try:
+        while not board.is_closed():
+            task = board.take(worker)
+            if task is None:
+                sleep(poll_interval)
+                continue
+            task, payload = task
+            try:
+                board.complete(task, handler(payload))
+            except Exception as error:
+                board.fail(task, f"{type(error).__name__}: {error}")
+            solved += 1
+    except (EOFError, ConnectionError):
+        # The coordinator closed the transport between two calls
+        pass
+    return solved
+
+
+class ManagerTransport:
+    """
+    Transport serving a TaskBoard to workers connecting over TCP, on this machine or others.
+
+    Remote workers are started with "python -m server.worker --address HOST:PORT" and the same authkey. For
+    tests and single machine runs, local_workers worker processes running handler are started by the transport.
+
+    Workers unpickle the tasks and the coordinator the results, so whoever knows the authkey runs code on both.
+    Without an authkey, a random one is generated (self.authkey), and only loopback addresses are accepted.
+    """
+
+    def __init__(self, address: Tuple[str, int] = ("127.0.0.1", 0), authkey: Optional[bytes] = None,
+                 handler: Optional[Callable[[bytes], bytes]] = None, local_workers: int = 0,
+                 lease_time: float = 600., poll_timeout: float = 1.):
+        if authkey is None:
+            assert is_loopback(address[0]), f"Serving on {address[0]}, beyond loopback, needs an explicit authkey"
+            authkey = new_authkey()
+        self.authkey = authkey
+        self.board = TaskBoard(lease_time)
+        self.poll_timeout = poll_timeout
+
+        class Manager(BoardManager):
+            pass
+
+        # The board lives in this process, the manager server only forwards the calls of the workers to it
+        Manager.register("board", callable=lambda: self.board)
+        self.server = Manager(address=address, authkey=authkey).get_server()
+        self.server.stop_event = threading.Event()
+        self.address: Tuple[str, int] = self.server.address
+        self.accepter = threading.Thread(target=self.accept, daemon=True)
+        self.accepter.start()
+
+        assert handler is not None or local_workers == 0, "Local workers need a task handler"
+        self.workers = [Process(target=run_worker, args=(self.address, authkey, handler), daemon=True)
+                        for _ in range(local_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def accept(self) -> None:
+        """Serve each worker connection in its own thread, like the manager server does, until closed."""
+
+        while True:
+            connection = self.server.listener.accept()
+            if self.server.stop_event.is_set():
+                connection.close()
+                return
+            threading.Thread(target=self.server.handle_request, args=(connection,), daemon=True).start()
+
+    def submit(self, tasks: List[Task]) -> None:
+        self.board.submit(tasks)
+
+    def results(self, run: int, count: int) -> Iterator[Result]:
+        received = 0
+        while received < count:
+            try:
+                task, payload, error = self.board.result(timeout=self.poll_timeout)
+            except Empty:
+                # Waiting in short timeouts keeps the coordinator interruptible while no worker is connected
+                continue
+            if task_run(task) != run:
+                # Late results and errors of a cancelled run
+                continue
+            if error is not None:
+                raise RuntimeError(f"Task {task_index(task)} of run {run} failed: {error}")
+            received += 1
+            yield task, payload
+
+    def cancel(self, run: int) -> None:
+        self.board.cancel(run)
+
+    def close(self) -> None:
+        self.board.close()
+        for worker in self.workers:
+            worker.join(timeout=5 * self.poll_timeout)
+        self.server.stop_event.set()
+        # A blocked accept() is not interrupted by closing the listener, so it is woken by a last connection
+        with socket.create_connection(self.address):
+            pass
+        self.accepter.join()
+        self.server.listener.close()
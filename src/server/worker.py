@@ -0,0 +1,28 @@
+import argparse
+import os
+from multiprocessing import Process
+
+from server.dispatch import run_task
+from server.transport import parse_address, run_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TLOPS element worker connecting to a ManagerTransport coordinator")
+    parser.add_argument("--address", required=True, help="HOST:PORT of the coordinator")
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes on this machine")
+    args = parser.parse_args()
+
+    # The authkey is shared through the environment rather than the command line, which other users can read
+    if not os.environ.get("TLOPS_AUTHKEY"):
+        parser.error("TLOPS_AUTHKEY is not set, use the authkey of the coordinator")
+    authkey = os.environ["TLOPS_AUTHKEY"].encode()
+    address = parse_address(args.address)
+    workers = [Process(target=run_worker, args=(address, authkey, run_task)) for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.element import ElementData, ElementType
+from solvers.base import BaseSolver
+
+# (kind, count) of consecutive rows or variables of one element, in the order the solvers create them
+Layout = List[Tuple[str, int]]
+
+
+def element_rows(element: ElementData, bound: Optional[str] = None) -> Layout:
+    """
+    Rows setup_constraints adds for an element: resource, time (sequential elements only), soft deadline,
+    hard deadline (an early and a late row per product, interleaved), minimum production and the bound row
+    of the criteria, if any.
+    """
+
+    config = element.config
+    n1, n2 = config.num_aggregated_products, config.num_soft_deadline_products
+    rows = [
+        ("resource", config.num_constraints),
+        ("time", n1 if config.type == ElementType.SEQUENTIAL else 0),
+        ("soft_deadline", n2),
+        ("hard_deadline", 2 * (n1 - n2)),
+        ("min_production", n1),
+    ]
+    if bound is not None:
+        rows.append((bound, 1))
+    return rows
+
+
+def element_variables(element: ElementData) -> Layout:
+    """Variables setup_variables creates for an element: y_e, z_e and t_0_e."""
+
+    config = element.config
+    return [("y", config.num_decision_variables), ("z", config.num_aggregated_products),
+            ("t_0", config.num_aggregated_products)]
+
+
+@dataclass(frozen=True)
+class ElementSensitivity:
+    """
+    Sensitivity data of the rows and variables of one element, as arrays per kind.
+
+    duals are the rates of change of the objective per unit increase of the bound of each row, non-negative on
+    binding <= rows of the maximization; rhs holds that bound. hard_deadline rows are split into their early
+    (-z_e_i <= T_e_i - D_e_i) and late (T_e_i - D_e_i <= z_e_i) rows.
+    """
+
+    element_id: int
+    duals: Dict[str, np.ndarray] = field(default_factory=dict)
+    slacks: Dict[str, np.ndarray] = field(default_factory=dict)
+    rhs: Dict[str, np.ndarray] = field(default_factory=dict)
+    reduced_costs: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class SolutionAnalysis:
+    """Duals, slacks and reduced costs of an optimal solution, per element and for the shared resource rows."""
+
+    objective: float
+    elements: List[ElementSensitivity]
+    shared_duals: np.ndarray
+    shared_slacks: np.ndarray
+
+    def estimate_rhs_change(self, e: int, kind: str, i: int, change: float) -> float:
+        """
+        Objective after changing the bound of row i of a kind of element e by change, from its dual.
+
+        The estimate is exact as long as the optimal basis stays the same, e.g. for resources with a positive
+        slack (dual 0) or small changes of binding ones, so a planner can compare changes without re-solving.
+        The optimums f_opt in the bound rows of the center criteria are those of the built model.
+        """
+
+        return self.objective + float(self.elements[e].duals[kind][i]) * change
+
+    def estimate_resource_change(self, e: int, i: int, share: float) -> float:
+        """Objective after changing resource i of element e by a share of its amount, e.g. .1 for +10%."""
+
+        return self.estimate_rhs_change(e, "resource", i, share * float(self.elements[e].rhs["resource"][i]))
+
+
+def split(values: np.ndarray, layout: Layout, offset: int) -> Tuple[Dict[str, np.ndarray], int]:
+    parts = dict()
+    for kind, count in layout:
+        parts[kind] = values[offset:offset + count]
+        offset += count
+    return parts, offset
+
+
+def split_hard_deadlines(parts: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    split_parts = dict()
+    for kind, values in parts.items():
+        if kind == "hard_deadline":
+            split_parts["hard_deadline_early"], split_parts["hard_deadline_late"] = values[0::2], values[1::2]
+        else:
+            split_parts[kind] = values
+    return split_parts
+
+
+def analyze_solution(solver: BaseSolver) -> SolutionAnalysis:
+    """
+    Sensitivity data of the optimal solution of a built solver, solving it first if needed.
+
+    All values are fetched from OR-Tools in bulk: duals and reduced costs from one MPSolutionResponse and the row
+    activities from ComputeConstraintActivities, then split into per element arrays with the layouts of the
+    solver, so models loaded from a model store or template are analyzed the same way.
+    """
+
+    from ortools.linear_solver import linear_solver_pb2
+
+    objective, solution = solver.solve()
+    assert solution, "Only optimal solutions can be analyzed"
+
+    response = linear_solver_pb2.MPSolutionResponse()
+    solver.solver.FillSolutionResponseProto(response)
+    duals = np.array(response.dual_value, dtype=np.float64)
+    reduced_costs = np.array(response.reduced_cost, dtype=np.float64)
+
+    activities = np.array(solver.solver.ComputeConstraintActivities(), dtype=np.float64)
+    constraints = solver.solver.constraints()
+    lower = np.fromiter((c.lb() for c in constraints), dtype=np.float64, count=len(constraints))
+    upper = np.fromiter((c.ub() for c in constraints), dtype=np.float64, count=len(constraints))
+
+    # Slack to the nearest bound, the finite one for one-sided rows and 0 for equalities
+    slacks = np.minimum(upper - activities, activities - lower)
+    rhs = np.where(np.isfinite(upper), upper, lower)
+
+    elements, row, column = list(), 0, 0
+    for element_id, rows, variables in solver.element_layouts():
+        element_duals, _ = split(duals, rows, row)
+        element_slacks, _ = split(slacks, rows, row)
+        element_rhs, row = split(rhs, rows, row)
+        element_reduced_costs, column = split(reduced_costs, variables, column)
+        elements.append(ElementSensitivity(
+            element_id=element_id,
+            duals=split_hard_deadlines(element_duals),
+            slacks=split_hard_deadlines(element_slacks),
+            rhs=split_hard_deadlines(element_rhs),
+            reduced_costs=element_reduced_costs,
+        ))
+
+    # Rows after those of the elements are the shared resource constraints
+    return SolutionAnalysis(objective=objective, elements=elements, shared_duals=duals[row:],
+                            shared_slacks=slacks[row:])
@@ -0,0 +1,310 @@
+import threading
+from dataclasses import dataclass, field, replace
+from time import perf_counter
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from solvers.base import BaseSolver
+from solvers.templates import proto_values
+
+
+@dataclass(frozen=True)
+class AnytimeResult:
+    """Best iterate of an AnytimeSolver so far, with its quality metrics."""
+
+    iterations: int
+    elapsed: float
+    objective: float  # Objective of the primal iterate, which may violate the constraints slightly
+    bound: float  # Objective bound from the dual iterate: an upper bound for maximization while it is dual feasible
+    gap: float  # |bound - objective| / (1 + |bound| + |objective|)
+    primal_violation: float  # Largest violation of a row or variable bound, relative to 1 + the bound
+    dual_violation: float  # Norm of the reduced costs the dual iterate leaves unbounded, relative to 1 + |c|
+    solution: Dict[str, Any] = field(default_factory=dict)
+    infeasible: bool = False  # The diverging dual iterates prove that the model has no feasible plan
+
+
+class LinearProgram:
+    """
+    Sparse LP l_c <= A * x <= u_c, l_x <= x <= u_x, min c^T * x, read from a built solver model.
+
+    Rows and columns are equilibrated (Ruiz scaling), the arrays of the scaled problem are the attributes, and
+    the unscale methods map iterates back to the model. Products with A use np.bincount over the coordinates.
+    """
+
+    def __init__(self, solver: BaseSolver, scaling_iterations: int = 10):
+        model = solver.export_proto()
+        values, lengths, columns = proto_values(model)
+        n, m = len(model.variable), len(model.constraint)
+        sections = np.cumsum([n, n, n, m, m, len(columns)])
+        lower, upper, objective, row_lower, row_upper, coefficients, offset = np.split(values, sections)
+
+        self.maximize = bool(model.maximize)
+        self.sign = -1. if self.maximize else 1.
+        self.offset = float(offset[0])
+        self.num_variables, self.num_rows = n, m
+        self.rows = np.repeat(np.arange(m), lengths)
+        self.columns = columns
+        self.original = (coefficients, objective, lower, upper, row_lower, row_upper)
+
+        # Ruiz equilibration: divide rows and columns by the square roots of their largest entries until all are near 1
+        row_scale, column_scale = np.ones(m), np.ones(n)
+        scaled = coefficients.copy()
+        for _ in range(scaling_iterations):
+            row_max, column_max = np.zeros(m), np.zeros(n)
+            np.maximum.at(row_max, self.rows, np.abs(scaled))
+            np.maximum.at(column_max, self.columns, np.abs(scaled))
+            row_factor = 1 / np.sqrt(np.where(row_max > 0, row_max, 1))
+            column_factor = 1 / np.sqrt(np.where(column_max > 0, column_max, 1))
+            row_scale *= row_factor
+            column_scale *= column_factor
+            scaled *= row_factor[self.rows] * column_factor[self.columns]
+
+        self.row_scale, self.column_scale = row_scale, column_scale
+        self.coefficients = scaled
+        self.objective = self.sign * objective * column_scale
+        self.lower, self.upper = lower / column_scale, upper / column_scale
+        self.row_lower, self.row_upper = row_lower * row_scale, row_upper * row_scale
+
+    def product(self, x: np.ndarray) -> np.ndarray:
+        """A * x"""
+
+        return np.bincount(self.rows, weights=self.coefficients * x[self.columns], minlength=self.num_rows)
+
+    def transposed_product(self, y: np.ndarray) -> np.ndarray:
+        """A^T * y"""
+
+        return np.bincount(self.columns, weights=self.coefficients * y[self.rows], minlength=self.num_variables)
+
+    def norm(self, iterations: int = 30) -> float:
+        """Estimate of the spectral norm of A by power iteration."""
+
+        x = np.random.default_rng(0).random(self.num_variables) + .5
+        estimate = 1.
+        for _ in range(iterations):
+            x = self.transposed_product(self.product(x))
+            estimate = np.linalg.norm(x)
+            if estimate == 0:
+                return 1.
+            x /= estimate
+        return float(np.sqrt(estimate))
+
+    def unscale(self, x: np.ndarray) -> np.ndarray:
+        return x * self.column_scale
+
+    def primal_violation(self, x: np.ndarray) -> float:
+        """Largest violation of a row or variable bound by values x of the model variables, relative to 1 + the bound."""
+
+        coefficients, _, lower, upper, row_lower, row_upper = self.original
+        activity = np.bincount(self.rows, weights=coefficients * x[self.columns], minlength=self.num_rows)
+        finite_lower = np.where(np.isfinite(row_lower), row_lower, 0)
+        finite_upper = np.where(np.isfinite(row_upper), row_upper, 0)
+        row_violation = (np.maximum(row_lower - activity, activity - row_upper)
+                         / (1 + np.maximum(np.abs(finite_lower), np.abs(finite_upper))))
+        return float(max(0., np.max(row_violation, initial=0.), np.max(lower - x, initial=0.),
+                         np.max(x - upper, initial=0.)))
+
+
+class AnytimeSolver:
+    """
+    Approximate solving of a built center or element model by a primal-dual hybrid gradient method (PDHG).
+
+    Iterations are matrix-vector products only, so a plan is available after any iteration or time budget long
+    before the simplex method finishes on very large models. Each result reports the objective, a bound from the
+    dual iterate, the relative gap between them and the violations of the primal and dual constraints. run()
+    continues from the previous state, start() keeps improving in a background thread until stop() or the
+    tolerance is reached, and best() returns the best result so far at any time.
+
+    The method follows PDLP: Ruiz scaling, a primal weight balancing the primal and dual steps, and restarts to the
+    average iterate whenever it reduces the KKT error enough. On infeasible models the dual iterates diverge along
+    a ray proving the infeasibility: the run stops once their movement is such a certificate, and the result is
+    marked infeasible.
+    """
+
+    def __init__(self, solver: BaseSolver, tolerance: float = 1e-4, check_interval: int = 64):
+        self.solver = solver
+        self.tolerance = tolerance
+        self.check_interval = check_interval
+        self.lp = LinearProgram(solver)
+        self.layouts = solver.element_layouts()
+
+        lp = self.lp
+        self.x = np.clip(np.zeros(lp.num_variables), lp.lower, lp.upper)
+        self.y = np.zeros(lp.num_rows)
+        self.step = .9 / lp.norm()
+        bounds = np.concatenate([lp.row_lower[np.isfinite(lp.row_lower)], lp.row_upper[np.isfinite(lp.row_upper)]])
+        objective_norm, bounds_norm = np.linalg.norm(lp.objective), np.linalg.norm(bounds)
+        self.primal_weight = objective_norm / bounds_norm if objective_norm > 0 and bounds_norm > 0 else 1.
+
+        self.iterations = 0
+        self.elapsed = 0.
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.result: Optional[AnytimeResult] = None
+        self.best_error = float("inf")
+
+    def kkt(self, x: np.ndarray, y: np.ndarray) -> Tuple[float, float, float, float, float]:
+        """Objective, bound, gap, primal and dual violation of an iterate of the scaled problem, in model units."""
+
+        lp = self.lp
+        primal_violation = lp.primal_violation(lp.unscale(x))
+
+        # Dual function: min_{x in box}((c + A^T * y)^T * x) - g*(y) of min c^T * x + g(A * x)
+        reduced = lp.objective + lp.transposed_product(y)
+        unbounded = ((reduced > 0) & ~np.isfinite(lp.lower)) | ((reduced < 0) & ~np.isfinite(lp.upper))
+        box = np.where(reduced > 0, lp.lower, np.where(reduced < 0, lp.upper, 0))
+        # g*(y) = sum_i(y_i * u_i if y_i > 0 else y_i * l_i), the prox step keeps y_i at 0 towards infinite bounds
+        conjugate = np.where(y > 0, y * np.where(np.isfinite(lp.row_upper), lp.row_upper, 0),
+                             y * np.where(np.isfinite(lp.row_lower), lp.row_lower, 0))
+        dual_value = float(np.sum(reduced[~unbounded] * box[~unbounded])) - float(np.sum(conjugate))
+        dual_violation = float(np.linalg.norm(reduced[unbounded] / lp.column_scale[unbounded])
+                               / (1 + np.linalg.norm(lp.objective / lp.column_scale)))
+
+        primal_value = float(lp.objective @ x)
+        objective_value = lp.sign * primal_value + lp.offset
+        bound = lp.sign * dual_value + lp.offset
+        gap = abs(bound - objective_value) / (1 + abs(bound) + abs(objective_value))
+        return objective_value, bound, gap, primal_violation, dual_violation
+
+    def certifies_infeasibility(self, ray: np.ndarray) -> bool:
+        """
+        Whether a dual direction proves the scaled problem infeasible (Farkas): every x of the box has
+        (A^T * ray)^T * x > g*(ray), while A * x in [l_c, u_c] gives (A^T * ray)^T * x <= g*(ray).
+        """
+
+        lp = self.lp
+        reduced = lp.transposed_product(ray)
+        unbounded = ((reduced > 0) & ~np.isfinite(lp.lower)) | ((reduced < 0) & ~np.isfinite(lp.upper))
+        box = np.where(reduced > 0, lp.lower, np.where(reduced < 0, lp.upper, 0))
+        # The ray may not grow towards an infinite row bound, where g* is infinite
+        infinite = ((ray > 0) & ~np.isfinite(lp.row_upper)) | ((ray < 0) & ~np.isfinite(lp.row_lower))
+        conjugate = np.where(ray > 0, ray * np.where(np.isfinite(lp.row_upper), lp.row_upper, 0),
+                             ray * np.where(np.isfinite(lp.row_lower), lp.row_lower, 0))
+        value = float(np.sum(reduced[~unbounded] * box[~unbounded])) - float(np.sum(conjugate))
+        violation = float(np.linalg.norm(np.concatenate([reduced[unbounded], ray[infinite]])))
+        return value > 0 and violation <= self.tolerance * value
+
+    def solution(self, x: np.ndarray) -> Dict[str, Any]:
+        """Variable values in the structure of the center solvers: a list per element for each variable kind."""
+
+        x_model, solution, offset = self.lp.unscale(x), dict(), 0
+        for _, _, variables in self.layouts:
+            for kind, count in variables:
+                solution.setdefault(kind, list()).append(x_model[offset:offset + count].tolist())
+                offset += count
+        return solution
+
+    def record(self, x: np.ndarray, y: np.ndarray, initial: bool = False) -> float:
+        """
+        Keep the iterate if it is the best so far, returning its KKT error.
+
+        The initial point is kept only until the first iterate: its zero gap often gives it a smaller error than
+        the early iterates, which are still far better plans.
+        """
+
+        objective, bound, gap, primal_violation, dual_violation = self.kkt(x, y)
+        error = float(np.sqrt(gap ** 2 + primal_violation ** 2 + dual_violation ** 2))
+        if error <= self.best_error or initial:
+            self.best_error = float("inf") if initial else error
+            result = AnytimeResult(self.iterations, self.elapsed, objective, bound, gap, primal_violation,
+                                   dual_violation, self.solution(x))
+            with self.lock:
+                self.result = result
+        return error
+
+    def run(self, iterations: Optional[int] = None, time_limit: Optional[float] = None) -> AnytimeResult:
+        """Iterate until the budget is used, the tolerance is reached or stop() is called; return best()."""
+
+        if self.result is not None and self.result.infeasible:
+            return self.best()
+
+        lp = self.lp
+        start, elapsed, done = perf_counter(), self.elapsed, 0
+        x, y = self.x, self.y
+        x_sum, y_sum, count = np.zeros_like(x), np.zeros_like(y), 0
+        x_restart, y_restart = x.copy(), y.copy()
+        restart_error = candidate_error = self.record(x, y, initial=self.result is None)
+
+        while not self.stop_event.is_set():
+            if iterations is not None and done >= iterations:
+                break
+            if time_limit is not None and perf_counter() - start >= time_limit:
+                break
+
+            tau, sigma = self.step / self.primal_weight, self.step * self.primal_weight
+            y_start = y
+            for _ in range(self.check_interval):
+                # x+ = proj_X(x - tau * (c + A^T * y)), y+ = prox_{sigma * g*}(y + sigma * A * (2 * x+ - x))
+                x_next = np.clip(x - tau * (lp.objective + lp.transposed_product(y)), lp.lower, lp.upper)
+                v = y + sigma * lp.product(2 * x_next - x)
+                y = v - sigma * np.clip(v / sigma, lp.row_lower, lp.row_upper)
+                x = x_next
+                x_sum += x
+                y_sum += y
+                count += 1
+            done += self.check_interval
+            self.iterations += self.check_interval
+            self.elapsed = elapsed + perf_counter() - start
+
+            if self.certifies_infeasibility(y - y_start):
+                with self.lock:
+                    self.result = replace(self.result, iterations=self.iterations, elapsed=self.elapsed,
+                                          infeasible=True)
+                break
+
+            # Restart from the better of the current and the average iterate once the KKT error decays enough
+            # since the last restart, or stops decaying, or after a share of all iterations (PDLP criteria)
+            current_error = self.record(x, y)
+            average = x_sum / count, y_sum / count
+            average_error = self.record(*average)
+            candidate, error = ((x, y), current_error) if current_error < average_error else (average, average_error)
+            if (error <= .2 * restart_error or .8 * restart_error >= error > candidate_error
+                    or count >= .36 * self.iterations):
+                x, y = candidate
+                primal_move = np.linalg.norm(x - x_restart)
+                dual_move = np.linalg.norm(y - y_restart)
+                if primal_move > 1e-10 and dual_move > 1e-10:
+                    # Primal weight update towards the ratio of the dual and primal movements since the last restart
+                    self.primal_weight = float(np.exp(.5 * np.log(dual_move / primal_move)
+                                                      + .5 * np.log(self.primal_weight)))
+                x_restart, y_restart, restart_error = x.copy(), y.copy(), error
+                x_sum, y_sum, count = np.zeros_like(x), np.zeros_like(y), 0
+                error = float("inf")
+            candidate_error = error
+
+            if self.best_error <= self.tolerance:
+                break
+
+        self.x, self.y = x, y
+        return self.best()
+
+    def best(self) -> AnytimeResult:
+        with self.lock:
+            return self.result
+
+    def start(self, time_limit: Optional[float] = None) -> None:
+        """Keep improving in a background thread; NumPy releases the GIL during the products."""
+
+        assert self.thread is None, "The solver is already running in the background"
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, kwargs={"time_limit": time_limit}, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> AnytimeResult:
+        """Stop the background iterations and return the best result."""
+
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        return self.best()
+
+
+def solve_anytime(solver: BaseSolver, time_limit: Optional[float] = None, iterations: Optional[int] = None,
+                  tolerance: float = 1e-4) -> AnytimeResult:
+    """Build the model of a solver if needed and solve it approximately within the budget."""
+
+    if solver.solver.NumVariables() == 0:
+        solver.setup()
+    return AnytimeSolver(solver, tolerance).run(iterations, time_limit)
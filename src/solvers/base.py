@@ -1,14 +1,22 @@
 from abc import ABC, abstractmethod
-from typing import Any, Tuple, Dict, Optional
+from typing import Any, Tuple, Dict, Optional, List
 
-from ortools.linear_solver import pywraplp
+from numpy import ndarray
+
+from solvers.cache import ModelStore
+from utils import memory
+from utils.tracing import span
 
 
 class BaseSolver(ABC):
     """Base class for all optimization solvers."""
 
-    def __init__(self):
+    def __init__(self, cache: Optional[ModelStore] = None):
+        # OR-Tools is loaded with the first solver, so data-only code does not pay for the native library
+        from ortools.linear_solver import pywraplp
+
         self.solver = pywraplp.Solver.CreateSolver("GLOP")
+        self.cache = cache
         self.solved = False
         self.objective_value: Optional[float] = None
         self.solution: Optional[Dict[str, Any]] = None
@@ -32,26 +40,116 @@ class BaseSolver(ABC):
         pass
 
     def setup(self):
-        """Set up the optimization problem."""
+        """Set up the optimization problem, loading a prepared model from the model store when it has one."""
+
+        with span("setup", solver=type(self).__name__) as args:
+            if self.cache is not None:
+                with span("model_store_load"):
+                    loaded = self.cache.load(self)
+                if loaded:
+                    args.update(loaded=True)
+                    return
+
+            with span("build", solver=type(self).__name__) as build:
+                with span("setup_variables"):
+                    self.setup_variables()
+                with span("setup_constraints"):
+                    self.setup_constraints()
+                with span("setup_objective"):
+                    self.setup_objective()
+            args.update(variables=self.solver.NumVariables(), constraints=self.solver.NumConstraints())
+            if memory.is_enabled():
+                # Counting the nonzeros exports the model, so it happens after the measured build span, whose args
+                # are only written at the end of the enclosing setup span
+                build.update(constraints=args["constraints"], nonzeros=memory.excluded(
+                    lambda: sum(len(constraint.var_index) for constraint in self.export_proto().constraint)))
+
+            if self.cache is not None:
+                with span("model_store_store"):
+                    self.cache.store(self)
+
+    def model_key(self) -> Optional[str]:
+        """Key of the inputs defining the built model, or None if the model cannot be cached."""
+
+        return None
+
+    def template_signature(self) -> Optional[Tuple]:
+        """Shape signature determining the structure of the built model, or None if it has no template."""
+
+        return None
+
+    def template_parameters(self) -> ndarray:
+        """Flat vector of the numbers filled into the template of the model."""
+
+        raise NotImplementedError(f"{type(self).__name__} does not support model templates")
+
+    def template_probe(self, parameters: ndarray) -> "BaseSolver":
+        """Solver of the same structure whose template parameters are replaced by the given values."""
+
+        raise NotImplementedError(f"{type(self).__name__} does not support model templates")
+
+    def bind_variables(self, variables: List[Any]) -> None:
+        """Assign the variables of a loaded model, in creation order, to the solver attributes."""
+
+        raise NotImplementedError(f"{type(self).__name__} does not support loading models")
 
-        self.setup_variables()
-        self.setup_constraints()
-        self.setup_objective()
+    def element_layouts(self) -> List[Tuple[int, List[Tuple[str, int]], List[Tuple[str, int]]]]:
+        """Id, row kinds and variable kinds of each element of the model in creation order, see solvers.analysis."""
+
+        raise NotImplementedError(f"{type(self).__name__} does not support solution analysis")
+
+    def export_proto(self) -> Any:
+        """Built model as an OR-Tools MPModelProto."""
+
+        from ortools.linear_solver import linear_solver_pb2
+
+        model = linear_solver_pb2.MPModelProto()
+        self.solver.ExportModelToProto(model)
+        return model
+
+    def export_model(self) -> bytes:
+        """Serialize the built model as an OR-Tools MPModelProto."""
+
+        return self.export_proto().SerializeToString()
+
+    def load_proto(self, model: Any) -> None:
+        """Replace the model with an OR-Tools MPModelProto of the same structure as the built one."""
+
+        error = self.solver.LoadModelFromProtoKeepNames(model)
+        assert not error, f"Model could not be loaded: {error}"
+        self.bind_variables(self.solver.variables())
+
+    def load_model(self, model: bytes) -> None:
+        """Replace the model with a serialized MPModelProto produced by export_model."""
+
+        from ortools.linear_solver import linear_solver_pb2
+
+        self.load_proto(linear_solver_pb2.MPModelProto.FromString(model))
 
     def solve(self) -> Tuple[float, Any]:
         """Solve the optimization problem."""
 
         if not self.solved:
             self.solved = True
-            status = self.solver.Solve()
-            if status == pywraplp.Solver.OPTIMAL:
+            with span("solve", solver=type(self).__name__) as args:
+                status = self.solver.Solve()
+                args.update(status=status)
+            if status == self.solver.OPTIMAL:
                 self.objective_value = self.solver.Objective().Value()
-                self.solution = self.get_solution()
+                with span("extract", solver=type(self).__name__):
+                    self.solution = self.get_solution()
             else:
                 self.objective_value = float("inf")
                 self.solution = dict()
         return self.objective_value, self.solution
 
+    def invalidate(self) -> None:
+        """Forget the previous solution, so the next solve() runs the solver again on the modified model."""
+
+        self.solved = False
+        self.objective_value = None
+        self.solution = None
+
     def get_objective_value(self) -> float:
         """Get the objective value of the optimization."""
 
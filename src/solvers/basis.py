@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from solvers.scenarios import ModelBuilder
+
+# Basis statuses of OR-Tools MathOpt (BasisStatusProto)
+FREE, AT_LOWER_BOUND, AT_UPPER_BOUND, FIXED_VALUE, BASIC = 1, 2, 3, 4, 5
+
+# Bits of a key below its kind, and of the kind below its scope (e.g. the element)
+INDEX_BITS, KIND_BITS = 32, 8
+
+
+def keys(scope: int, kind: int, index: np.ndarray) -> np.ndarray:
+    """Keys of variables or rows of a kind, e.g. the plan y_e, of a scope, e.g. an element, by their indices."""
+
+    return ((np.int64(scope) << KIND_BITS | kind) << INDEX_BITS) | np.asarray(index, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class Basis:
+    """
+    Basis statuses of the variables and rows of a solved LP under their keys, from which a later model whose
+    variables and rows carry the same keys starts.
+    """
+
+    variable_keys: np.ndarray
+    variable_status: np.ndarray
+    row_keys: np.ndarray
+    row_status: np.ndarray
+
+
+@dataclass(frozen=True)
+class LPResult:
+    """Solution of a KeyedBuilder model with its basis; values are empty if it is not optimal."""
+
+    optimal: bool
+    objective: float
+    values: np.ndarray
+    basis: Optional[Basis]
+    iterations: int
+    warm: bool  # Whether the solve started from a basis
+
+
+class KeyedBuilder(ModelBuilder):
+    """ModelBuilder whose variables and rows carry keys identifying them in the models of later solves."""
+
+    def __init__(self):
+        super().__init__()
+        self.variable_keys: List[np.ndarray] = list()
+        self.row_keys: List[np.ndarray] = list()
+
+    def key_variables(self, variable_keys: np.ndarray) -> None:
+        """Key the next variables in creation order, e.g. those added by a helper creating them itself."""
+
+        self.variable_keys.append(np.asarray(variable_keys, dtype=np.int64).ravel())
+
+    def key_rows(self, row_keys: np.ndarray) -> None:
+        """Key the next rows in creation order."""
+
+        self.row_keys.append(np.asarray(row_keys, dtype=np.int64).ravel())
+
+
+def at_bound(lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Non-basic statuses at the lower bound of each item if it has one, else at its upper bound, else free."""
+
+    return np.select([lower == upper, np.isfinite(lower), np.isfinite(upper)],
+                     [FIXED_VALUE, AT_LOWER_BOUND, AT_UPPER_BOUND], FREE)
+
+
+def mapped_status(item_keys: np.ndarray, lower: np.ndarray, upper: np.ndarray, basis_keys: np.ndarray,
+                  basis_status: np.ndarray, default: int) -> np.ndarray:
+    """
+    Statuses of keys in a basis, default for keys it does not have, with the non-basic statuses moved to bounds
+    the items still have: fixed items are at their value, and items without the bound they were at are at the
+    other one, or free.
+    """
+
+    status = np.full(len(item_keys), default, dtype=np.int64)
+    if len(basis_keys):
+        by_key = np.argsort(basis_keys)
+        found = np.minimum(np.searchsorted(basis_keys, item_keys, sorter=by_key), len(basis_keys) - 1)
+        known = basis_keys[by_key[found]] == item_keys
+        status[known] = basis_status[by_key[found[known]]]
+
+    nonbasic = np.flatnonzero(status != BASIC)
+    at_upper = (status[nonbasic] == AT_UPPER_BOUND) & np.isfinite(upper[nonbasic]) \
+               & (lower[nonbasic] != upper[nonbasic])
+    status[nonbasic] = np.where(at_upper, AT_UPPER_BOUND, at_bound(lower[nonbasic], upper[nonbasic]))
+    return status
+
+
+def balance(variable_status: np.ndarray, row_status: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+            row_lower: np.ndarray, row_upper: np.ndarray) -> None:
+    """
+    Make the number of basic statuses equal to the number of rows, as a basis must.
+
+    Rows and columns of removed items may leave a basis with more or fewer basic statuses. Extra basic fixed
+    variables and then row slacks become non-basic, and missing basic statuses are taken by row slacks, newest
+    rows first, so the basis stays close to the previous one; GLOP repairs a singular result.
+    """
+
+    excess = int((variable_status == BASIC).sum() + (row_status == BASIC).sum()) - len(row_status)
+    if excess > 0:
+        fixed = np.flatnonzero((variable_status == BASIC) & (lower == upper))[:excess]
+        variable_status[fixed] = FIXED_VALUE
+        excess -= len(fixed)
+        # A non-basic row slack is at a bound of the row, which the simplex repairs if the row is not
+        rows = np.flatnonzero(row_status == BASIC)[::-1][:excess]
+        row_status[rows] = at_bound(row_lower[rows], row_upper[rows])
+        excess -= len(rows)
+        if excess > 0:
+            columns = np.flatnonzero(variable_status == BASIC)[::-1][:excess]
+            variable_status[columns] = at_bound(lower[columns], upper[columns])
+    elif excess < 0:
+        rows = np.flatnonzero(row_status != BASIC)[::-1][:-excess]
+        row_status[rows] = BASIC
+
+
+def solve_lp(builder: KeyedBuilder, maximize: bool = False, basis: Optional[Basis] = None) -> LPResult:
+    """
+    Solve the model of a builder with GLOP through OR-Tools MathOpt, starting from the statuses a basis has for
+    its keys if given: new variables at a bound and new rows basic.
+
+    pywraplp does not expose starting bases, while a warm start is what keeps re-solving a slightly changed
+    model cheap.
+    """
+
+    from ortools.math_opt import callback_pb2, model_parameters_pb2, parameters_pb2, result_pb2
+    from ortools.math_opt.core.python import solver
+
+    variable_keys = np.concatenate(builder.variable_keys) if builder.variable_keys else np.zeros(0, np.int64)
+    row_keys = np.concatenate(builder.row_keys) if builder.row_keys else np.zeros(0, np.int64)
+    assert len(variable_keys) == builder.num_variables and len(row_keys) == builder.num_rows, \
+        f"Keyed {len(variable_keys)} of {builder.num_variables} variables and {len(row_keys)} of {builder.num_rows} rows"
+
+    model_parameters = model_parameters_pb2.ModelSolveParametersProto()
+    if basis is not None:
+        lower, upper, row_lower, row_upper = builder.bounds()
+        variable_status = mapped_status(variable_keys, lower, upper, basis.variable_keys, basis.variable_status,
+                                        AT_LOWER_BOUND)
+        row_status = mapped_status(row_keys, row_lower, row_upper, basis.row_keys, basis.row_status, BASIC)
+        balance(variable_status, row_status, lower, upper, row_lower, row_upper)
+        initial = model_parameters.initial_basis
+        initial.variable_status.ids.extend(range(builder.num_variables))
+        initial.variable_status.values.extend(variable_status.tolist())
+        initial.constraint_status.ids.extend(range(builder.num_rows))
+        initial.constraint_status.values.extend(row_status.tolist())
+
+    result = solver.solve(builder.mathopt_proto(maximize), parameters_pb2.SOLVER_TYPE_GLOP,
+                          parameters_pb2.SolverInitializerProto(), parameters_pb2.SolveParametersProto(),
+                          model_parameters, None, callback_pb2.CallbackRegistrationProto(), None, None)
+    iterations = int(result.solve_stats.simplex_iterations)
+    if result.termination.reason != result_pb2.TERMINATION_REASON_OPTIMAL or not result.solutions:
+        return LPResult(False, float("inf"), np.zeros(0), None, iterations, basis is not None)
+
+    solution = result.solutions[0]
+    values = np.zeros(builder.num_variables)
+    values[np.asarray(solution.primal_solution.variable_values.ids, dtype=np.int64)] = \
+        solution.primal_solution.variable_values.values
+
+    def statuses(vector, count: int) -> np.ndarray:
+        status = np.full(count, BASIC, dtype=np.int64)
+        status[np.asarray(vector.ids, dtype=np.int64)] = vector.values
+        return status
+
+    return LPResult(True, solution.primal_solution.objective_value, values,
+                    Basis(variable_keys, statuses(solution.basis.variable_status, builder.num_variables),
+                          row_keys, statuses(solution.basis.constraint_status, builder.num_rows)),
+                    iterations, basis is not None)
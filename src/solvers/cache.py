@@ -0,0 +1,83 @@
+import json
+import os
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, Optional, Protocol, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from solvers.base import BaseSolver
+
+# Bump when the variables or constraints created by the solvers change, so stale models are not loaded
+MODEL_FORMAT_VERSION = 1
+
+
+def model_key(solver_name: str, *inputs: Any) -> str:
+    """Cache key of a built model from the solver name and the JSON-compatible inputs defining it."""
+
+    payload = json.dumps([MODEL_FORMAT_VERSION, solver_name, *inputs], default=float)
+    return sha256(payload.encode()).hexdigest()
+
+
+class ModelStore(Protocol):
+    """Source of prepared models used by BaseSolver.setup() instead of building them in Python."""
+
+    def load(self, solver: "BaseSolver") -> bool:
+        """Load a prepared model into the solver, returning False if none is available."""
+
+    def store(self, solver: "BaseSolver") -> None:
+        """Remember the model the solver has just built."""
+
+
+class ModelCache:
+    """
+    Directory of built solver models stored as serialized OR-Tools MPModelProto messages.
+
+    A solver created with a cache looks its model up by the key of its inputs in setup() and loads it
+    directly into OR-Tools, skipping the Python construction of variables and constraints. Models that
+    are not found are built as usual and stored for the next run.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stored": 0}
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.pb"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Serialized model stored under the key, if any."""
+
+        try:
+            model = self.path(key).read_bytes()
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return model
+
+    def put(self, key: str, model: bytes) -> None:
+        """Store a serialized model, atomically so concurrent workers never read a partial file."""
+
+        with NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+            f.write(model)
+        os.replace(f.name, self.path(key))
+        self.stats["stored"] += 1
+
+    def load(self, solver: "BaseSolver") -> bool:
+        key = solver.model_key()
+        model = self.get(key) if key is not None else None
+        if model is None:
+            return False
+        solver.load_model(model)
+        return True
+
+    def store(self, solver: "BaseSolver") -> None:
+        key = solver.model_key()
+        if key is not None:
+            self.put(key, solver.export_model())
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.pb"):
+            path.unlink()
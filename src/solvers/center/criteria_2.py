@@ -1,50 +1,63 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
+from numpy import array, ndarray
+
+from data.serialization import digest_center_data
 from models.center import CenterData
 from models.element import ElementType
+from solvers.analysis import element_rows, element_variables
 from solvers.base import BaseSolver
+from solvers.cache import ModelStore, model_key
+from solvers.templates import element_signature, center_parameters, center_from_parameters
 from solvers.element.default import ElementSolver
+from solvers.element.presolve import PresolvedElementSolver
 from utils.assertions import assert_valid_dimensions, assert_bounds, assert_non_negative, assert_positive
 from utils.helpers import (stringify, tab_out, copy_element_coeffs, calculate_priority_order, get_completion_times,
                            lp_sum)
+from utils.tracing import span
+from utils.validators import is_validated, mark_validated
 
 
 class CenterCriteria2Solver(BaseSolver):
     """Implementation of the second optimization criteria for the center."""
 
-    def __init__(self, data: CenterData, delta: List[float]):
-        super().__init__()
-        for e, (element) in enumerate(data.elements):
-            assert_valid_dimensions(
-                [data.coeffs_functional[e]],
-                [(data.elements[e].config.num_decision_variables,)],
-                [f"coeffs_functional[{e}]"]
-            )
+    def __init__(self, data: CenterData, delta: List[float], f_2opt: Optional[List[float]] = None,
+                 cache: Optional[ModelStore] = None, presolve: bool = False):
+        super().__init__(cache)
+        # Systems validated by utils.validators.validate_center_data skip the per-value checks
+        if not is_validated(data):
+            for e, (element) in enumerate(data.elements):
+                assert_valid_dimensions(
+                    [data.coeffs_functional[e]],
+                    [(data.elements[e].config.num_decision_variables,)],
+                    [f"coeffs_functional[{e}]"]
+                )
+                assert_non_negative(
+                    element.config.id,
+                    f"element.config.id[{e}]"
+                )
+                assert_positive(
+                    element.config.num_decision_variables,
+                    f"element.config.num_decision_variables[{e}]"
+                )
+                assert_positive(
+                    element.config.num_aggregated_products,
+                    f"element.config.num_aggregated_products[{e}]"
+                )
+                assert_non_negative(
+                    element.config.num_soft_deadline_products,
+                    f"element.config.num_soft_deadline_products[{e}]"
+                )
+                assert_positive(
+                    element.config.num_constraints,
+                    f"element.config.num_constraints[{e}]"
+                )
+        for e in range(data.config.num_elements):
             assert_bounds(
                 delta[e],
                 (0, 1),
                 f"delta[{e}]"
             )
-            assert_non_negative(
-                element.config.id,
-                f"element.config.id[{e}]"
-            )
-            assert_positive(
-                element.config.num_decision_variables,
-                f"element.config.num_decision_variables[{e}]"
-            )
-            assert_positive(
-                element.config.num_aggregated_products,
-                f"element.config.num_aggregated_products[{e}]"
-            )
-            assert_non_negative(
-                element.config.num_soft_deadline_products,
-                f"element.config.num_soft_deadline_products[{e}]"
-            )
-            assert_positive(
-                element.config.num_constraints,
-                f"element.config.num_constraints[{e}]"
-            )
 
         self.data = data
         self.delta = delta
@@ -54,12 +67,26 @@ class CenterCriteria2Solver(BaseSolver):
         self.f_2opt: List[float] = list()
         self.order: List[List[int]] = [calculate_priority_order(element) for element in data.elements]
 
-        for e in range(data.config.num_elements):
-            element_data = copy_element_coeffs(data.elements[e], data.coeffs_functional[e])
-            element_solver = ElementSolver(element_data)
-            element_solver.setup()
-            f_e_2opt = element_solver.solve()[0]
-            self.f_2opt.append(f_e_2opt)
+        if f_2opt is not None:
+            # Reuse the element optimums already computed by the caller
+            assert_valid_dimensions(
+                [array(f_2opt)],
+                [(data.config.num_elements,)],
+                ["f_2opt"]
+            )
+            self.f_2opt = list(f_2opt)
+        else:
+            for e in range(data.config.num_elements):
+                with span("f_opt", element=e):
+                    element_data = copy_element_coeffs(data.elements[e], data.coeffs_functional[e])
+                    if is_validated(data):
+                        # The center coefficients replacing the element ones were validated with the system
+                        mark_validated(element_data)
+                    # Presolved element models drop the rows and columns the data already decides
+                    element_solver = (PresolvedElementSolver if presolve else ElementSolver)(element_data, cache)
+                    element_solver.setup()
+                    f_e_2opt = element_solver.solve()[0]
+                self.f_2opt.append(f_e_2opt)
 
     def setup_variables(self) -> None:
         """Set up optimization variables."""
@@ -78,6 +105,41 @@ class CenterCriteria2Solver(BaseSolver):
                 for i in range(element.config.num_aggregated_products)
             ])
 
+    def bind_variables(self, variables: List[Any]) -> None:
+        """Assign the variables of a loaded model: y_e, z_e and t_0_e of each element in creation order."""
+
+        offset = 0
+        for element in self.data.elements:
+            n, n1 = element.config.num_decision_variables, element.config.num_aggregated_products
+            self.y.append(variables[offset:offset + n])
+            self.z.append(variables[offset + n:offset + n + n1])
+            self.t_0.append(variables[offset + n + n1:offset + n + 2 * n1])
+            offset += n + 2 * n1
+
+    def model_key(self) -> str:
+        return model_key(type(self).__name__, digest_center_data(self.data), self.delta, self.f_2opt)
+
+    def template_signature(self) -> Optional[Tuple]:
+        if self.data.shared_resources is not None:
+            # Shared resources are not template parameters, coupled systems are always built
+            return None
+        return type(self).__name__, tuple(element_signature(element, self.order[e])
+                                          for e, (element) in enumerate(self.data.elements))
+
+    def template_parameters(self) -> ndarray:
+        return center_parameters(self.data, [f_e * (1 - delta_e) for f_e, delta_e in zip(self.f_2opt, self.delta)])
+
+    def template_probe(self, parameters: ndarray) -> "CenterCriteria2Solver":
+        data, bounds = center_from_parameters(self.data, parameters)
+        # The probe takes the bound f_2opt_e * (1 - delta_e) as a whole through f_2opt with zero delta
+        probe = CenterCriteria2Solver(data, [0.] * data.config.num_elements, f_2opt=bounds)
+        probe.order = self.order
+        return probe
+
+    def element_layouts(self) -> List[Tuple[int, List[Tuple[str, int]], List[Tuple[str, int]]]]:
+        return [(element.config.id, element_rows(element, "suboptimality"), element_variables(element))
+                for element in self.data.elements]
+
     def setup_constraints(self) -> None:
         """Set up optimization constraints."""
 
@@ -123,6 +185,17 @@ class CenterCriteria2Solver(BaseSolver):
                 >= self.f_2opt[e] * (1 - self.delta[e])
             )
 
+        if self.data.shared_resources is not None:
+            # Shared resource constraints: sum_e(SHARED_RESOURCE_COSTS[e] * y_e) <= SHARED_RESOURCE_LIMITS
+            shared = self.data.shared_resources
+            for r in range(shared.num_resources):
+                self.solver.Add(
+                    lp_sum(shared.costs[e][r][i] * self.y[e][i]
+                           for e, (element) in enumerate(self.data.elements)
+                           for i in range(element.config.num_decision_variables))
+                    <= shared.limits[r]
+                )
+
     def setup_objective(self) -> None:
         """
         Set up the objective function.
@@ -0,0 +1,254 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.center import CenterData
+from models.element import ElementData
+from solvers.center.pool import ProcessPool
+from solvers.session import build_block_solver
+from utils.assertions import assert_bounds, assert_positive
+from utils.tracing import span
+
+# (pricing optimum, element objective, shared resource usage A_e * y_e, column index) of one priced block
+Column = Tuple[float, float, np.ndarray, int]
+
+
+class BlockPricer:
+    """
+    Element blocks of a center problem priced against shared resource prices.
+
+    Each block is the center problem of a single element (see solvers.session.build_block_solver), built once.
+    Pricing sets its y objective coefficients to C_e - SHARED_RESOURCE_COSTS[e]^T * lambda and re-solves it;
+    every column found is kept here, so only its objective and resource usage leave the pricer.
+    """
+
+    def __init__(self, elements: List[ElementData], center_coeffs: List[np.ndarray], costs: List[np.ndarray],
+                 criteria: int, delta: List[float], f_opt: List[Optional[float]]):
+        self.blocks, self.f_opt = list(), list()
+        for e, (element) in enumerate(elements):
+            solver, f_e_opt = build_block_solver(element, center_coeffs[e], criteria, delta[e], f_opt[e])
+            self.blocks.append(solver)
+            self.f_opt.append(f_e_opt)
+        self.order = [solver.order[0] for solver in self.blocks]
+        self.costs = costs
+
+        # Objective coefficients of the blocks without prices: C_e for y_e and -FINES_FOR_DEADLINE[e] for z_e
+        self.base = [(np.array([solver.solver.Objective().GetCoefficient(v) for v in solver.y[0]]),
+                      np.array([solver.solver.Objective().GetCoefficient(v) for v in solver.z[0]]))
+                     for solver in self.blocks]
+        self.columns: List[List[Tuple[List[float], List[float], List[float]]]] = [list() for _ in self.blocks]
+
+    def price(self, prices: np.ndarray) -> List[Column]:
+        """Solve every block with the y objective C_e - SHARED_RESOURCE_COSTS[e]^T * prices."""
+
+        priced = list()
+        for b, (solver) in enumerate(self.blocks):
+            base_y, base_z = self.base[b]
+            objective = solver.solver.Objective()
+            for i, (coeff) in enumerate(base_y - self.costs[b].T @ prices):
+                objective.SetCoefficient(solver.y[0][i], float(coeff))
+            solver.invalidate()
+
+            value, solution = solver.solve()
+            if not solution:
+                priced.append((float("inf"), float("inf"), np.zeros(len(prices)), -1))
+                continue
+
+            y_e, z_e = np.array(solution["y"][0]), np.array(solution["z"][0])
+            self.columns[b].append((solution["y"][0], solution["z"][0], solution["t_0"][0]))
+            priced.append((value, float(base_y @ y_e + base_z @ z_e), self.costs[b] @ y_e, len(self.columns[b]) - 1))
+        return priced
+
+    def combine(self, weights: List[Dict[int, float]]) -> List[Tuple[List[float], List[float], List[float]]]:
+        """Convex combinations of the columns of every block, as y_e, z_e and t_0_e."""
+
+        combined = list()
+        for b, (block_weights) in enumerate(weights):
+            columns = [(weight, self.columns[b][k]) for k, weight in block_weights.items()]
+            combined.append(tuple(
+                [float(v) for v in sum(weight * np.array(column[part]) for weight, column in columns)]
+                for part in range(3)
+            ))
+        return combined
+
+    def handle(self, message: Tuple) -> Any:
+        command, *args = message
+        with span(command, "pricing", blocks=len(self.blocks)):
+            if command == "price":
+                return self.price(*args)
+            if command == "combine":
+                return self.combine(*args)
+            if command == "built":
+                return list(zip(self.f_opt, self.order))
+        raise ValueError(f"Unknown pricing command {command}")
+
+
+class PricingPool(ProcessPool):
+    """
+    Element blocks split over pricing processes (see solvers.center.pool.ProcessPool) by the size of their
+    models, answering in element order. With a single process the blocks are priced here.
+    """
+
+    def __init__(self, data: CenterData, criteria: int, delta: List[float], f_opt: List[Optional[float]],
+                 processes: int = 1):
+        def chunk_args(chunk: List[int]) -> Tuple:
+            return ([data.elements[e] for e in chunk], [data.coeffs_functional[e] for e in chunk],
+                    [data.shared_resources.costs[e] for e in chunk], criteria, [delta[e] for e in chunk],
+                    [f_opt[e] for e in chunk])
+
+        super().__init__(BlockPricer, [self.block_cost(element) for element in data.elements], chunk_args,
+                         processes, "Pricing")
+        built = self.call("built")
+        self.f_opt: List[float] = [f_e_opt for f_e_opt, _ in built]
+        self.order: List[List[int]] = [order for _, order in built]
+
+    @staticmethod
+    def block_cost(element: ElementData) -> float:
+        """Estimated pricing cost of a block, the size of its model: n_e * (m_e + n1_e)."""
+
+        config = element.config
+        return float(config.num_decision_variables * (config.num_constraints + config.num_aggregated_products))
+
+
+class DecompositionSolver:
+    """
+    Center problem with shared resources solved by Dantzig-Wolfe decomposition.
+
+    The master LP chooses a convex combination of known block solutions (columns) per element subject to the
+    shared resource constraints, whose violation is allowed at a large penalty so the master is always feasible.
+    Its duals, the shared resource prices lambda, are passed to the element blocks, priced in parallel by a
+    PricingPool; blocks whose priced solution improves the master add it as a new column. Every pricing round
+    also gives the Lagrangian upper bound lambda^T * SHARED_RESOURCE_LIMITS + sum_e(max_block_e((C_e -
+    SHARED_RESOURCE_COSTS[e]^T * lambda)^T * y_e - FINES^T * z_e)), so the solve stops at a relative gap.
+
+    The master has one row per element and per shared resource only, and the blocks are the models the center
+    session builds anyway, so the size of the systems solved is limited by the number of elements times the
+    pricing rounds rather than by one GLOP model over all elements.
+    """
+
+    def __init__(self, data: CenterData, criteria: int = 1, delta: Optional[List[float]] = None,
+                 f_opt: Optional[List[float]] = None, processes: int = 1, tolerance: float = 1e-6,
+                 max_iterations: int = 200, penalty: float = 1e6):
+        assert criteria in (1, 2), f"Criteria {criteria} is not implemented"
+        assert data.shared_resources is not None, "DecompositionSolver needs a system with shared resources"
+        assert_positive(processes, "processes")
+        assert_positive(max_iterations, "max_iterations")
+        delta = [0.] * data.config.num_elements if delta is None else list(delta)
+        for e, (d) in enumerate(delta):
+            assert_bounds(d, (0, 1), f"delta[{e}]")
+
+        self.data = data
+        self.criteria = criteria
+        self.delta = delta
+        self.processes = processes
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.penalty = penalty
+        self.pool = PricingPool(data, criteria, delta, [None] * data.config.num_elements if f_opt is None else f_opt,
+                                processes)
+        self.f_opt: List[float] = self.pool.f_opt
+        self.order: List[List[int]] = self.pool.order
+
+        self.iterations = 0
+        self.bound = float("inf")  # Best Lagrangian upper bound
+        self.gap = float("inf")
+        self.infeasibility = 0.  # Total violation of the shared resources by the final solution
+        self.solved = False
+        self.objective_value: Optional[float] = None
+        self.solution: Optional[Dict[str, Any]] = None
+
+    def solve(self) -> Tuple[float, Dict[str, Any]]:
+        """Run column generation until the gap closes, returning the objective and solution like the center solvers."""
+
+        if self.solved:
+            return self.objective_value, self.solution
+        self.solved = True
+        self.objective_value, self.solution = float("inf"), dict()
+
+        from ortools.linear_solver import pywraplp
+
+        shared = self.data.shared_resources
+        master = pywraplp.Solver.CreateSolver("GLOP")
+        # Presolve would be redone for every round and fails on masters with many near-parallel columns
+        master.SetSolverSpecificParametersAsString("use_preprocessing: false")
+        objective = master.Objective()
+        objective.SetMaximization()
+
+        # Convexity constraints: sum_k(w_e_k) = 1 for every element e
+        convexity = [master.Constraint(1, 1) for _ in range(self.data.config.num_elements)]
+
+        # Shared resource constraints: sum_e sum_k(w_e_k * SHARED_RESOURCE_COSTS[e] * y_e_k) - s <= SHARED_RESOURCE_LIMITS
+        coupling = [master.Constraint(-master.infinity(), float(limit)) for limit in shared.limits]
+        slacks = [master.NumVar(0, master.infinity(), f"s_{r}") for r in range(shared.num_resources)]
+        for r, (slack) in enumerate(slacks):
+            coupling[r].SetCoefficient(slack, -1)
+            objective.SetCoefficient(slack, -self.penalty)
+
+        weights: List[List[Tuple[int, Any]]] = [list() for _ in convexity]
+
+        def add_column(e: int, column: Column) -> None:
+            _, element_objective, usage, k = column
+            w = master.NumVar(0, master.infinity(), f"w_{e}_{k}")
+            weights[e].append((k, w))
+            convexity[e].SetCoefficient(w, 1)
+            for r, (amount) in enumerate(usage):
+                coupling[r].SetCoefficient(w, float(amount))
+            objective.SetCoefficient(w, element_objective)
+
+        prices = np.zeros(shared.num_resources)
+        columns = self.pool.call("price", prices)
+        if any(value == float("inf") for value, *_ in columns):
+            return self.objective_value, self.solution
+        for e, (column) in enumerate(columns):
+            add_column(e, column)
+
+        while True:
+            self.iterations += 1
+            with span("master_solve", iteration=self.iterations, columns=master.NumVariables()) as args:
+                status = master.Solve()
+                args.update(status=status)
+            if status != master.OPTIMAL:
+                return self.objective_value, self.solution
+
+            # Duals of a maximization are non-negative on binding <= rows, rounding noise is clipped
+            prices = np.maximum(0, np.array([row.dual_value() for row in coupling]))
+            convexity_prices = np.array([row.dual_value() for row in convexity])
+            columns = self.pool.call("price", prices)
+
+            self.bound = min(self.bound, float(prices @ shared.limits + sum(value for value, *_ in columns)))
+            self.gap = (self.bound - objective.Value()) / max(1., abs(self.bound))
+
+            # Columns with a positive reduced cost: priced optimum - mu_e > 0
+            improving = [(e, column) for e, (column) in enumerate(columns)
+                         if column[0] - convexity_prices[e] > self.tolerance * max(1., abs(convexity_prices[e]))]
+            if not improving or self.gap <= self.tolerance or self.iterations >= self.max_iterations:
+                break
+            for e, column in improving:
+                add_column(e, column)
+
+        self.infeasibility = float(sum(slack.solution_value() for slack in slacks))
+        if self.infeasibility > self.tolerance * max(1., float(np.abs(shared.limits).sum())):
+            # The elements cannot meet their constraints within the shared resources
+            return self.objective_value, self.solution
+
+        combined = self.pool.call("combine", per_item=[{k: w.solution_value() for k, w in element_weights
+                                                           if w.solution_value() > 0}
+                                                          for element_weights in weights])
+        self.objective_value = objective.Value() + self.penalty * self.infeasibility
+        self.solution = {
+            "y": [y_e for y_e, _, _ in combined],
+            "z": [z_e for _, z_e, _ in combined],
+            "t_0": [t_0_e for _, _, t_0_e in combined],
+        }
+        return self.objective_value, self.solution
+
+    def close(self) -> None:
+        """Stop the pricing processes."""
+
+        self.pool.close()
+
+    def __enter__(self) -> "DecompositionSolver":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
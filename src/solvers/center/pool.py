@@ -0,0 +1,99 @@
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+def run_worker(connection: Connection, worker: Callable[..., Any], args: Tuple) -> None:
+    """Pool process: build worker(*args) and answer the coordinator with its handle() until it sends close."""
+
+    try:
+        handler = worker(*args)
+        connection.send(("ok", None))
+        while True:
+            message = connection.recv()
+            if message[0] == "close":
+                break
+            connection.send(("ok", handler.handle(message)))
+    except Exception as error:
+        connection.send(("error", f"{type(error).__name__}: {error}"))
+    finally:
+        connection.close()
+
+
+class ProcessPool:
+    """
+    Items split over processes, largest first onto the least loaded one, each process holding a worker built once
+    from the arguments of its chunk of items.
+
+    A worker answers messages (command, *args) by its handle() method with one answer per item of its chunk. Calls
+    are sent to all processes before any answer is awaited, so the chunks are handled in parallel, and answers are
+    returned in item order. With a single process the worker is built and called here.
+    """
+
+    def __init__(self, worker: Callable[..., Any], costs: List[float], chunk_args: Callable[[List[int]], Tuple],
+                 processes: int = 1, name: str = "Pool"):
+        self.name = name
+        processes = max(1, min(processes, len(costs)))
+        loads, self.chunks = [0.] * processes, [list() for _ in range(processes)]
+        for i in sorted(range(len(costs)), key=lambda i: -costs[i]):
+            p = int(np.argmin(loads))
+            self.chunks[p].append(i)
+            loads[p] += costs[i]
+
+        self.local: Optional[Any] = None
+        self.connections: List[Connection] = list()
+        self.processes: List[Process] = list()
+        if processes == 1:
+            self.local = worker(*chunk_args(self.chunks[0]))
+        else:
+            for chunk in self.chunks:
+                connection, child = Pipe()
+                process = Process(target=run_worker, args=(child, worker, chunk_args(chunk)), daemon=True)
+                process.start()
+                child.close()
+                self.connections.append(connection)
+                self.processes.append(process)
+            for connection in self.connections:
+                self.receive(connection)
+
+    def receive(self, connection: Connection) -> Any:
+        status, payload = connection.recv()
+        if status == "error":
+            raise RuntimeError(f"{self.name} process failed: {payload}")
+        return payload
+
+    def gather(self, answers: List[List[Any]]) -> List[Any]:
+        """Per item answers in item order from the per chunk answers."""
+
+        gathered = [None] * sum(len(chunk) for chunk in self.chunks)
+        for chunk, answer in zip(self.chunks, answers):
+            for i, value in zip(chunk, answer):
+                gathered[i] = value
+        return gathered
+
+    def call(self, command: str, *args: Any, per_item: Optional[List[Any]] = None) -> List[Any]:
+        """Send a command to every worker, with its share of the per item argument, and gather the answers."""
+
+        def message(chunk: List[int]) -> Tuple:
+            return (command, *args) if per_item is None else (command, [per_item[i] for i in chunk])
+
+        if self.local is not None:
+            return self.gather([self.local.handle(message(self.chunks[0]))])
+
+        for chunk, connection in zip(self.chunks, self.connections):
+            connection.send(message(chunk))
+        return self.gather([self.receive(connection) for connection in self.connections])
+
+    def close(self) -> None:
+        for connection in self.connections:
+            try:
+                connection.send(("close",))
+            except (BrokenPipeError, OSError):
+                # The process already stopped after reporting an error
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections, self.processes = list(), list()
@@ -0,0 +1,515 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.element import ElementData
+from models.scenarios import ElementScenarios, ScenarioData
+from solvers.base import BaseSolver
+from solvers.center.pool import ProcessPool
+from solvers.scenarios import (RISK_MEASURES, ModelBuilder, add_recourse_rows, add_quality_rows, risk_value,
+                               representative)
+from utils.assertions import assert_bounds, assert_positive
+from utils.helpers import calculate_priority_order, stringify, tab_out
+from utils.tracing import span
+
+
+def solution_values(solver: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """Values and reduced costs of all variables of a solved pywraplp model, read in bulk."""
+
+    from ortools.linear_solver import linear_solver_pb2
+
+    response = linear_solver_pb2.MPSolutionResponse()
+    solver.FillSolutionResponseProto(response)
+    return np.array(response.variable_value), np.array(response.reduced_cost)
+
+
+def plan_variables(builder: ModelBuilder, element: ElementData) -> np.ndarray:
+    """
+    Plan y_e of an element.
+
+    Minimum production constraints y_e_i >= y_assigned_e_i, i=1..n1_e, are the lower bounds of the variables.
+    """
+
+    n, n1 = element.config.num_decision_variables, element.config.num_aggregated_products
+    return builder.variables(n, lower=np.concatenate([element.num_directive_products, np.zeros(n - n1)]))
+
+
+def add_resource_rows(builder: ModelBuilder, element: ElementData, scenarios: ElementScenarios,
+                      y: np.ndarray) -> None:
+    """
+    Resource constraints of a plan shared by all scenarios: MS_AGGREGATED_PLAN_COSTS[e] * y_e <= VS_RESOURCE_CONSTRAINTS[e][s]
+    for every scenario s, that is <= min_s(VS_RESOURCE_CONSTRAINTS[e][s]).
+    """
+
+    m = element.config.num_constraints
+    builder.rows(np.broadcast_to(y, (m, len(y))), element.aggregated_plan_costs,
+                 upper=scenarios.resource_constraints.min(axis=0))
+
+
+def add_element_block(builder: ModelBuilder, element: ElementData, scenarios: ElementScenarios,
+                      order: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Plan, and start times and deadline deviations of every scenario, of an element with its constraints."""
+
+    num_scenarios, n1 = scenarios.num_scenarios, element.config.num_aggregated_products
+    y = plan_variables(builder, element)
+    z = builder.variables((num_scenarios, n1))
+    t_0 = builder.variables((num_scenarios, n1))
+    add_resource_rows(builder, element, scenarios, y)
+    add_recourse_rows(builder, element, order, scenarios.aggregated_plan_times, scenarios.directive_terms,
+                      np.broadcast_to(y[:n1], (num_scenarios, n1)), z, t_0)
+    return y, z, t_0
+
+
+def fines_costs(element: ElementData, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Recourse cost of each scenario as columns and values: sum_j={1..n1_e}(FINES_FOR_DEADLINE[e][j] * z_e_s_j)."""
+
+    return z, np.broadcast_to(element.fines_for_deadline, z.shape)
+
+
+def robust_optimum(element: ElementData, center_coeffs: np.ndarray, scenarios: ElementScenarios, order: List[int],
+                   risk: str) -> float:
+    """
+    Robust optimum of the center quality of an element alone:
+    max risk_s(VS_COEFFS_CENTER_FUNCTIONAL[e]^T * y_e - FINES_FOR_DEADLINE[e]^T * z_e_s), inf if not solved.
+    """
+
+    from ortools.linear_solver import pywraplp
+
+    builder = ModelBuilder()
+    y, z, _ = add_element_block(builder, element, scenarios, order)
+    add_quality_rows(builder, y, center_coeffs, *fines_costs(element, z), scenarios.probabilities, risk,
+                     objective=1.)
+    solver = pywraplp.Solver.CreateSolver("GLOP")
+    solver.LoadModelFromProto(builder.proto(maximize=True))
+    if solver.Solve() != solver.OPTIMAL:
+        return float("inf")
+    return solver.Objective().Value()
+
+
+def quality_bounds(criteria: int, f_opt: float, delta: float) -> Tuple[float, float]:
+    """Bounds of the center quality of an element: f_opt_e (criteria 1) or >= (1 - delta_e) * f_opt_e (criteria 2)."""
+
+    return (f_opt, f_opt) if criteria == 1 else (f_opt * (1 - delta), np.inf)
+
+
+class RobustSolver(BaseSolver):
+    """
+    Center criteria 1 or 2 over the scenarios of a system, solved as one LP over all scenarios (extensive form).
+
+    The plan y_e is shared by all scenarios and fits the resources of every scenario, while the start times
+    t_0_e_s and deadline deviations z_e_s follow the plan times and directive terms of each scenario. The quality
+    of element e in scenario s is C_e^T * y_e - FINES_FOR_DEADLINE[e]^T * z_e_s, its center quality the same with
+    the center coefficients, and the risk measure (expected or worst case) makes one quality of the scenarios:
+
+    max sum_e(risk_s(C_e^T * y_e - FINES^T * z_e_s)) with risk_s(VS_COEFFS_CENTER_FUNCTIONAL[e]^T * y_e - FINES^T * z_e_s)
+    = f_opt_e (criteria 1) or >= (1 - delta_e) * f_opt_e (criteria 2), f_opt_e the robust optimum of the element.
+
+    The model is assembled from NumPy blocks over all scenarios (solvers.scenarios.ModelBuilder) and loaded as
+    one MPModelProto; ScenarioDecompositionSolver solves the same problem without building it as a whole.
+    """
+
+    def __init__(self, data: ScenarioData, criteria: int = 1, delta: Optional[List[float]] = None,
+                 risk: str = "expected", f_opt: Optional[List[float]] = None):
+        super().__init__()
+        assert criteria in (1, 2), f"Criteria {criteria} is not implemented"
+        assert risk in RISK_MEASURES, f"Unknown risk measure {risk}, expected one of {list(RISK_MEASURES)}"
+        num_elements = data.data.config.num_elements
+        delta = [0.] * num_elements if delta is None else list(delta)
+        for e, (d) in enumerate(delta):
+            assert_bounds(d, (0, 1), f"delta[{e}]")
+
+        self.data = data
+        self.criteria = criteria
+        self.delta = delta
+        self.risk = risk
+        self.order: List[List[int]] = [calculate_priority_order(element) for element in data.data.elements]
+        self.builder = ModelBuilder()
+        self.y: List[np.ndarray] = list()
+        self.z: List[np.ndarray] = list()
+        self.t_0: List[np.ndarray] = list()
+        self.recourse: Dict[str, List[np.ndarray]] = dict()
+
+        if f_opt is not None:
+            assert len(f_opt) == num_elements, f"f_opt needs {num_elements} values, got {len(f_opt)}"
+            self.f_opt = list(f_opt)
+        else:
+            self.f_opt = list()
+            for e, (element) in enumerate(data.data.elements):
+                with span("f_opt", element=e):
+                    self.f_opt.append(robust_optimum(element, data.data.coeffs_functional[e], data.scenarios[e],
+                                                     self.order[e], risk))
+
+    def setup_variables(self) -> None:
+        """Set up the plan of every element and the start times and deadline deviations of every scenario."""
+
+        for element, scenarios in zip(self.data.data.elements, self.data.scenarios):
+            self.y.append(plan_variables(self.builder, element))
+            self.z.append(self.builder.variables((scenarios.num_scenarios, element.config.num_aggregated_products)))
+            self.t_0.append(self.builder.variables((scenarios.num_scenarios,
+                                                    element.config.num_aggregated_products)))
+
+    def setup_constraints(self) -> None:
+        """Set up the constraints of every scenario and the bounds of the center qualities."""
+
+        for e, (element, scenarios) in enumerate(zip(self.data.data.elements, self.data.scenarios)):
+            n1 = element.config.num_aggregated_products
+            add_resource_rows(self.builder, element, scenarios, self.y[e])
+            add_recourse_rows(self.builder, element, self.order[e], scenarios.aggregated_plan_times,
+                              scenarios.directive_terms, np.broadcast_to(self.y[e][:n1], (scenarios.num_scenarios, n1)),
+                              self.z[e], self.t_0[e])
+            # Optimality or suboptimality constraint: risk_s(VS_COEFFS_CENTER_FUNCTIONAL[e]^T * y_e - FINES^T * z_e_s) = f_opt_e or >= (1 - delta_e) * f_opt_e
+            add_quality_rows(self.builder, self.y[e], self.data.data.coeffs_functional[e],
+                             *fines_costs(element, self.z[e]), scenarios.probabilities, self.risk,
+                             *quality_bounds(self.criteria, self.f_opt[e], self.delta[e]))
+
+        shared = self.data.data.shared_resources
+        if shared is not None:
+            # Shared resource constraints: sum_e(SHARED_RESOURCE_COSTS[e] * y_e) <= SHARED_RESOURCE_LIMITS
+            self.builder.rows(np.broadcast_to(np.concatenate(self.y), (shared.num_resources, sum(map(len, self.y)))),
+                              np.concatenate(shared.costs, axis=1), upper=shared.limits)
+
+    def setup_objective(self) -> None:
+        """
+        Set up the objective function and load the model.
+
+        max sum_e(risk_s(C_e^T * y_e - sum_j={1..n1_e}(FINES_FOR_DEADLINE[e][j] * z_e_s_j)))
+        """
+
+        for e, (element, scenarios) in enumerate(zip(self.data.data.elements, self.data.scenarios)):
+            add_quality_rows(self.builder, self.y[e], element.coeffs_functional, *fines_costs(element, self.z[e]),
+                             scenarios.probabilities, self.risk, objective=1.)
+        self.solver.LoadModelFromProto(self.builder.proto(maximize=True))
+
+    def get_solution(self) -> Dict[str, Any]:
+        """
+        Plan of every element with the deadline deviations and start times of the scenarios the risk measure
+        optimizes: their expectation, or those of the worst scenario of the element.
+        """
+
+        if self.solution is None:
+            values, _ = solution_values(self.solver)
+            self.recourse = {"z": [values[z] for z in self.z], "t_0": [values[t_0] for t_0 in self.t_0]}
+            self.solution = recourse_solution(self.data, [values[y] for y in self.y], self.recourse, self.risk)
+        return self.solution
+
+    def print_results(self) -> None:
+        """Print the robust qualities of the elements."""
+
+        objective, solution = self.solve()
+        if objective == float("inf"):
+            print("\nNo optimal solution found.")
+            return
+
+        tab_out(f"\nRobust center (criteria {self.criteria}, {self.risk} quality over the scenarios)", [
+            (stringify(element.config.id), self.data.scenarios[e].num_scenarios, stringify(self.f_opt[e]),
+             stringify(solution["y"][e]))
+            for e, (element) in enumerate(self.data.data.elements)
+        ], ["Element", "Scenarios", "f_opt", "y_e"])
+        print(f"\nRobust center quality functionality: {stringify(objective)}")
+
+
+def recourse_solution(data: ScenarioData, plans: List[np.ndarray], recourse: Dict[str, List[np.ndarray]],
+                      risk: str) -> Dict[str, Any]:
+    """Solution in the structure of the center solvers, with the representative scenario values of each element."""
+
+    solution = {"y": [[float(v) for v in y_e] for y_e in plans], "z": list(), "t_0": list()}
+    for e, (element, scenarios) in enumerate(zip(data.data.elements, data.scenarios)):
+        costs = recourse["z"][e] @ element.fines_for_deadline
+        for name in ("z", "t_0"):
+            solution[name].append([float(v) for v in representative(recourse[name][e], costs,
+                                                                    scenarios.probabilities, risk)])
+    return solution
+
+
+class ScenarioEvaluator:
+    """
+    Recourse problems of batches of scenarios: for a plan y_e, the start times and deadline deviations of a
+    scenario minimizing its fines, with the recourse cost R_e_s(y_e) = min FINES_FOR_DEADLINE[e]^T * z_e_s.
+
+    A batch of scenarios of one element is one LP built once, in which every scenario has its own copy of the
+    planned amounts y_e_1..y_e_n1 fixed by their bounds. Re-solving after changing the bounds warm starts GLOP,
+    and the reduced costs of the copies are the subgradients of R_e_s at the plan.
+    """
+
+    def __init__(self, batches: List[Tuple[ElementData, List[int], np.ndarray, np.ndarray]]):
+        from ortools.linear_solver import pywraplp
+
+        self.batches = list()
+        for element, order, plan_times, directive_terms in batches:
+            builder = ModelBuilder()
+            shape = plan_times.shape
+            y = builder.variables(shape)
+            z = builder.variables(shape, objective=np.broadcast_to(element.fines_for_deadline, shape))
+            t_0 = builder.variables(shape)
+            add_recourse_rows(builder, element, order, plan_times, directive_terms, y, z, t_0)
+
+            solver = pywraplp.Solver.CreateSolver("GLOP")
+            solver.LoadModelFromProto(builder.proto())
+            variables = solver.variables()
+            self.batches.append((solver, [variables[i] for i in y.ravel().tolist()], y, z, t_0, element))
+        self.values: List[Optional[np.ndarray]] = [None] * len(self.batches)
+
+    def evaluate(self, plans: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Recourse costs (B,) and their subgradients (B, n1) of every batch for the plan of its element."""
+
+        evaluated = list()
+        for b, ((solver, copies, y, z, _, element), plan) in enumerate(zip(self.batches, plans)):
+            for variable, value in zip(copies, np.tile(plan, len(y)).tolist()):
+                variable.SetBounds(value, value)
+            status = solver.Solve()
+            if status != solver.OPTIMAL:
+                raise RuntimeError(f"Recourse problem of element {element.config.id} not solved, status {status}")
+
+            values, reduced_costs = solution_values(solver)
+            self.values[b] = values
+            evaluated.append((values[z] @ element.fines_for_deadline, reduced_costs[y]))
+        return evaluated
+
+    def recourse(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Deadline deviations and start times (B, n1) of every batch for the last evaluated plans."""
+
+        return [(values[z], values[t_0]) for (_, _, _, z, t_0, _), values in zip(self.batches, self.values)]
+
+    def handle(self, message: Tuple) -> Any:
+        command, *args = message
+        with span(command, "scenarios", batches=len(self.batches)):
+            if command == "evaluate":
+                return self.evaluate(*args)
+            if command == "recourse":
+                return self.recourse()
+        raise ValueError(f"Unknown scenario command {command}")
+
+
+class ScenarioPool(ProcessPool):
+    """
+    Scenario batches of all elements split over evaluation processes (see solvers.center.pool.ProcessPool) by
+    the size of their recourse problems. With a single process the batches are evaluated here.
+    """
+
+    def __init__(self, data: ScenarioData, order: List[List[int]], batch_size: int = 64, processes: int = 1):
+        # Batches (element, first scenario, last scenario + 1) of at most batch_size scenarios
+        self.batches: List[Tuple[int, int, int]] = [
+            (e, start, min(start + batch_size, scenarios.num_scenarios))
+            for e, (scenarios) in enumerate(data.scenarios)
+            for start in range(0, scenarios.num_scenarios, batch_size)
+        ]
+
+        def cost(batch: Tuple[int, int, int]) -> float:
+            # Size of the recourse problem of a batch: B * n1_e^2 coefficients at most
+            e, start, stop = batch
+            return float((stop - start) * data.data.elements[e].config.num_aggregated_products ** 2)
+
+        def chunk_args(chunk: List[int]) -> Tuple:
+            return ([(data.data.elements[e], order[e], data.scenarios[e].aggregated_plan_times[start:stop],
+                      data.scenarios[e].directive_terms[start:stop])
+                     for e, start, stop in map(self.batches.__getitem__, chunk)],)
+
+        super().__init__(ScenarioEvaluator, [cost(batch) for batch in self.batches], chunk_args, processes, "Scenario")
+        self.num_elements = data.data.config.num_elements
+
+    def per_element(self, answers: List[Tuple[np.ndarray, ...]]) -> List[Tuple[np.ndarray, ...]]:
+        """Per batch answers joined into the answers of every element over all its scenarios, in scenario order."""
+
+        parts: List[List[Tuple[np.ndarray, ...]]] = [list() for _ in range(self.num_elements)]
+        for (e, _, _), answer in zip(self.batches, answers):
+            parts[e].append(answer)
+        return [tuple(np.concatenate(arrays) for arrays in zip(*element_parts)) for element_parts in parts]
+
+    def evaluate(self, plans: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Recourse costs (S,) and subgradients (S, n1) of every element for plans of the aggregated products."""
+
+        return self.per_element(self.call("evaluate", per_item=[plans[e] for e, _, _ in self.batches]))
+
+    def recourse(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Deadline deviations and start times (S, n1) of every element for the last evaluated plans."""
+
+        return self.per_element(self.call("recourse"))
+
+
+class ScenarioDecompositionSolver:
+    """
+    The problem of RobustSolver solved by scenario decomposition (the L-shaped method with one cut per scenario).
+
+    The master LP holds the plans y_e and, instead of the deadline deviations of the scenarios, one variable
+    theta_e_s >= 0 per scenario underestimating its recourse cost R_e_s(y_e) = min FINES^T * z_e_s; qualities are
+    C_e^T * y_e - theta_e_s. The scenario batches of a ScenarioPool evaluate R_e_s and its subgradient g_e_s at
+    the master plan in parallel, and every scenario whose cost the master underestimates adds the optimality cut
+    theta_e_s >= R_e_s + g_e_s^T * (y_e - plan_e). The master optimum is an upper bound of the robust optimum,
+    the qualities of the plan with its true recourse costs the objective, so the solve stops at a relative gap.
+
+    The element optimums are found first by the same cuts with the center qualities as the objective, the
+    cuts staying valid when the master then switches to criteria 1 or 2. The master has a row per resource and
+    scenario only, and the recourse problems are built once per batch, so S in the hundreds stays tractable.
+    """
+
+    def __init__(self, data: ScenarioData, criteria: int = 1, delta: Optional[List[float]] = None,
+                 risk: str = "expected", f_opt: Optional[List[float]] = None, processes: int = 1,
+                 batch_size: int = 64, tolerance: float = 1e-6, max_iterations: int = 500):
+        assert criteria in (1, 2), f"Criteria {criteria} is not implemented"
+        assert risk in RISK_MEASURES, f"Unknown risk measure {risk}, expected one of {list(RISK_MEASURES)}"
+        assert_positive(processes, "processes")
+        assert_positive(batch_size, "batch_size")
+        assert_positive(max_iterations, "max_iterations")
+        num_elements = data.data.config.num_elements
+        delta = [0.] * num_elements if delta is None else list(delta)
+        for e, (d) in enumerate(delta):
+            assert_bounds(d, (0, 1), f"delta[{e}]")
+        assert f_opt is None or len(f_opt) == num_elements, f"f_opt needs {num_elements} values"
+
+        self.data = data
+        self.criteria = criteria
+        self.delta = delta
+        self.risk = risk
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.order: List[List[int]] = [calculate_priority_order(element) for element in data.data.elements]
+        self.f_opt: Optional[List[float]] = None if f_opt is None else list(f_opt)
+        self.pool = ScenarioPool(data, self.order, batch_size, processes)
+
+        self.iterations = 0
+        self.cuts = 0
+        self.bound = float("inf")  # Master optimum, an upper bound of the robust optimum
+        self.gap = float("inf")
+        self.violation = 0.  # Largest shortfall of a center quality below its bound with the true recourse costs
+        self.recourse: Dict[str, List[np.ndarray]] = dict()
+        self.solved = False
+        self.objective_value: Optional[float] = None
+        self.solution: Optional[Dict[str, Any]] = None
+
+    def build_master(self) -> None:
+        """Master LP with the center qualities as the objective and the shared resources not yet limited."""
+
+        from ortools.linear_solver import pywraplp
+
+        builder = ModelBuilder()
+        self.y, self.theta, self.q, self.w = list(), list(), list(), list()
+        for e, (element, scenarios) in enumerate(zip(self.data.data.elements, self.data.scenarios)):
+            y = plan_variables(builder, element)
+            add_resource_rows(builder, element, scenarios, y)
+            # Fines and deadline deviations are non-negative, so are the recourse costs
+            theta = builder.variables(scenarios.num_scenarios)
+            costs = (theta[:, None], np.ones((scenarios.num_scenarios, 1)))
+            self.q.append(add_quality_rows(builder, y, self.data.data.coeffs_functional[e], *costs,
+                                           scenarios.probabilities, self.risk, objective=1.))
+            self.w.append(add_quality_rows(builder, y, element.coeffs_functional, *costs, scenarios.probabilities,
+                                           self.risk))
+            self.y.append(y)
+            self.theta.append(theta)
+
+        self.master = pywraplp.Solver.CreateSolver("GLOP")
+        # Presolve would be redone for every round of cuts and fails on masters with many near-parallel cuts
+        self.master.SetSolverSpecificParametersAsString("use_preprocessing: false, use_scaling: false")
+        self.master.LoadModelFromProto(builder.proto(maximize=True))
+        self.variables = self.master.variables()
+
+        # Free rows are dropped when a proto is loaded, so the unlimited shared resource rows are added after it
+        self.shared_rows = list()
+        shared = self.data.data.shared_resources
+        if shared is not None:
+            plans = np.concatenate(self.y).tolist()
+            for costs in np.concatenate(shared.costs, axis=1):
+                row = self.master.Constraint(-self.master.infinity(), self.master.infinity())
+                for k in np.flatnonzero(costs).tolist():
+                    row.SetCoefficient(self.variables[plans[k]], float(costs[k]))
+                self.shared_rows.append(row)
+
+    def converge(self) -> bool:
+        """
+        Add cuts until the master objective is within the tolerance of the plan's, returning whether the master
+        was solved; the plans and their recourse costs are left in plans and costs.
+        """
+
+        master = self.master
+        while True:
+            self.iterations += 1
+            with span("master_solve", iteration=self.iterations, cuts=self.cuts) as args:
+                status = master.Solve()
+                args.update(status=status)
+            if status != master.OPTIMAL:
+                return False
+
+            self.bound = master.Objective().Value()
+            values, _ = solution_values(master)
+            self.plans = [values[y] for y in self.y]
+            n1s = [element.config.num_aggregated_products for element in self.data.data.elements]
+            evaluated = self.pool.evaluate([plan[:n1] for plan, n1 in zip(self.plans, n1s)])
+            self.costs = [costs for costs, _ in evaluated]
+
+            converged = True
+            for e, ((costs, gradients), scenarios) in enumerate(zip(evaluated, self.data.scenarios)):
+                theta = values[self.theta[e]]
+                risk_cost = risk_value(costs, scenarios.probabilities, self.risk)
+                if risk_cost - risk_value(theta, scenarios.probabilities, self.risk) \
+                        > self.tolerance * max(1., abs(risk_cost)):
+                    converged = False
+
+                # Optimality cuts: theta_e_s - g_e_s^T * y_e >= R_e_s - g_e_s^T * plan_e for underestimated scenarios
+                plan = self.plans[e][:n1s[e]]
+                for s in np.flatnonzero(costs - theta > self.tolerance * np.maximum(1., np.abs(costs))).tolist():
+                    row = master.Constraint(float(costs[s] - gradients[s] @ plan), master.infinity())
+                    row.SetCoefficient(self.variables[self.theta[e][s]], 1)
+                    for k in np.flatnonzero(gradients[s]).tolist():
+                        row.SetCoefficient(self.variables[self.y[e][k]], float(-gradients[s][k]))
+                    self.cuts += 1
+
+            if converged or self.iterations >= self.max_iterations:
+                return True
+
+    def qualities(self, coeffs: List[np.ndarray]) -> List[float]:
+        """Qualities of the current plans with their true recourse costs: coeffs_e^T * y_e - risk_s(R_e_s)."""
+
+        return [float(coeffs[e] @ plan) - risk_value(self.costs[e], scenarios.probabilities, self.risk)
+                for e, (plan, scenarios) in enumerate(zip(self.plans, self.data.scenarios))]
+
+    def solve(self) -> Tuple[float, Dict[str, Any]]:
+        """Find the element optimums if not given, then solve the criteria, like the center solvers."""
+
+        if self.solved:
+            return self.objective_value, self.solution
+        self.solved = True
+        self.objective_value, self.solution = float("inf"), dict()
+
+        self.build_master()
+        objective = self.master.Objective()
+        center_coeffs = self.data.data.coeffs_functional
+        if self.f_opt is None:
+            with span("f_opt", elements=len(self.q)):
+                if not self.converge():
+                    self.f_opt = [float("inf")] * len(self.q)
+                    return self.objective_value, self.solution
+                # Center qualities of the plans found, attainable unlike the master optimum
+                self.f_opt = self.qualities(center_coeffs)
+
+        for e, (q, w) in enumerate(zip(self.q, self.w)):
+            objective.SetCoefficient(self.variables[q], 0)
+            objective.SetCoefficient(self.variables[w], 1)
+            self.variables[q].SetBounds(*quality_bounds(self.criteria, self.f_opt[e], self.delta[e]))
+        shared = self.data.data.shared_resources
+        if shared is not None:
+            for r, (row) in enumerate(self.shared_rows):
+                row.SetUb(float(shared.limits[r]))
+
+        if not self.converge():
+            return self.objective_value, self.solution
+
+        lower = [quality_bounds(self.criteria, f_e, d_e)[0] for f_e, d_e in zip(self.f_opt, self.delta)]
+        self.violation = max(max(0., (bound - quality) / max(1., abs(bound)))
+                             for bound, quality in zip(lower, self.qualities(center_coeffs)))
+        self.objective_value = sum(self.qualities([element.coeffs_functional for element in self.data.data.elements]))
+        self.gap = (self.bound - self.objective_value) / max(1., abs(self.bound))
+
+        recourse = self.pool.recourse()
+        self.recourse = {"z": [z for z, _ in recourse], "t_0": [t_0 for _, t_0 in recourse]}
+        self.solution = recourse_solution(self.data, self.plans, self.recourse, self.risk)
+        return self.objective_value, self.solution
+
+    def close(self) -> None:
+        """Stop the evaluation processes."""
+
+        self.pool.close()
+
+    def __enter__(self) -> "ScenarioDecompositionSolver":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
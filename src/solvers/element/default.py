@@ -1,46 +1,55 @@
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional, Tuple
 
+from numpy import ndarray
+
+from data.serialization import digest_element_data
 from models.element import ElementData, ElementType
+from solvers.analysis import element_rows, element_variables
 from solvers.base import BaseSolver
+from solvers.cache import ModelStore, model_key
+from solvers.templates import element_signature, element_parameters, element_from_parameters
 from utils.assertions import assert_valid_dimensions, assert_non_negative, assert_positive
 from utils.helpers import stringify, tab_out, calculate_priority_order, get_completion_times, lp_sum
+from utils.validators import is_validated
 
 
 class ElementSolver(BaseSolver):
     """Solver for element-level optimization problems."""
 
-    def __init__(self, data: ElementData):
-        super().__init__()
-        # Validate input dimensions
-        assert_valid_dimensions(
-            [data.coeffs_functional],
-            [(data.config.num_decision_variables,)],
-            ["coeffs_functional"]
-        )
-        assert_non_negative(
-            data.config.id,
-            "data.config.id"
-        )
-        assert_positive(
-            data.config.num_decision_variables,
-            "data.config.num_decision_variables"
-        )
-        assert_positive(
-            data.config.num_aggregated_products,
-            "data.config.num_aggregated_products"
-        )
-        assert_non_negative(
-            data.config.num_soft_deadline_products,
-            "data.config.num_soft_deadline_products"
-        )
-        assert_positive(
-            data.config.num_constraints,
-            "data.config.num_constraints"
-        )
-
-        # Validate non-negative coefficients
-        for i, (coeff) in enumerate(data.coeffs_functional):
-            assert_non_negative(coeff, f"coeffs_functional[{i}]")
+    def __init__(self, data: ElementData, cache: Optional[ModelStore] = None):
+        super().__init__(cache)
+        # Elements validated by utils.validators skip the per-value checks
+        if not is_validated(data):
+            # Validate input dimensions
+            assert_valid_dimensions(
+                [data.coeffs_functional],
+                [(data.config.num_decision_variables,)],
+                ["coeffs_functional"]
+            )
+            assert_non_negative(
+                data.config.id,
+                "data.config.id"
+            )
+            assert_positive(
+                data.config.num_decision_variables,
+                "data.config.num_decision_variables"
+            )
+            assert_positive(
+                data.config.num_aggregated_products,
+                "data.config.num_aggregated_products"
+            )
+            assert_non_negative(
+                data.config.num_soft_deadline_products,
+                "data.config.num_soft_deadline_products"
+            )
+            assert_positive(
+                data.config.num_constraints,
+                "data.config.num_constraints"
+            )
+
+            # Validate non-negative coefficients
+            for i, (coeff) in enumerate(data.coeffs_functional):
+                assert_non_negative(coeff, f"coeffs_functional[{i}]")
 
         self.data = data
         self.y_e: List[Any] = list()
@@ -64,6 +73,31 @@ class ElementSolver(BaseSolver):
             for i in range(self.data.config.num_aggregated_products)
         ]
 
+    def bind_variables(self, variables: List[Any]) -> None:
+        """Assign the variables of a loaded model: y_e, z_e and t_0_e in creation order."""
+
+        n, n1 = self.data.config.num_decision_variables, self.data.config.num_aggregated_products
+        self.y_e = variables[:n]
+        self.z_e = variables[n:n + n1]
+        self.t_0_e = variables[n + n1:n + 2 * n1]
+
+    def model_key(self) -> str:
+        return model_key(type(self).__name__, digest_element_data(self.data))
+
+    def template_signature(self) -> Tuple:
+        return type(self).__name__, element_signature(self.data, self.order_e)
+
+    def template_parameters(self) -> ndarray:
+        return element_parameters(self.data)
+
+    def template_probe(self, parameters: ndarray) -> "ElementSolver":
+        probe = ElementSolver(element_from_parameters(self.data.config, parameters))
+        probe.order_e = self.order_e
+        return probe
+
+    def element_layouts(self) -> List[Tuple[int, List[Tuple[str, int]], List[Tuple[str, int]]]]:
+        return [(self.data.config.id, element_rows(self.data), element_variables(self.data))]
+
     def setup_constraints(self) -> None:
         """Set up constraints for the element problem."""
 
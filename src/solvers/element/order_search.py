@@ -0,0 +1,216 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from math import factorial
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.element import ElementData, ElementType
+from solvers.element.default import ElementSolver
+
+_worker_evaluator: Optional["OrderEvaluator"] = None
+
+
+@dataclass(frozen=True)
+class OrderSearchResult:
+    """Best priority order found for an element and how it compares to the heuristic order."""
+
+    order: List[int]
+    objective: float
+    heuristic_order: List[int]
+    heuristic_objective: float
+    improvement: float
+    evaluations: int
+    elapsed: float
+
+
+class OrderEvaluator:
+    """
+    Element problem re-solved for different priority orders on the same OR-Tools model.
+
+    Only the times dependency and deadline rows depend on the order. They are rewritten in place for each
+    candidate, so GLOP re-solves the modified model instead of the whole model being built again.
+    """
+
+    def __init__(self, data: ElementData):
+        assert data.config.type == ElementType.SEQUENTIAL, "Only sequential elements have a priority order"
+        self.solver = ElementSolver(data)
+        self.solver.setup()
+
+        config = data.config
+        m, n1, n2 = config.num_constraints, config.num_aggregated_products, config.num_soft_deadline_products
+        constraints = self.solver.solver.constraints()
+        self.times_rows = constraints[m:m + n1]
+        self.soft_rows = constraints[m + n1:m + n1 + n2]
+        self.hard_rows = [(constraints[m + n1 + n2 + 2 * k], constraints[m + n1 + n2 + 2 * k + 1])
+                          for k in range(n1 - n2)]
+        self.evaluations = 0
+
+    def set_completion_time(self, row, position: int, order: List[int]) -> None:
+        """
+        Write T_e[position] = t_0_e[order[0]] + sum_j={0..position-1}(VS_AGGREGATED_PLAN_TIMES[e][order[j]] * y_e[order[j]]).
+        """
+
+        row.Clear()
+        row.SetCoefficient(self.solver.t_0_e[order[0]], 1)
+        for j in range(position):
+            row.SetCoefficient(self.solver.y_e[order[j]], float(self.solver.data.aggregated_plan_times[order[j]]))
+
+    def set_order(self, order: List[int]) -> None:
+        """Rewrite the order dependent rows of the model for a new priority order."""
+
+        data, solver = self.solver.data, self.solver
+        infinity = solver.solver.infinity()
+
+        # Times dependencies constraints: t_0_e[order[i]] - T_e[i] >= 0
+        for i, (row) in enumerate(self.times_rows):
+            row.Clear()
+            row.SetCoefficient(solver.t_0_e[order[0]], -1 if i != 0 else 0)
+            if i != 0:
+                row.SetCoefficient(solver.t_0_e[order[i]], 1)
+            for j in range(i):
+                row.SetCoefficient(solver.y_e[order[j]], -float(data.aggregated_plan_times[order[j]]))
+            row.SetBounds(0, infinity)
+
+        # Soft deadline constraints: T_e[i] - z_e[i] <= D_e[i]
+        for i, (row) in enumerate(self.soft_rows):
+            self.set_completion_time(row, i, order)
+            row.SetCoefficient(solver.z_e[i], -1)
+            row.SetBounds(-infinity, float(data.directive_terms[i]))
+
+        # Hard deadline constraints: T_e[i] + z_e[i] >= D_e[i] and T_e[i] - z_e[i] <= D_e[i]
+        for k, (lower, upper) in enumerate(self.hard_rows):
+            i = data.config.num_soft_deadline_products + k
+            self.set_completion_time(lower, i, order)
+            lower.SetCoefficient(solver.z_e[i], 1)
+            lower.SetBounds(float(data.directive_terms[i]), infinity)
+            self.set_completion_time(upper, i, order)
+            upper.SetCoefficient(solver.z_e[i], -1)
+            upper.SetBounds(-infinity, float(data.directive_terms[i]))
+
+        solver.order_e = list(order)
+        solver.invalidate()
+
+    def evaluate(self, order: List[int]) -> float:
+        """Objective of the element problem for the order, -inf if it has no optimal solution."""
+
+        self.set_order(order)
+        self.evaluations += 1
+        objective, solution = self.solver.solve()
+        return objective if solution else -float("inf")
+
+
+def _init_worker(data: ElementData) -> None:
+    global _worker_evaluator
+    _worker_evaluator = OrderEvaluator(data)
+
+
+def _evaluate_in_worker(orders: List[List[int]]) -> List[float]:
+    return [_worker_evaluator.evaluate(order) for order in orders]
+
+
+def neighbourhood(order: List[int]) -> List[List[int]]:
+    """Orders obtained by moving one product to another position (including all adjacent swaps)."""
+
+    candidates, seen = list(), {tuple(order)}
+    for i in range(len(order)):
+        rest = order[:i] + order[i + 1:]
+        for j in range(len(order)):
+            candidate = rest[:j] + [order[i]] + rest[j:]
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                candidates.append(candidate)
+    return candidates
+
+
+def perturb(order: List[int], rng: np.random.Generator, size: int) -> List[int]:
+    """Large neighbourhood move: shuffle a random segment of the order."""
+
+    start = int(rng.integers(0, max(1, len(order) - size + 1)))
+    segment = order[start:start + size]
+    rng.shuffle(segment)
+    return order[:start] + segment + order[start + size:]
+
+
+def search_order(data: ElementData, time_limit: float = 10., workers: int = 1, seed: int = 1810,
+                 segment_size: int = 4, max_restarts: int = 100) -> OrderSearchResult:
+    """
+    Search the priority order of a free order sequential element maximizing its element problem.
+
+    Starting from the calculate_priority_order heuristic, the search moves to the best order of the
+    insertion neighbourhood while it improves, and from local optima restarts from a random shuffle of a
+    segment of the best order, until the time limit or max_restarts restarts in a row without improvement.
+    Neighbourhoods are evaluated in worker processes, each re-solving its own model incrementally. Other elements
+    keep the heuristic order, with the objective ElementSolver gives.
+    """
+
+    start = perf_counter()
+
+    def result(order: List[int], objective: float, evaluations: int) -> OrderSearchResult:
+        return OrderSearchResult(
+            order=order,
+            objective=objective,
+            heuristic_order=heuristic_order,
+            heuristic_objective=heuristic_objective,
+            improvement=objective - heuristic_objective,
+            evaluations=evaluations,
+            elapsed=perf_counter() - start,
+        )
+
+    if data.config.type != ElementType.SEQUENTIAL or not data.config.free_order \
+            or data.config.num_aggregated_products < 2:
+        # Nothing to search: the element problem as built, whose order rows only sequential elements have
+        solver = ElementSolver(data)
+        solver.setup()
+        heuristic_order = list(solver.order_e)
+        objective, solution = solver.solve()
+        heuristic_objective = objective if solution else -float("inf")
+        return result(heuristic_order, heuristic_objective, 1)
+
+    evaluator = OrderEvaluator(data)
+    heuristic_order = list(evaluator.solver.order_e)
+    heuristic_objective = evaluator.evaluate(heuristic_order)
+
+    rng = np.random.default_rng(seed)
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data,)) if workers > 1 else None
+    evaluated: Dict[Tuple[int, ...], float] = {tuple(heuristic_order): heuristic_objective}
+
+    def evaluate(orders: List[List[int]]) -> List[float]:
+        new = [order for order in orders if tuple(order) not in evaluated]
+        if pool is None:
+            objectives = [evaluator.evaluate(order) for order in new]
+        else:
+            chunks = [new[w::workers] for w in range(workers)]
+            objectives = [0.] * len(new)
+            for w, (chunk_objectives) in enumerate(pool.map(_evaluate_in_worker, chunks)):
+                objectives[w::workers] = chunk_objectives
+        evaluated.update(zip(map(tuple, new), objectives))
+        return [evaluated[tuple(order)] for order in orders]
+
+    best_order, best_objective = heuristic_order, heuristic_objective
+    current_order, current_objective = best_order, best_objective
+    restarts = 0
+    try:
+        while perf_counter() - start < time_limit and restarts <= max_restarts:
+            candidates = neighbourhood(current_order)
+            objectives = evaluate(candidates)
+            k = int(np.argmax(objectives))
+            if objectives[k] > current_objective + 1e-9:
+                current_order, current_objective = candidates[k], objectives[k]
+                if current_objective > best_objective + 1e-9:
+                    best_order, best_objective = current_order, current_objective
+                    restarts = 0
+                continue
+
+            # Local optimum: restart around the best order found so far
+            if len(evaluated) >= factorial(len(best_order)):
+                break
+            restarts += 1
+            current_order = perturb(best_order, rng, min(segment_size, len(best_order)))
+            current_objective = evaluate([current_order])[0]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return result(best_order, best_objective, len(evaluated))
@@ -0,0 +1,180 @@
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.element import ElementData, ElementType
+from solvers.cache import ModelStore
+from solvers.element.default import ElementSolver
+from utils.tracing import span
+from utils.validators import is_validated, mark_validated
+
+# Slack of a resource row at the minimum production up to which the row counts as saturated
+TOLERANCE = 1e-9
+
+
+@dataclass(frozen=True)
+class ElementPresolve:
+    """
+    Element data reduced before model construction and what maps solutions of the reduced element back.
+
+    The reduced plan y_r gives y[columns] = y_r + shift, the other columns staying at lower; the reduced
+    deviations and start times are those of products, the other products being set by postsolve.
+    """
+
+    original: ElementData
+    reduced: ElementData
+    rows: np.ndarray  # Original resource row of each reduced row
+    columns: np.ndarray  # Original column of each reduced column
+    shift: np.ndarray  # Minimum production taken out of each reduced column
+    products: np.ndarray  # Original aggregated product of each reduced aggregated product
+    lower: np.ndarray  # (n,) minimum production, the values of the removed columns
+    offset: float  # Quality of the removed products and of the shifts
+
+    @property
+    def removed(self) -> Tuple[int, int, int]:
+        """Removed resource rows, columns and aggregated products (deviations and start times)."""
+
+        config, reduced = self.original.config, self.reduced.config
+        return (config.num_constraints - reduced.num_constraints,
+                config.num_decision_variables - reduced.num_decision_variables,
+                config.num_aggregated_products - reduced.num_aggregated_products)
+
+    def postsolve(self, solution: Dict[str, List[float]]) -> Dict[str, List[float]]:
+        """Solution of the reduced element as ElementSolver gives it, in the indexing of the original element."""
+
+        element = self.original
+        n1, n2 = element.config.num_aggregated_products, element.config.num_soft_deadline_products
+        y = self.lower.copy()
+        y[self.columns] = np.asarray(solution["y_e"]) + self.shift
+
+        # Products out of the model are parallel and start as soon as their deadline allows:
+        # t_0_e_i = 0, or D_e_i - T when a hard deadline is later than the production time T, z_e_i = max(0, T - D_e_i)
+        production = element.aggregated_plan_times * y[:n1]
+        z = np.maximum(production - element.directive_terms, 0.)
+        t_0 = np.where(np.arange(n1) < n2, 0., np.maximum(element.directive_terms - production, 0.))
+        z[self.products], t_0[self.products] = solution["z_e"], solution["t_0_e"]
+        return {"y_e": y.tolist(), "z_e": z.tolist(), "t_0_e": t_0.tolist()}
+
+
+def dominated_rows(costs: np.ndarray, limits: np.ndarray) -> np.ndarray:
+    """
+    Rows costs[i] * y <= limits[i] implied for y >= 0 by another row k: costs[i] / limits[i] <= costs[k] / limits[k]
+    elementwise. Of equal rows the first one stays; rows without a positive limit only imply nothing.
+    """
+
+    positive = limits > 0
+    scaled = costs / np.where(positive, limits, 1.)[:, None]
+    # covers[i][k]: row k implies row i
+    covers = (scaled[:, None, :] <= scaled[None, :, :]).all(axis=2) & positive[:, None] & positive[None, :]
+    index = np.arange(len(limits))
+    strictly = covers & (~covers.T | (index[None, :] < index[:, None]))
+    return strictly.any(axis=1)
+
+
+def presolve_element(data: ElementData) -> ElementPresolve:
+    """
+    Reduce the element problem with a few vectorized passes over its data:
+
+    - columns of a resource row of non-negative costs the minimum production saturates are fixed at their minimum;
+      fixed columns of plain decision variables, and fixed products of parallel elements, leave the element;
+    - products of parallel elements whose deadline cannot be missed even at their largest amount become plain
+      decision variables y_e_i - y_assigned_e_i, without deviation and start time;
+    - resource rows without costs left, and rows implied by a scaled other row, are removed.
+
+    The priority order of sequential elements depends on their products only, which therefore all stay.
+    """
+
+    config = data.config
+    n, n1, n2 = config.num_decision_variables, config.num_aggregated_products, config.num_soft_deadline_products
+    costs, limits = data.aggregated_plan_costs, data.resource_constraints
+    lower = np.concatenate([data.num_directive_products, np.zeros(n - n1)])
+
+    # Slack of each row at the minimum production and the largest amount of each column the rows leave it
+    slack = limits - costs @ lower
+    non_negative = (costs >= 0).all(axis=1)
+    bounding = (costs > 0) & non_negative[:, None]
+    if (slack[non_negative] < -TOLERANCE * np.maximum(1., np.abs(limits[non_negative]))).any():
+        # The minimum production exceeds a resource: the infeasible element is left to the solver
+        fixed = np.zeros(n, dtype=bool)
+        upper = np.full(n, np.inf)
+    else:
+        saturated = slack <= TOLERANCE * np.maximum(1., np.abs(limits))
+        fixed = (bounding & saturated[:, None]).any(axis=0)
+        with np.errstate(divide="ignore"):
+            upper = lower + np.where(bounding, np.maximum(slack, 0.)[:, None] / np.where(bounding, costs, 1.),
+                                     np.inf).min(axis=0, initial=np.inf)
+
+    removed, converted = np.zeros(n1, dtype=bool), np.zeros(n1, dtype=bool)
+    if config.type == ElementType.PARALLEL:
+        # Parallel products complete at t_0_e_i + VS_AGGREGATED_PLAN_TIMES[e][i] * y_e_i, t_0_e_i being free
+        times = data.aggregated_plan_times
+        longest = np.where(times == 0, 0., times * upper[:n1])
+        removed = fixed[:n1]
+        converted = ~removed & (longest <= data.directive_terms)
+        if (removed | converted).all():
+            # An element keeps an aggregated product
+            removed[0] = converted[0] = False
+
+    kept = ~(removed | converted)
+    products = np.flatnonzero(kept)
+    plain = n1 + np.flatnonzero(~fixed[n1:])
+    columns = np.concatenate([products, np.flatnonzero(converted), plain])
+    shift = np.concatenate([np.zeros(len(products)), lower[:n1][converted], np.zeros(len(plain))])
+
+    # Resources left by the removed columns and the shifts: VS_RESOURCE_CONSTRAINTS[e] - MS_AGGREGATED_PLAN_COSTS[e] * y_fixed
+    taken = lower.copy()
+    taken[columns] = shift
+    remaining = limits - costs @ taken
+    remaining = np.where(np.abs(remaining) <= TOLERANCE * np.maximum(1., np.abs(limits)), 0., remaining)
+    reduced_costs = costs[:, columns]
+    empty = ~(reduced_costs != 0).any(axis=1) & (remaining >= 0)
+    rows = np.flatnonzero(~(empty | dominated_rows(reduced_costs, remaining)))
+    if len(rows) == 0:
+        # An element keeps a resource row, here one without costs
+        rows = np.zeros(1, dtype=np.int64)
+
+    # Quality of the removed columns and shifts, and the fines of the removed products at their fixed amounts
+    deviations = np.maximum(data.aggregated_plan_times * lower[:n1] - data.directive_terms, 0.)
+    offset = float(data.coeffs_functional @ taken - data.fines_for_deadline[removed] @ deviations[removed])
+
+    reduced = replace(
+        data,
+        config=replace(config, num_decision_variables=len(columns), num_aggregated_products=len(products),
+                       num_soft_deadline_products=int((products < n2).sum()), num_constraints=len(rows)),
+        coeffs_functional=data.coeffs_functional[columns],
+        resource_constraints=remaining[rows],
+        aggregated_plan_costs=reduced_costs[rows],
+        aggregated_plan_times=data.aggregated_plan_times[products],
+        directive_terms=data.directive_terms[products],
+        num_directive_products=data.num_directive_products[products],
+        fines_for_deadline=data.fines_for_deadline[products],
+    )
+    if is_validated(data):
+        # A subset of validated data with resources reduced by feasible amounts
+        mark_validated(reduced)
+    return ElementPresolve(data, reduced, rows, columns, shift, products, lower, offset)
+
+
+class PresolvedElementSolver(ElementSolver):
+    """
+    Element solver building the model of the presolved element, whose objective and solution are those of the
+    original element.
+    """
+
+    def __init__(self, data: ElementData, cache: Optional[ModelStore] = None):
+        with span("presolve", element=data.config.id) as args:
+            self.presolve = presolve_element(data)
+            rows, columns, products = self.presolve.removed
+            args.update(rows=rows, columns=columns, products=products)
+        super().__init__(self.presolve.reduced, cache)
+
+    def solve(self) -> Tuple[float, Any]:
+        solved = self.solved
+        objective, solution = super().solve()
+        if not solved and objective != float("inf"):
+            self.objective_value = objective + self.presolve.offset
+        return self.objective_value, self.solution
+
+    def get_solution(self) -> Dict[str, Any]:
+        return self.presolve.postsolve(super().get_solution())
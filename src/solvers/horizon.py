@@ -0,0 +1,384 @@
+from dataclasses import dataclass, replace
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.center import CenterConfig, CenterData, SharedResources
+from models.element import ElementData, ElementType
+from models.horizon import NewProducts
+from solvers.basis import Basis, KeyedBuilder, keys, solve_lp
+from solvers.center.robust import quality_bounds
+from solvers.scenarios import add_quality_rows, add_recourse_rows, completion_pattern
+from utils.assertions import assert_bounds, assert_non_negative
+from utils.helpers import calculate_priority_order
+from utils.tracing import span
+
+# Kinds of the keys of variables and rows, which identify them by element and product across windows
+Y, Z, T_0, Q = range(4)
+RESOURCE, DEADLINE, HARD_DEADLINE, TIME, QUALITY, SHARED = range(6)
+
+# Start and completion times this close to the clock count as reached
+TIME_TOLERANCE = 1e-9
+
+
+@dataclass
+class ElementWindow:
+    """
+    Active products of an element: its data without the completed products and the commitments of the started
+    ones, with what the next window reuses: the last plan, f_opt and the basis of the f_opt LP.
+    """
+
+    element: ElementData
+    center_coeffs: np.ndarray
+    products: np.ndarray  # Key of the product of each decision variable
+    shared_costs: Optional[np.ndarray]  # (R, n_e) costs of the shared resources, if any
+    order: List[int]
+    committed: np.ndarray  # (n1_e,) amounts of the started products, nan for the others
+    started_at: np.ndarray  # (n1_e,) start times of the started products, nan for the others
+    next_product: int
+    f_opt: Optional[float] = None
+    f_opt_basis: Optional[Basis] = None
+    plan: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None  # y_e, z_e and t_0_e of the last window
+    attains_f_opt: bool = False  # Whether the plan is an element optimum, which keeps f_opt exact
+    retired: int = 0
+    realized: float = 0.  # Element quality of the completed products
+
+    @property
+    def started(self) -> np.ndarray:
+        return ~np.isnan(self.started_at)
+
+
+@dataclass(frozen=True)
+class HorizonStep:
+    """Result and costs of one re-planning step."""
+
+    now: float
+    objective: float  # Center objective over the active products, inf if not solved
+    realized: float  # Element qualities of all products completed so far
+    products: int  # Active aggregated products
+    retired: int  # Products completed so far
+    f_opt_solves: int  # Elements whose f_opt was solved, the others kept theirs
+    iterations: int  # Simplex iterations of the f_opt and center LPs
+    solve_time: float
+
+
+def start_times(element: ElementData, order: List[int], y: np.ndarray, t_0: np.ndarray) -> np.ndarray:
+    """
+    Start time of each aggregated product of a plan: t_0_e_i in parallel elements, and the time T_e of its place
+    in the order in sequential ones, which start each product once the products before it are done.
+    """
+
+    if element.config.type == ElementType.PARALLEL:
+        return t_0.copy()
+    n1 = element.config.num_aggregated_products
+    starts, pattern = completion_pattern(element, order)
+    start = np.empty(n1)
+    # T_e[i] = t_0_e[starts[i]] + sum_k(pattern[i][k] * VS_AGGREGATED_PLAN_TIMES[e][k] * y_e[k])
+    start[order] = t_0[starts] + pattern @ (element.aggregated_plan_times * y[:n1])
+    return start
+
+
+def add_window_block(builder: KeyedBuilder, window: ElementWindow, scope: int, now: float,
+                     coeffs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Plan, deadline deviations and start times of the active products of an element with the constraints of the
+    center criteria, the quality coeffs^T * y_e - FINES_FOR_DEADLINE[e]^T * z_e being their objective.
+
+    Started products are fixed to their committed amounts and start times, the others start from now on.
+    """
+
+    element, products, started = window.element, window.products, window.started
+    n, n1 = element.config.num_decision_variables, element.config.num_aggregated_products
+    n2, m = element.config.num_soft_deadline_products, element.config.num_constraints
+
+    # Minimum production constraints y_e_i >= y_assigned_e_i, i=1..n1_e, as bounds
+    lower = np.concatenate([element.num_directive_products, np.zeros(n - n1)])
+    upper = np.full(n, np.inf)
+    lower[:n1][started] = upper[:n1][started] = window.committed[started]
+    builder.key_variables(keys(scope, Y, products))
+    y = builder.variables(n, lower, upper, coeffs)
+    builder.key_variables(keys(scope, Z, products[:n1]))
+    z = builder.variables(n1, objective=-element.fines_for_deadline)
+    builder.key_variables(keys(scope, T_0, products[:n1]))
+    t_0 = builder.variables(n1, np.where(started, window.started_at, now),
+                            np.where(started, window.started_at, np.inf))
+
+    # Resource constraints: MS_AGGREGATED_PLAN_COSTS[e] * y_e <= VS_RESOURCE_CONSTRAINTS[e]
+    builder.key_rows(keys(scope, RESOURCE, np.arange(m)))
+    builder.rows(np.broadcast_to(y, (m, n)), element.aggregated_plan_costs, upper=element.resource_constraints)
+
+    # Deadline rows of every product, hard deadline rows and times dependencies of sequential elements
+    builder.key_rows(keys(scope, DEADLINE, products[:n1]))
+    if n2 != n1:
+        builder.key_rows(keys(scope, HARD_DEADLINE, products[n2:n1]))
+    if element.config.type == ElementType.SEQUENTIAL and n1 > 1:
+        builder.key_rows(keys(scope, TIME, products[window.order[1:]]))
+    add_recourse_rows(builder, element, window.order, element.aggregated_plan_times[None],
+                      element.directive_terms[None], y[None, :n1], z[None], t_0[None])
+    return y, z, t_0
+
+
+def retire(window: ElementWindow, completed: np.ndarray) -> None:
+    """
+    Remove the completed products from the window of an element, realizing their element quality.
+
+    The capacity they release may raise the optimum of the remaining products, so f_opt is solved again, from
+    the basis of the last f_opt LP.
+    """
+
+    element = window.element
+    n, n1 = element.config.num_decision_variables, element.config.num_aggregated_products
+    n2 = element.config.num_soft_deadline_products
+    y, z, t_0 = window.plan
+    fines = float(element.fines_for_deadline[completed] @ z[completed])
+    window.realized += float(element.coeffs_functional[:n1][completed] @ y[:n1][completed]) - fines
+    window.f_opt, window.attains_f_opt = None, False
+
+    active, keep = ~completed, np.concatenate([~completed, np.ones(n - n1, dtype=bool)])
+    position = np.cumsum(keep) - 1
+    config = replace(element.config, num_decision_variables=int(keep.sum()),
+                     num_aggregated_products=int(active.sum()), num_soft_deadline_products=int(active[:n2].sum()))
+    window.element = replace(
+        element, config=config, coeffs_functional=element.coeffs_functional[keep],
+        aggregated_plan_costs=element.aggregated_plan_costs[:, keep],
+        aggregated_plan_times=element.aggregated_plan_times[active], directive_terms=element.directive_terms[active],
+        num_directive_products=element.num_directive_products[active],
+        fines_for_deadline=element.fines_for_deadline[active],
+    )
+    window.center_coeffs = window.center_coeffs[keep]
+    window.products = window.products[keep]
+    if window.shared_costs is not None:
+        window.shared_costs = window.shared_costs[:, keep]
+    window.order = [int(position[i]) for i in window.order if active[i]]
+    window.committed, window.started_at = window.committed[active], window.started_at[active]
+    window.plan = y[keep], z[active], t_0[active]
+    window.retired += int(completed.sum())
+
+
+class RollingHorizon:
+    """
+    Rolling-horizon re-planning of a center problem with criteria 1 or 2.
+
+    Every step advances the clock, commits the products whose planned start has passed (their amounts and start
+    times are fixed), retires the completed ones, adds the products of new orders and re-solves the center
+    criteria over the active products. Times, directive terms included, are absolute on the clock of the
+    horizon, and resource limits are capacities of the active products, which completed products release.
+
+    An element keeps its f_opt while its products neither arrive nor complete and its last plan attains it: the
+    commitments and the clock only cut away other plans, so that plan stays an element optimum. The f_opt and center LPs start from
+    the bases of the previous window mapped by product, and completed products leave the model, so the cost of a
+    step follows the active products however long the history grows.
+    """
+
+    def __init__(self, data: CenterData, criteria: int = 1, delta: Optional[List[float]] = None,
+                 warm_start: bool = True):
+        assert criteria in (1, 2), f"Criteria {criteria} is not implemented"
+        num_elements = data.config.num_elements
+        delta = [0.] * num_elements if delta is None else list(delta)
+        for e, (d) in enumerate(delta):
+            assert_bounds(d, (0, 1), f"delta[{e}]")
+
+        self.criteria = criteria
+        self.delta = delta
+        self.warm_start = warm_start  # Start from the bases and f_opt of the previous window
+        shared = data.shared_resources
+        self.shared_limits = None if shared is None else shared.limits
+        self.windows: List[ElementWindow] = list()
+        for e, (element) in enumerate(data.elements):
+            n, n1 = element.config.num_decision_variables, element.config.num_aggregated_products
+            self.windows.append(ElementWindow(
+                element=element, center_coeffs=data.coeffs_functional[e], products=np.arange(n),
+                shared_costs=None if shared is None else shared.costs[e], order=calculate_priority_order(element),
+                committed=np.full(n1, np.nan), started_at=np.full(n1, np.nan), next_product=n,
+            ))
+
+        self.now = 0.
+        self.basis: Optional[Basis] = None
+        self.f_opt_solves = 0
+        self.iterations = 0
+        self.objective_value: Optional[float] = None
+        self.solution: Optional[Dict[str, Any]] = None
+
+    @property
+    def data(self) -> CenterData:
+        """System of the active products of the current window."""
+
+        return CenterData(
+            config=CenterConfig(num_elements=len(self.windows)),
+            coeffs_functional=[window.center_coeffs for window in self.windows],
+            elements=[window.element for window in self.windows],
+            shared_resources=None if self.shared_limits is None else SharedResources(
+                costs=[window.shared_costs for window in self.windows], limits=self.shared_limits),
+        )
+
+    @property
+    def f_opt(self) -> List[Optional[float]]:
+        return [window.f_opt for window in self.windows]
+
+    @property
+    def realized(self) -> float:
+        return sum(window.realized for window in self.windows)
+
+    def advance(self, duration: float) -> None:
+        """Move the clock, committing the started products of the last plans and retiring the completed ones."""
+
+        assert_non_negative(duration, "duration")
+        self.now += duration
+        for window in self.windows:
+            if duration > 0 and not window.attains_f_opt:
+                # The commitments and the clock may cut away all element optimums when the plan was not one of them
+                window.f_opt = None
+            if window.plan is None:
+                continue
+            element = window.element
+            y, _, t_0 = window.plan
+            n1 = element.config.num_aggregated_products
+            start = start_times(element, window.order, y, t_0)
+            started = ~window.started & (start < self.now - TIME_TOLERANCE)
+            window.committed[started], window.started_at[started] = y[:n1][started], start[started]
+
+            completion = window.started_at + element.aggregated_plan_times * window.committed
+            completed = window.started & (completion <= self.now + TIME_TOLERANCE)
+            if completed.all():
+                # An element keeps a product, the last one completed staying fixed until new orders arrive
+                completed[np.argmax(completion)] = False
+            if completed.any():
+                retire(window, completed)
+
+    def add_products(self, e: int, products: NewProducts) -> np.ndarray:
+        """
+        Add the products of new orders to element e, returning their keys.
+
+        New soft and hard deadline products follow the active ones of their kind, and the priority order of the
+        element places them after its started products.
+        """
+
+        window = self.windows[e]
+        element = window.element
+        n1, n2 = element.config.num_aggregated_products, element.config.num_soft_deadline_products
+        assert products.aggregated_plan_costs.shape[0] == element.config.num_constraints, \
+            f"aggregated_plan_costs of element {e} need {element.config.num_constraints} rows"
+        soft, k = products.soft_deadline, products.num_products
+        num_soft = int(soft.sum())
+
+        def insert(active: np.ndarray, new: np.ndarray) -> np.ndarray:
+            return np.concatenate([active[..., :n2], new[..., soft], active[..., n2:n1], new[..., ~soft],
+                                   active[..., n1:]], axis=-1)
+
+        started = insert(window.started, np.zeros(k, dtype=bool))
+        config = replace(element.config, num_decision_variables=element.config.num_decision_variables + k,
+                         num_aggregated_products=n1 + k, num_soft_deadline_products=n2 + num_soft)
+        window.element = replace(
+            element, config=config,
+            coeffs_functional=insert(element.coeffs_functional, products.coeffs_functional),
+            aggregated_plan_costs=insert(element.aggregated_plan_costs, products.aggregated_plan_costs),
+            aggregated_plan_times=insert(element.aggregated_plan_times, products.aggregated_plan_times),
+            directive_terms=insert(element.directive_terms, products.directive_terms),
+            num_directive_products=insert(element.num_directive_products, products.num_directive_products),
+            fines_for_deadline=insert(element.fines_for_deadline, products.fines_for_deadline),
+        )
+        window.center_coeffs = insert(window.center_coeffs, products.center_coeffs)
+        added = np.arange(window.next_product, window.next_product + k)
+        window.products = insert(window.products, added)
+        window.next_product += k
+        if window.shared_costs is not None:
+            window.shared_costs = insert(window.shared_costs, np.zeros((len(self.shared_limits), k))
+                                         if products.shared_costs is None else products.shared_costs)
+        window.committed = insert(window.committed, np.full(k, np.nan))
+        window.started_at = insert(window.started_at, np.full(k, np.nan))
+
+        # Started products keep their places at the front of the order
+        position = np.concatenate([np.arange(n2), np.arange(n2, n1) + num_soft])
+        window.order = [int(position[i]) for i in window.order if started[position[i]]] + \
+                       [i for i in calculate_priority_order(window.element) if not started[i]]
+        window.plan, window.f_opt, window.attains_f_opt = None, None, False
+        return added
+
+    def element_optimum(self, window: ElementWindow) -> Tuple[float, int]:
+        """
+        f_opt of an element with its commitments and simplex iterations:
+        max VS_COEFFS_CENTER_FUNCTIONAL[e]^T * y_e - FINES_FOR_DEADLINE[e]^T * z_e, inf if not solved.
+        """
+
+        builder = KeyedBuilder()
+        add_window_block(builder, window, 0, self.now, window.center_coeffs)
+        result = solve_lp(builder, maximize=True, basis=window.f_opt_basis if self.warm_start else None)
+        if result.optimal:
+            window.f_opt_basis = result.basis
+        return result.objective, result.iterations
+
+    def solve(self) -> Tuple[float, Dict[str, Any]]:
+        """Solve the criteria over the active products, finding the f_opt the elements do not keep."""
+
+        self.objective_value, self.solution = float("inf"), dict()
+        self.iterations = 0
+        for window in self.windows:
+            # Only the plan of a solved window is known to attain f_opt
+            window.attains_f_opt = False
+        pending = [window for window in self.windows if window.f_opt is None or not self.warm_start]
+        self.f_opt_solves = len(pending)
+        for window in pending:
+            with span("f_opt", element=window.element.config.id):
+                window.f_opt, iterations = self.element_optimum(window)
+            self.iterations += iterations
+        if any(np.isinf(window.f_opt) for window in self.windows):
+            return self.objective_value, self.solution
+
+        with span("window", elements=len(self.windows), now=self.now) as args:
+            builder = KeyedBuilder()
+            blocks = list()
+            for e, (window) in enumerate(self.windows):
+                element = window.element
+                blocks.append(add_window_block(builder, window, e, self.now, element.coeffs_functional))
+                y, z, _ = blocks[-1]
+                # Optimality or suboptimality constraint: VS_COEFFS_CENTER_FUNCTIONAL[e]^T * y_e - FINES^T * z_e = f_opt_e or >= (1 - delta_e) * f_opt_e
+                builder.key_variables(keys(e, Q, [0]))
+                builder.key_rows(keys(e, QUALITY, [0]))
+                add_quality_rows(builder, y, window.center_coeffs, z[None], element.fines_for_deadline[None],
+                                 np.ones(1), "expected", *quality_bounds(self.criteria, window.f_opt, self.delta[e]))
+
+            if self.shared_limits is not None:
+                # Shared resource constraints: sum_e(SHARED_RESOURCE_COSTS[e] * y_e) <= SHARED_RESOURCE_LIMITS
+                plans = np.concatenate([y for y, _, _ in blocks])
+                builder.key_rows(keys(0, SHARED, np.arange(len(self.shared_limits))))
+                builder.rows(np.broadcast_to(plans, (len(self.shared_limits), len(plans))),
+                             np.concatenate([window.shared_costs for window in self.windows], axis=1),
+                             upper=self.shared_limits)
+
+            result = solve_lp(builder, maximize=True, basis=self.basis if self.warm_start else None)
+            self.iterations += result.iterations
+            args.update(rows=builder.num_rows, iterations=result.iterations, warm=result.warm)
+        if not result.optimal:
+            return self.objective_value, self.solution
+
+        self.basis = result.basis
+        for window, (y, z, t_0) in zip(self.windows, blocks):
+            window.plan = result.values[y], result.values[z], result.values[t_0]
+            quality = float(window.center_coeffs @ window.plan[0] - window.element.fines_for_deadline @ window.plan[1])
+            window.attains_f_opt = quality >= window.f_opt - 1e-6 * max(1., abs(window.f_opt))
+
+        self.objective_value = result.objective
+        self.solution = {
+            "y": [window.plan[0].tolist() for window in self.windows],
+            "z": [window.plan[1].tolist() for window in self.windows],
+            "t_0": [window.plan[2].tolist() for window in self.windows],
+            "products": [window.products.tolist() for window in self.windows],
+        }
+        return self.objective_value, self.solution
+
+    def step(self, duration: float = 0., arrivals: Optional[Dict[int, NewProducts]] = None) -> HorizonStep:
+        """Advance the clock by duration, add the products of the arrivals by element and re-plan."""
+
+        start = perf_counter()
+        with span("horizon_step", now=self.now + duration):
+            self.advance(duration)
+            for e, products in (arrivals or dict()).items():
+                self.add_products(e, products)
+            objective, _ = self.solve()
+        return HorizonStep(
+            now=self.now, objective=objective, realized=self.realized,
+            products=sum(window.element.config.num_aggregated_products for window in self.windows),
+            retired=sum(window.retired for window in self.windows), f_opt_solves=self.f_opt_solves,
+            iterations=self.iterations, solve_time=perf_counter() - start,
+        )
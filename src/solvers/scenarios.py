@@ -0,0 +1,225 @@
+from typing import Any, List, Tuple, Union
+
+import numpy as np
+
+from models.element import ElementData, ElementType
+from utils.helpers import completion_time_structure
+
+# Risk measures turning the qualities of all scenarios of an element into one
+RISK_MEASURES = ("expected", "worst")
+
+Bound = Union[float, np.ndarray]
+
+
+class ModelBuilder:
+    """
+    Linear model assembled from NumPy blocks of variables and rows and written into an MPModelProto at once.
+
+    All rows of a block have the same number of coefficients, zeros included, so the rows of all scenarios of
+    an element are added by a few array operations instead of one pywraplp call per coefficient.
+    """
+
+    def __init__(self):
+        self.num_variables = 0
+        self.num_rows = 0
+        self.variable_blocks: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = list()
+        self.row_blocks: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = list()
+
+    def variables(self, shape: Union[int, Tuple[int, ...]], lower: Bound = 0., upper: Bound = np.inf,
+                  objective: Bound = 0.) -> np.ndarray:
+        """Indices of new variables in an array of the given shape, bounds and objective broadcast to it."""
+
+        indices = np.arange(self.num_variables, self.num_variables + int(np.prod(shape)),
+                            dtype=np.int64).reshape(shape)
+        self.variable_blocks.append(tuple(np.broadcast_to(np.asarray(value, dtype=np.float64), indices.shape).ravel()
+                                          for value in (lower, upper, objective)))
+        self.num_variables += indices.size
+        return indices
+
+    def rows(self, columns: np.ndarray, values: np.ndarray, lower: Bound = -np.inf,
+             upper: Bound = np.inf) -> np.ndarray:
+        """
+        Indices of new rows lower <= sum_k(values[..., k] * x[columns[..., k]]) <= upper, one per leading index of
+        columns and values; zero values are dropped.
+        """
+
+        columns, values = np.broadcast_arrays(np.asarray(columns, dtype=np.int64), np.asarray(values, dtype=np.float64))
+        shape = columns.shape[:-1]
+        indices = np.arange(self.num_rows, self.num_rows + int(np.prod(shape)), dtype=np.int64).reshape(shape)
+        width = columns.shape[-1]
+        self.row_blocks.append((columns.reshape(-1, width), values.reshape(-1, width),
+                                np.broadcast_to(np.asarray(lower, dtype=np.float64), shape).ravel(),
+                                np.broadcast_to(np.asarray(upper, dtype=np.float64), shape).ravel()))
+        self.num_rows += indices.size
+        return indices
+
+    def proto(self, maximize: bool = False) -> Any:
+        """The model as an OR-Tools MPModelProto."""
+
+        from ortools.linear_solver import linear_solver_pb2
+
+        model = linear_solver_pb2.MPModelProto(maximize=maximize)
+        for lower, upper, objective in self.variable_blocks:
+            for lb, ub, c in zip(lower.tolist(), upper.tolist(), objective.tolist()):
+                model.variable.add(lower_bound=lb, upper_bound=ub, objective_coefficient=c)
+
+        for columns, values, lower, upper in self.row_blocks:
+            nonzero = values != 0
+            offsets = np.concatenate([[0], np.cumsum(nonzero.sum(axis=1))]).tolist()
+            flat_columns, flat_values = columns[nonzero].tolist(), values[nonzero].tolist()
+            for r, (lb, ub) in enumerate(zip(lower.tolist(), upper.tolist())):
+                start, stop = offsets[r], offsets[r + 1]
+                model.constraint.add(lower_bound=lb, upper_bound=ub, var_index=flat_columns[start:stop],
+                                     coefficient=flat_values[start:stop])
+        return model
+
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Lower and upper bounds of all variables, then of all rows, in creation order."""
+
+        def concatenate(blocks: List[Tuple[np.ndarray, ...]], k: int) -> np.ndarray:
+            return np.concatenate([block[k] for block in blocks]) if blocks else np.zeros(0)
+
+        return (concatenate(self.variable_blocks, 0), concatenate(self.variable_blocks, 1),
+                concatenate(self.row_blocks, 2), concatenate(self.row_blocks, 3))
+
+    def mathopt_proto(self, maximize: bool = False) -> Any:
+        """
+        The model as an OR-Tools MathOpt ModelProto, which unlike MPModelProto can be solved from a starting basis.
+
+        The coefficients of each row are sorted by column, since MathOpt expects its matrix in row major order.
+        """
+
+        from ortools.math_opt import model_pb2
+
+        model = model_pb2.ModelProto()
+        lower, upper, row_lower, row_upper = self.bounds()
+        objective = np.concatenate([block[2] for block in self.variable_blocks]) if self.variable_blocks else lower
+        model.variables.ids.extend(range(self.num_variables))
+        model.variables.lower_bounds.extend(lower.tolist())
+        model.variables.upper_bounds.extend(upper.tolist())
+        model.variables.integers.extend([False] * self.num_variables)
+
+        model.objective.maximize = maximize
+        nonzero = np.flatnonzero(objective)
+        model.objective.linear_coefficients.ids.extend(nonzero.tolist())
+        model.objective.linear_coefficients.values.extend(objective[nonzero].tolist())
+
+        model.linear_constraints.ids.extend(range(self.num_rows))
+        model.linear_constraints.lower_bounds.extend(row_lower.tolist())
+        model.linear_constraints.upper_bounds.extend(row_upper.tolist())
+
+        matrix, first = model.linear_constraint_matrix, 0
+        for columns, values, _, _ in self.row_blocks:
+            by_column = np.argsort(columns, axis=1, kind="stable")
+            columns, values = np.take_along_axis(columns, by_column, 1), np.take_along_axis(values, by_column, 1)
+            nonzero = values != 0
+            matrix.row_ids.extend((np.nonzero(nonzero)[0] + first).tolist())
+            matrix.column_ids.extend(columns[nonzero].tolist())
+            matrix.coefficients.extend(values[nonzero].tolist())
+            first += len(columns)
+        return model
+
+
+def completion_pattern(element: ElementData, order: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start time index of each completion time and its 0/1 pattern of products, so that
+    T_e[i] = t_0_e[starts[i]] + sum_k(pattern[i][k] * VS_AGGREGATED_PLAN_TIMES[e][k] * y_e[k]).
+
+    This is utils.helpers.completion_time_structure as a matrix, over which the plan times of all scenarios
+    broadcast.
+    """
+
+    structure = completion_time_structure(element, order)
+    n1 = element.config.num_aggregated_products
+    products = np.asarray(structure.products, dtype=np.int64)
+    pattern = np.zeros((n1, n1))
+    if structure.cumulative:
+        # Sequential products wait for all products before them in the order: j < i
+        pattern[:, products] = np.tri(n1, k=-1)
+    else:
+        pattern[np.arange(n1), products] = 1
+    return np.asarray(structure.starts, dtype=np.int64), pattern
+
+
+def add_recourse_rows(builder: ModelBuilder, element: ElementData, order: List[int], plan_times: np.ndarray,
+                      directive_terms: np.ndarray, y: np.ndarray, z: np.ndarray, t_0: np.ndarray) -> None:
+    """
+    Time and deadline rows of a batch of scenarios of an element, the constraints of the center criteria with
+    the plan times and directive terms of each scenario.
+
+    plan_times and directive_terms are (B, n1) arrays of B scenarios, y the (B, n1) indices of the planned
+    amounts of the aggregated products in each scenario (the same variables for a plan shared by all scenarios),
+    z and t_0 the (B, n1) indices of the deadline deviations and start times of each scenario.
+    """
+
+    n1, n2 = element.config.num_aggregated_products, element.config.num_soft_deadline_products
+    starts, pattern = completion_pattern(element, order)
+    batch = len(plan_times)
+
+    # Coefficient of y_e_s[k] in T_e_s[i]: pattern[i][k] * VS_AGGREGATED_PLAN_TIMES[e][s][k]
+    times = pattern[None, :, :] * plan_times[:, None, :]
+    plan = np.broadcast_to(y[:, None, :], (batch, n1, n1))
+    ones = np.ones((batch, n1, 1))
+
+    # Soft and hard deadline constraints: T_e_s_i - D_e_s_i <= z_e_s_i, i=1..n1_e
+    columns = np.concatenate([t_0[:, starts][..., None], z[..., None], plan], axis=2)
+    values = np.concatenate([ones, -ones, times], axis=2)
+    builder.rows(columns, values, upper=directive_terms)
+
+    if n2 != n1:
+        # Hard deadline constraints: -z_e_s_i <= T_e_s_i - D_e_s_i, i=n2_e+1..n1_e
+        values = np.concatenate([ones, ones, times], axis=2)
+        builder.rows(columns[:, n2:], values[:, n2:], lower=directive_terms[:, n2:])
+
+    if element.config.type == ElementType.SEQUENTIAL and n1 > 1:
+        # Times dependencies constraints: t_0_e_s_{order[i]} >= T_e_s_i, i=2..n1_e (trivial for the first product)
+        positions = np.asarray(order[1:], dtype=np.int64)
+        columns = np.concatenate([t_0[:, positions][..., None], t_0[:, starts[1:]][..., None], plan[:, 1:]], axis=2)
+        values = np.concatenate([ones[:, 1:], -ones[:, 1:], -times[:, 1:]], axis=2)
+        builder.rows(columns, values, lower=0.)
+
+
+def add_quality_rows(builder: ModelBuilder, y: np.ndarray, coeffs: np.ndarray, recourse_columns: np.ndarray,
+                     recourse_values: np.ndarray, probabilities: np.ndarray, risk: str, lower: float = -np.inf,
+                     upper: float = np.inf, objective: float = 0.) -> int:
+    """
+    Variable q_e bounded by the risk measure of the qualities of an element over its scenarios,
+    Q_e_s = coeffs^T * y_e - r_e_s, where the recourse cost r_e_s = sum_k(recourse_values[s][k] * x[recourse_columns[s][k]]).
+
+    Expected: q_e = sum_s(p_s * Q_e_s), one row. Worst case: q_e <= Q_e_s for every scenario s, so q_e is at most
+    min_s(Q_e_s) and reaches it when q_e is maximized or bounded from below by an attainable value.
+    """
+
+    assert risk in RISK_MEASURES, f"Unknown risk measure {risk}, expected one of {list(RISK_MEASURES)}"
+    q = builder.variables((), lower, upper, objective)
+    num_scenarios, n = len(probabilities), len(y)
+    if risk == "expected":
+        columns = np.concatenate([[q], y, recourse_columns.ravel()])
+        values = np.concatenate([[1.], -coeffs, (probabilities[:, None] * recourse_values).ravel()])
+        builder.rows(columns[None, :], values[None, :], lower=0., upper=0.)
+    else:
+        columns = np.concatenate([np.full((num_scenarios, 1), q), np.broadcast_to(y, (num_scenarios, n)),
+                                  recourse_columns], axis=1)
+        values = np.concatenate([np.ones((num_scenarios, 1)), np.broadcast_to(-coeffs, (num_scenarios, n)),
+                                 recourse_values], axis=1)
+        builder.rows(columns, values, upper=0.)
+    return int(q)
+
+
+def risk_value(costs: np.ndarray, probabilities: np.ndarray, risk: str) -> float:
+    """Risk measure of the recourse costs of the scenarios: their expectation, or their maximum (worst case)."""
+
+    if risk == "expected":
+        return float(probabilities @ costs)
+    return float(costs[probabilities > 0].max())
+
+
+def representative(values: np.ndarray, costs: np.ndarray, probabilities: np.ndarray, risk: str) -> np.ndarray:
+    """
+    One vector for the (S, k) values of the scenarios: their expectation, or the values of the scenario of the
+    largest cost (worst case), so the qualities of the vector are those the risk measure optimizes.
+    """
+
+    if risk == "expected":
+        return probabilities @ values
+    return values[int(np.argmax(np.where(probabilities > 0, costs, -np.inf)))]
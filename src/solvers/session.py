@@ -0,0 +1,270 @@
+from dataclasses import dataclass, field, fields, replace
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from numpy import ndarray, array_equal
+
+from models.center import CenterData, CenterConfig
+from models.element import ElementData, ElementConfig, ARRAY_FIELDS
+from solvers.base import BaseSolver
+from solvers.cache import ModelStore
+from solvers.center.criteria_1 import CenterCriteria1Solver
+from solvers.center.criteria_2 import CenterCriteria2Solver
+from utils.assertions import assert_bounds
+from utils.tracing import span
+
+ELEMENT_FIELDS = set(ARRAY_FIELDS)
+CONFIG_FIELDS = {f.name for f in fields(ElementConfig)}
+
+# The element problem is solved with the center functional coefficients, so the element's own
+# coeffs_functional only appears in the objective of the center block and never affects f_opt.
+OBJECTIVE_ONLY_FIELDS = {"coeffs_functional"}
+
+
+@dataclass(frozen=True)
+class BlockResult:
+    """Solution of the center problem restricted to a single element."""
+
+    element_id: int
+    f_opt: float
+    objective: float
+    element: ElementData
+    solution: Dict[str, List[float]] = field(default_factory=dict)
+    order: List[int] = field(default_factory=list)
+    element_quality: float = 0
+    center_quality: float = 0
+    solve_time: float = 0
+
+
+def assert_separable(data: CenterData) -> None:
+    """Assert that a system has no shared resources, whose constraints couple the element blocks."""
+
+    assert data.shared_resources is None, \
+        "Systems with shared resources couple their elements, solve them with DecompositionSolver"
+
+
+def build_block_solver(element: ElementData, center_coeffs: ndarray, criteria: int = 1, delta: float = 0,
+                       f_opt: Optional[float] = None, cache: Optional[ModelStore] = None) -> Tuple[BaseSolver, float]:
+    """
+    Set up the center problem for one element only and return it with the element optimum.
+
+    The center criteria have no constraints linking different elements, so the block of element e
+    of the whole center problem is solved exactly by the same criteria over a single-element system.
+    """
+
+    data = CenterData(
+        config=CenterConfig(num_elements=1),
+        coeffs_functional=[center_coeffs],
+        elements=[element],
+    )
+    f_e_opt = None if f_opt is None else [f_opt]
+
+    if criteria == 1:
+        solver = CenterCriteria1Solver(data, f_1opt=f_e_opt, cache=cache)
+        f_e_opt = solver.f_1opt
+    elif criteria == 2:
+        solver = CenterCriteria2Solver(data, [delta], f_2opt=f_e_opt, cache=cache)
+        f_e_opt = solver.f_2opt
+    else:
+        raise NotImplementedError(f"Criteria {criteria} is not implemented")
+
+    solver.setup()
+    return solver, f_e_opt[0]
+
+
+def get_block_result(solver: BaseSolver, f_opt: float, center_coeffs: ndarray) -> BlockResult:
+    """Solve a block built by build_block_solver and collect its solution."""
+
+    element = solver.data.elements[0]
+    objective, solution = solver.solve()
+    result = dict(
+        element_id=element.config.id,
+        f_opt=f_opt,
+        objective=objective,
+        element=element,
+        order=solver.order[0],
+    )
+
+    if solution:
+        y_e, z_e = solution["y"][0], solution["z"][0]
+        fines = sum(element.fines_for_deadline[j] * z_e[j] for j in range(element.config.num_aggregated_products))
+        result.update(
+            solution={"y_e": y_e, "z_e": z_e, "t_0_e": solution["t_0"][0]},
+            element_quality=float(sum(element.coeffs_functional[i] * y_e[i]
+                                      for i in range(element.config.num_decision_variables)) - fines),
+            center_quality=float(sum(center_coeffs[i] * y_e[i]
+                                     for i in range(element.config.num_decision_variables)) - fines),
+        )
+
+    return BlockResult(**result)
+
+
+def solve_block(element: ElementData, center_coeffs: ndarray, criteria: int = 1, delta: float = 0,
+                f_opt: Optional[float] = None, cache: Optional[ModelStore] = None) -> BlockResult:
+    """Build and solve the center problem for one element."""
+
+    start = perf_counter()
+    with span("block", element=element.config.id, criteria=criteria):
+        solver, f_e_opt = build_block_solver(element, center_coeffs, criteria, delta, f_opt, cache)
+        result = get_block_result(solver, f_e_opt, center_coeffs)
+    return replace(result, solve_time=perf_counter() - start)
+
+
+def aggregate_block_results(results: List[BlockResult]) -> Tuple[float, Dict[str, Any]]:
+    """Objective and solution of the whole center problem, in the structure of the center solvers, from its blocks."""
+
+    if any(not result.solution for result in results):
+        return float("inf"), dict()
+
+    return sum(result.objective for result in results), {
+        "y": [result.solution["y_e"] for result in results],
+        "z": [result.solution["z_e"] for result in results],
+        "t_0": [result.solution["t_0_e"] for result in results],
+    }
+
+
+@dataclass
+class ElementBlock:
+    """Cached state of one element of a session."""
+
+    element: ElementData
+    center_coeffs: ndarray
+    criteria: int
+    delta: float
+    f_opt: Optional[float] = None
+    solver: Optional[BaseSolver] = None
+    result: Optional[BlockResult] = None
+    objective_dirty: bool = False
+
+
+class CenterSession:
+    """
+    Incremental what-if analysis over a center problem.
+
+    The session owns the system data and keeps, per element, the element optimum f_opt, the built
+    block model and its solution. Patches invalidate only what depends on the changed input:
+
+    - element coeffs_functional: objective coefficients of the block model, updated in place;
+    - criteria and delta: the block model, f_opt is kept;
+    - center coeffs_functional[e] and any other element field: f_opt and the block model.
+
+    solve() then re-solves only the invalidated elements, so its cost is proportional to the change.
+    """
+
+    def __init__(self, data: CenterData, criteria: Union[int, List[int]] = 1, delta: Optional[List[float]] = None,
+                 cache: Optional[ModelStore] = None):
+        assert_separable(data)
+        criteria = [criteria] * data.config.num_elements if isinstance(criteria, int) else list(criteria)
+        delta = [0.] * data.config.num_elements if delta is None else list(delta)
+
+        self.blocks: List[ElementBlock] = list()
+        for e in range(data.config.num_elements):
+            assert_bounds(delta[e], (0, 1), f"delta[{e}]")
+            self.blocks.append(ElementBlock(data.elements[e], data.coeffs_functional[e], criteria[e], delta[e]))
+        self.updated: List[int] = list()
+        self.cache = cache
+
+    @property
+    def data(self) -> CenterData:
+        """Current system data with all patches applied."""
+
+        return CenterData(
+            config=CenterConfig(num_elements=len(self.blocks)),
+            coeffs_functional=[block.center_coeffs for block in self.blocks],
+            elements=[block.element for block in self.blocks],
+        )
+
+    @property
+    def results(self) -> List[Optional[BlockResult]]:
+        return [block.result for block in self.blocks]
+
+    @property
+    def f_opt(self) -> List[Optional[float]]:
+        return [block.f_opt for block in self.blocks]
+
+    def invalidate_block(self, e: int, f_opt: bool = False) -> None:
+        """Drop the block model and solution of element e, and optionally its f_opt."""
+
+        block = self.blocks[e]
+        block.solver = None
+        block.result = None
+        if f_opt:
+            block.f_opt = None
+
+    def patch_element(self, e: int, **changes: Any) -> None:
+        """Change fields of element e, either ElementData arrays or ElementConfig values."""
+
+        for name in changes:
+            assert name in ELEMENT_FIELDS | CONFIG_FIELDS, f"Unknown element field {name}"
+
+        block = self.blocks[e]
+        config_changes = {name: value for name, value in changes.items() if name in CONFIG_FIELDS}
+        data_changes = {name: value for name, value in changes.items() if name in ELEMENT_FIELDS}
+        config = replace(block.element.config, **config_changes) if config_changes else block.element.config
+        block.element = replace(block.element, config=config, **data_changes)
+
+        if config_changes or data_changes.keys() - OBJECTIVE_ONLY_FIELDS:
+            self.invalidate_block(e, f_opt=True)
+        elif block.solver is not None:
+            block.objective_dirty = True
+            block.result = None
+
+    def patch_center_coeffs(self, e: int, coeffs_functional: ndarray) -> None:
+        """Change the center functional coefficients of element e."""
+
+        self.blocks[e].center_coeffs = coeffs_functional
+        self.invalidate_block(e, f_opt=True)
+
+    def set_criteria(self, e: int, criteria: int, delta: Optional[float] = None) -> None:
+        """Change the criteria (and its delta) used for element e."""
+
+        block = self.blocks[e]
+        delta = block.delta if delta is None else delta
+        assert_bounds(delta, (0, 1), f"delta[{e}]")
+        if (criteria, delta) != (block.criteria, block.delta):
+            block.criteria, block.delta = criteria, delta
+            self.invalidate_block(e)
+
+    def update_element(self, e: int, element: ElementData, center_coeffs: Optional[ndarray] = None) -> None:
+        """Replace element e, patching only the fields that actually differ."""
+
+        block = self.blocks[e]
+        changes = {name: getattr(element.config, name) for name in CONFIG_FIELDS
+                   if getattr(element.config, name) != getattr(block.element.config, name)}
+        changes.update({name: getattr(element, name) for name in ELEMENT_FIELDS
+                        if not array_equal(getattr(element, name), getattr(block.element, name))})
+        if changes:
+            self.patch_element(e, **changes)
+
+        if center_coeffs is not None and not array_equal(center_coeffs, block.center_coeffs):
+            self.patch_center_coeffs(e, center_coeffs)
+
+    def solve_element(self, e: int) -> BlockResult:
+        """Bring the block of element e up to date, re-using whatever is still valid."""
+
+        start = perf_counter()
+        block = self.blocks[e]
+
+        if block.solver is None:
+            block.solver, block.f_opt = build_block_solver(block.element, block.center_coeffs, block.criteria,
+                                                           block.delta, block.f_opt, self.cache)
+        elif block.objective_dirty:
+            objective = block.solver.solver.Objective()
+            for i, (coeff_func) in enumerate(block.element.coeffs_functional):
+                objective.SetCoefficient(block.solver.y[0][i], float(coeff_func))
+            block.solver.data = replace(block.solver.data, elements=[block.element])
+            block.solver.invalidate()
+        block.objective_dirty = False
+
+        result = get_block_result(block.solver, block.f_opt, block.center_coeffs)
+        block.result = replace(result, solve_time=perf_counter() - start)
+        return block.result
+
+    def solve(self) -> Tuple[float, Dict[str, Any]]:
+        """Re-solve the invalidated elements and assemble the solution of the whole center problem."""
+
+        self.updated = [e for e, (block) in enumerate(self.blocks) if block.result is None]
+        for e in self.updated:
+            self.solve_element(e)
+
+        return aggregate_block_results(self.results)
@@ -0,0 +1,180 @@
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from data.serialization import ELEMENT_ARRAYS
+from models.center import CenterData, CenterConfig
+from models.element import ElementData, ElementConfig, element_shapes
+
+if TYPE_CHECKING:
+    from solvers.base import BaseSolver
+
+
+def element_signature(element: ElementData, order: List[int]) -> Tuple:
+    """Everything the structure of an element block depends on: its dimensions, type and priority order."""
+
+    config = element.config
+    return (config.num_decision_variables, config.num_aggregated_products, config.num_soft_deadline_products,
+            config.num_constraints, int(config.type), tuple(order))
+
+
+def element_parameters(element: ElementData) -> np.ndarray:
+    """Numbers of an element as one flat vector."""
+
+    return np.concatenate([np.ravel(getattr(element, name)).astype(np.float64) for name in ELEMENT_ARRAYS])
+
+
+def element_from_parameters(config: ElementConfig, parameters: np.ndarray) -> ElementData:
+    """Element with the given configuration and the numbers of a vector made by element_parameters."""
+
+    arrays, offset = dict(), 0
+    for name, shape in element_shapes(config).items():
+        size = int(np.prod(shape))
+        arrays[name] = parameters[offset:offset + size].reshape(shape)
+        offset += size
+    return ElementData(config=config, **arrays)
+
+
+def center_parameters(data: CenterData, bounds: List[float]) -> np.ndarray:
+    """Numbers of a center problem as one flat vector: per element its data, center coefficients and bound."""
+
+    return np.concatenate([
+        np.concatenate([element_parameters(element), np.asarray(data.coeffs_functional[e], dtype=np.float64),
+                        [bounds[e]]])
+        for e, (element) in enumerate(data.elements)
+    ])
+
+
+def center_from_parameters(data: CenterData, parameters: np.ndarray) -> Tuple[CenterData, List[float]]:
+    """Center data of the same shape as data and the bounds, from a vector made by center_parameters."""
+
+    elements, coeffs_functional, bounds, offset = list(), list(), list(), 0
+    for element in data.elements:
+        size = sum(int(np.prod(shape)) for shape in element_shapes(element.config).values())
+        n = element.config.num_decision_variables
+        elements.append(element_from_parameters(element.config, parameters[offset:offset + size]))
+        coeffs_functional.append(parameters[offset + size:offset + size + n])
+        bounds.append(float(parameters[offset + size + n]))
+        offset += size + n + 1
+    return CenterData(config=CenterConfig(num_elements=len(elements)), coeffs_functional=coeffs_functional,
+                      elements=elements), bounds
+
+
+def proto_values(model: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """All numbers of an MPModelProto in a fixed order, and its sparsity structure (row lengths and columns)."""
+
+    variables, constraints = model.variable, model.constraint
+    values = np.concatenate([
+        [v.lower_bound for v in variables],
+        [v.upper_bound for v in variables],
+        [v.objective_coefficient for v in variables],
+        [c.lower_bound for c in constraints],
+        [c.upper_bound for c in constraints],
+        [x for c in constraints for x in c.coefficient],
+        [model.objective_offset],
+    ])
+    lengths = np.array([len(c.var_index) for c in constraints], dtype=np.int64)
+    columns = np.array([i for c in constraints for i in c.var_index], dtype=np.int64)
+    return values, lengths, columns
+
+
+class ModelTemplate:
+    """
+    Sparsity structure of a model with the positions of its numbers in the template parameter vector.
+
+    Each number of the model is either a constant or one parameter with a sign. The template learns which
+    by building two probe models whose parameters are distinct integers (k + 2 and 2k + 3 for parameter k),
+    so instantiating a new model is a gather from the parameter vector written into a copy of the proto.
+    """
+
+    def __init__(self, solver: "BaseSolver"):
+        num_parameters = len(solver.template_parameters())
+        k = np.arange(num_parameters, dtype=np.float64)
+
+        probes = list()
+        for parameters in (k + 2, 2 * k + 3):
+            probe = solver.template_probe(parameters)
+            probe.setup()
+            probes.append(probe.export_proto())
+
+        (a, lengths, columns), (b, lengths_b, columns_b) = proto_values(probes[0]), proto_values(probes[1])
+        assert np.array_equal(lengths, lengths_b) and np.array_equal(columns, columns_b), \
+            "Model structure depends on the parameter values"
+
+        with np.errstate(invalid="ignore"):
+            index = np.abs(a) - 2
+            is_parameter = ((index >= 0) & (index < num_parameters) & (index == np.round(index))
+                            & (np.abs(b) == 2 * index + 3) & (np.sign(a) == np.sign(b)))
+        assert np.all(is_parameter | (a == b)), "Model numbers are not single template parameters"
+
+        self.proto = probes[0]
+        self.num_parameters = num_parameters
+        self.is_parameter = is_parameter
+        self.index = np.where(is_parameter, index, 0).astype(np.int64)
+        self.sign = np.where(is_parameter, np.sign(a), 0.)
+        self.constant = np.where(is_parameter, 0., a)
+
+        num_variables, num_constraints = len(self.proto.variable), len(self.proto.constraint)
+        self.sections = np.cumsum([num_variables] * 3 + [num_constraints] * 2 + [len(columns)])
+        self.row_offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        # Only the parts of the proto holding parameters are rewritten for each instance
+        parts = np.split(is_parameter, self.sections)
+        self.variables = np.flatnonzero(parts[0] | parts[1] | parts[2])
+        self.constraints = np.flatnonzero(parts[3] | parts[4])
+        row_parameters = np.concatenate([[0], np.cumsum(parts[5])])[self.row_offsets]
+        self.rows = np.flatnonzero(np.diff(row_parameters) > 0)
+
+    def instantiate(self, parameters: np.ndarray) -> Any:
+        """MPModelProto of this structure with the numbers taken from the parameter vector."""
+
+        assert len(parameters) == self.num_parameters, \
+            f"Expected {self.num_parameters} template parameters, got {len(parameters)}"
+
+        values = np.where(self.is_parameter, self.sign * np.asarray(parameters, dtype=np.float64)[self.index],
+                          self.constant)
+        var_lb, var_ub, objective, con_lb, con_ub, coefficients, offset = np.split(values, self.sections)
+
+        model = type(self.proto)()
+        model.CopyFrom(self.proto)
+        for i in self.variables.tolist():
+            variable = model.variable[i]
+            variable.lower_bound, variable.upper_bound = var_lb[i], var_ub[i]
+            variable.objective_coefficient = objective[i]
+        for i in self.constraints.tolist():
+            constraint = model.constraint[i]
+            constraint.lower_bound, constraint.upper_bound = con_lb[i], con_ub[i]
+        for i in self.rows.tolist():
+            model.constraint[i].coefficient[:] = coefficients[self.row_offsets[i]:self.row_offsets[i + 1]].tolist()
+        model.objective_offset = offset[0]
+        return model
+
+
+class ModelTemplates:
+    """
+    Model store building each model from the structural template of its shape signature.
+
+    The first solver of a signature pays for building the template, every further solver with the same
+    dimensions, element types and priority orders only fills its numbers into a copy of the template.
+    """
+
+    def __init__(self):
+        self.templates: Dict[Tuple, ModelTemplate] = dict()
+        self.stats: Dict[str, int] = {"templates": 0, "instances": 0}
+
+    def load(self, solver: "BaseSolver") -> bool:
+        signature = solver.template_signature()
+        if signature is None:
+            return False
+
+        template = self.templates.get(signature)
+        if template is None:
+            template = self.templates[signature] = ModelTemplate(solver)
+            self.stats["templates"] += 1
+
+        solver.load_proto(template.instantiate(solver.template_parameters()))
+        self.stats["instances"] += 1
+        return True
+
+    def store(self, solver: "BaseSolver") -> None:
+        pass
@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from numpy import ndarray
+
+from models.center import CenterData, CenterConfig
+from models.element import ElementData
+from solvers.session import CenterSession
+
+
+class SessionSolveSignals(QObject):
+    finished = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+
+class SessionSolveTask(QRunnable):
+    """Background task re-solving the invalidated elements of a session."""
+
+    def __init__(self, session: CenterSession):
+        super().__init__()
+        self.session = session
+        self.signals = SessionSolveSignals()
+
+    def run(self):
+        try:
+            self.session.solve()
+            self.signals.finished.emit(self.session.updated)
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+
+
+class LiveSolver(QObject):
+    """
+    Debounced incremental re-solving of the center problem.
+
+    Edits are collected per element and flushed after the debounce interval into a CenterSession,
+    which re-solves only the edited elements in the background and reuses the results and f_opt
+    values of the untouched elements.
+    """
+
+    results_updated = pyqtSignal(list, list)
+    solve_failed = pyqtSignal(str)
+
+    def __init__(self, debounce_ms: int = 250, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.flush)
+        self.pool = QThreadPool(self)
+        self.task: Optional[SessionSolveTask] = None
+        self.session: Optional[CenterSession] = None
+        self.pending: Dict[int, Tuple[ElementData, ndarray, int, float]] = dict()
+        self.num_elements = 0
+
+    def reset(self, num_elements: int) -> None:
+        """Drop the session for a new system."""
+
+        self.timer.stop()
+        self.pending.clear()
+        self.session = None
+        self.num_elements = num_elements
+
+    def update_element(self, element_idx: int, element: ElementData, center_coeffs: ndarray,
+                       criterion: int, delta: float = 0) -> None:
+        """Register an edit of one element and restart the debounce timer."""
+
+        self.pending[element_idx] = (element, center_coeffs, criterion, delta)
+        self.timer.start()
+
+    def flush(self) -> None:
+        """Apply the pending edits to the session and re-solve it in the background."""
+
+        self.timer.stop()
+
+        # The session is patched only between solves, edits made meanwhile wait for the running task
+        if self.task is not None:
+            return
+
+        if self.session is None:
+            # The center problem is defined only once every element has valid data
+            if len(self.pending) < self.num_elements:
+                return
+
+            inputs = [self.pending[e] for e in range(self.num_elements)]
+            self.session = CenterSession(
+                CenterData(
+                    config=CenterConfig(num_elements=self.num_elements),
+                    coeffs_functional=[center_coeffs for _, center_coeffs, _, _ in inputs],
+                    elements=[element for element, _, _, _ in inputs],
+                ),
+                criteria=[criterion for _, _, criterion, _ in inputs],
+                delta=[delta for _, _, _, delta in inputs],
+            )
+        else:
+            for element_idx, (element, center_coeffs, criterion, delta) in self.pending.items():
+                self.session.update_element(element_idx, element, center_coeffs)
+                self.session.set_criteria(element_idx, criterion, delta)
+        self.pending.clear()
+
+        self.task = SessionSolveTask(self.session)
+        self.task.signals.finished.connect(self.on_solved)
+        self.task.signals.failed.connect(self.on_failed)
+        self.task.setAutoDelete(False)
+        self.pool.start(self.task)
+
+    def on_solved(self, updated: List[int]) -> None:
+        self.task = None
+        if self.session is not None:
+            self.results_updated.emit(self.session.results, updated)
+        if self.pending:
+            self.flush()
+
+    def on_failed(self, message: str) -> None:
+        self.task = None
+        self.solve_failed.emit(message)
+        if self.pending:
+            self.flush()
@@ -1,8 +1,10 @@
 # ui/main_window.py
 from PyQt5.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout
+from .live_solver import LiveSolver
 from .tabs.configuration_tab import ConfigurationTab
 from .tabs.detailed_input_tab import DetailedInputTab
 from .tabs.results_tab import ResultsTab
+from .tabs.schedule_tab import ScheduleTab
 
 
 class MainWindow(QMainWindow):
@@ -23,15 +25,23 @@ class MainWindow(QMainWindow):
         self.config_tab = ConfigurationTab()
         self.detailed_tab = DetailedInputTab()
         self.results_tab = ResultsTab()
+        self.schedule_tab = ScheduleTab()
+        self.live_solver = LiveSolver(parent=self)
 
         # Add tabs to widget
         self.tab_widget.addTab(self.config_tab, "Configuration")
         self.tab_widget.addTab(self.detailed_tab, "Detailed Input")
         self.tab_widget.addTab(self.results_tab, "Results")
+        self.tab_widget.addTab(self.schedule_tab, "Schedule")
 
         # Connect signals
         self.config_tab.next_button.clicked.connect(self.on_next_clicked)
         self.detailed_tab.solve_button.clicked.connect(self.on_solve_clicked)
+        self.detailed_tab.element_changed.connect(self.on_element_changed)
+        self.detailed_tab.live_checkbox.toggled.connect(self.on_live_toggled)
+        self.live_solver.results_updated.connect(self.results_tab.show_results)
+        self.live_solver.results_updated.connect(self.schedule_tab.show_results)
+        self.live_solver.solve_failed.connect(self.results_tab.show_error)
 
         layout.addWidget(self.tab_widget)
 
@@ -40,12 +50,39 @@ class MainWindow(QMainWindow):
         config_data = self.config_tab.get_configuration()
         # Update detailed tab with configuration
         self.detailed_tab.update_inputs(config_data)
+        self.live_solver.reset(len(config_data))
         # Switch to detailed input tab
         self.tab_widget.setCurrentIndex(1)
 
     def on_solve_clicked(self):
+        # Cached element optimums are reused, only the center blocks are solved again
+        for element_idx in range(len(self.detailed_tab.element_groups)):
+            self.submit_element(element_idx)
+        self.live_solver.flush()
         self.tab_widget.setCurrentIndex(2)
 
+    def on_element_changed(self, element_idx: int):
+        if self.detailed_tab.live_checkbox.isChecked():
+            self.submit_element(element_idx)
+
+    def on_live_toggled(self, checked: bool):
+        if checked:
+            for element_idx in range(len(self.detailed_tab.element_groups)):
+                self.submit_element(element_idx)
+
+    def submit_element(self, element_idx: int):
+        group = self.detailed_tab.element_groups[element_idx]
+        if not group.validate():
+            return
+
+        self.live_solver.update_element(
+            element_idx,
+            group.get_element_data(),
+            group.get_center_coeffs(),
+            group.config['criterion'],
+            group.config.get('delta', 0),
+        )
+
 
 # ui/tabs/configuration_tab.py (add this method)
 def get_configuration(self):
@@ -1,10 +1,13 @@
 # ui/tabs/configuration_tab.py
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QSpinBox, QComboBox, QPushButton, QGridLayout,
-                             QDoubleSpinBox, QFrame)
+                             QDoubleSpinBox, QFrame, QCheckBox)
 from PyQt5.QtCore import Qt
 from typing import Dict, List
 
+from models.element import ElementType
+from .criteria2_tab import Criteria2Tab
+
 
 class ElementWidget(QFrame):
     def __init__(self, element_num: int):
@@ -13,6 +16,8 @@ class ElementWidget(QFrame):
         self.element_num = element_num
         self.fields: Dict = {}
         self.criterion_combo: QComboBox = None
+        self.type_combo: QComboBox = None
+        self.free_order_checkbox: QCheckBox = None
         self.criteria_specific: Dict = {}
         self.init_ui()
 
@@ -40,7 +45,6 @@ class ElementWidget(QFrame):
             "num_aggregated_products": ("Products", (1, 1000)),
             "num_soft_deadline_products": ("Soft Deadline", (1, 1000)),
             "num_constraints": ("Constraints", (1, 1000)),
-            "num_directive_products": ("Directive Products", (1, 1000))  # Added this field
         }
 
         row = 2
@@ -48,18 +52,35 @@ class ElementWidget(QFrame):
             label = QLabel(f"{label_text}:")
             spinbox = QSpinBox()
             spinbox.setRange(min_val, max_val)
-            # Set default value to match number of products for directive products
-            if field_name == "num_directive_products":
-                spinbox.setValue(self.fields["num_aggregated_products"].value() if "num_aggregated_products" in self.fields else 1)
-                # Connect to update when products change
-                if "num_aggregated_products" in self.fields:
-                    self.fields["num_aggregated_products"].valueChanged.connect(spinbox.setValue)
             layout.addWidget(label, row, 0)
             layout.addWidget(spinbox, row, 1)
             self.fields[field_name] = spinbox
             row += 1
 
-        # Rest of the code remains the same...
+        # Element type and product order
+        type_label = QLabel("Type:")
+        self.type_combo = QComboBox()
+        for element_type in ElementType:
+            self.type_combo.addItem(element_type.name.capitalize(), element_type)
+        layout.addWidget(type_label, row, 0)
+        layout.addWidget(self.type_combo, row, 1)
+        row += 1
+
+        self.free_order_checkbox = QCheckBox("Free order")
+        layout.addWidget(self.free_order_checkbox, row, 0, 1, 2)
+        row += 1
+
+        # Criteria-specific inputs, shown only for the selected criterion
+        self.criteria_specific[1] = Criteria2Tab()
+        for index, widget in self.criteria_specific.items():
+            widget.setVisible(index == self.criterion_combo.currentIndex())
+            layout.addWidget(widget, row, 0, 1, 2)
+            row += 1
+        self.criterion_combo.currentIndexChanged.connect(self.on_criterion_changed)
+
+    def on_criterion_changed(self, index: int):
+        for criterion_index, widget in self.criteria_specific.items():
+            widget.setVisible(criterion_index == index)
 
     def get_configuration(self) -> dict:
         config = {
@@ -67,6 +88,8 @@ class ElementWidget(QFrame):
             for name, spinbox in self.fields.items()
         }
 
+        config['type'] = self.type_combo.currentData()
+        config['free_order'] = self.free_order_checkbox.isChecked()
         config['criterion'] = self.criterion_combo.currentIndex() + 1
 
         # Add criteria-specific configuration
@@ -1,8 +1,12 @@
 # ui/tabs/detailed_input_tab.py
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QTextEdit,
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit,
                              QPushButton, QGridLayout, QFrame, QScrollArea,
-                             QGroupBox)
-from PyQt5.QtCore import Qt
+                             QGroupBox, QCheckBox)
+from PyQt5.QtCore import Qt, pyqtSignal
+from numpy import array, ndarray
+
+from models.center import CenterData, CenterConfig
+from models.element import ElementData, ElementConfig
 
 
 class MatrixInput(QFrame):
@@ -90,8 +94,11 @@ class VectorInput(QFrame):
 
 
 class ElementInputGroup(QGroupBox):
+    changed = pyqtSignal(int)
+
     def __init__(self, element_num, config):
         super().__init__(f"Element {element_num}")
+        self.element_num = element_num
         self.config = config
         self.inputs = {}
         self.init_ui()
@@ -106,48 +113,56 @@ class ElementInputGroup(QGroupBox):
             "Coefficients for the functional part of the optimization"
         )
 
-        self.inputs['resource_constraints'] = MatrixInput(
-            "Resource Constraints",
-            self.config['num_constraints'],
+        self.inputs['center_coeffs_functional'] = VectorInput(
+            "Center Functional Coefficients",
             self.config['num_decision_variables'],
-            "Matrix of resource constraints coefficients"
+            "Coefficients of the center functional for this element"
         )
 
         self.inputs['aggregated_plan_costs'] = MatrixInput(
             "Aggregated Plan Costs",
-            self.config['num_aggregated_products'],
+            self.config['num_constraints'],
             self.config['num_decision_variables'],
-            "Matrix of costs for aggregated products"
+            "Matrix of resource costs per unit of each product"
         )
 
-        self.inputs['aggregated_plan_times'] = MatrixInput(
+        self.inputs['resource_constraints'] = VectorInput(
+            "Resource Constraints",
+            self.config['num_constraints'],
+            "Vector of available resources"
+        )
+
+        self.inputs['aggregated_plan_times'] = VectorInput(
             "Aggregated Plan Times",
             self.config['num_aggregated_products'],
-            self.config['num_decision_variables'],
-            "Matrix of times for aggregated products"
+            "Vector of times for aggregated products"
         )
 
         self.inputs['directive_terms'] = VectorInput(
             "Directive Terms",
-            self.config['num_directive_products'],
+            self.config['num_aggregated_products'],
             "Vector of directive terms"
         )
 
         self.inputs['num_directive_products'] = VectorInput(
             "Number of Directive Products",
-            self.config['num_decision_variables'],
+            self.config['num_aggregated_products'],
             "Vector specifying number of directive products"
         )
 
         self.inputs['fines_for_deadline'] = VectorInput(
             "Fines for Deadline",
-            self.config['num_soft_deadline_products'],
-            "Vector of fines for missing soft deadlines"
+            self.config['num_aggregated_products'],
+            "Vector of fines for missing deadlines"
         )
 
         # Add all inputs to layout
         for input_widget in self.inputs.values():
             layout.addWidget(input_widget)
+            input_widget.text_edit.textChanged.connect(self.on_text_changed)
+
+    def on_text_changed(self):
+        self.changed.emit(self.element_num - 1)
 
     def validate(self):
         return all(input_widget.validate() for input_widget in self.inputs.values())
@@ -156,8 +171,34 @@ class ElementInputGroup(QGroupBox):
         return {name: input_widget.get_data()
                 for name, input_widget in self.inputs.items()}
 
+    def get_element_data(self) -> ElementData:
+        data = self.get_data()
+        return ElementData(
+            config=ElementConfig(
+                id=self.element_num - 1,
+                num_decision_variables=self.config['num_decision_variables'],
+                num_aggregated_products=self.config['num_aggregated_products'],
+                num_soft_deadline_products=self.config['num_soft_deadline_products'],
+                num_constraints=self.config['num_constraints'],
+                free_order=self.config['free_order'],
+                type=self.config['type'],
+            ),
+            coeffs_functional=array(data['coeffs_functional']),
+            resource_constraints=array(data['resource_constraints']),
+            aggregated_plan_costs=array(data['aggregated_plan_costs']),
+            aggregated_plan_times=array(data['aggregated_plan_times']),
+            directive_terms=array(data['directive_terms']),
+            num_directive_products=array(data['num_directive_products']),
+            fines_for_deadline=array(data['fines_for_deadline']),
+        )
+
+    def get_center_coeffs(self) -> ndarray:
+        return array(self.inputs['center_coeffs_functional'].get_data())
+
 
 class DetailedInputTab(QWidget):
+    element_changed = pyqtSignal(int)
+
     def __init__(self):
         super().__init__()
         self.element_groups = []
@@ -178,10 +219,16 @@ class DetailedInputTab(QWidget):
         scroll.setWidget(self.input_container)
         layout.addWidget(scroll)
 
-        # Solve button
+        # Live mode toggle and solve button
+        buttons_layout = QHBoxLayout()
+        self.live_checkbox = QCheckBox("Live")
+        self.live_checkbox.setToolTip("Re-solve edited elements automatically")
         self.solve_button = QPushButton("Solve")
         self.solve_button.setEnabled(False)
-        layout.addWidget(self.solve_button, alignment=Qt.AlignRight)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(self.live_checkbox)
+        buttons_layout.addWidget(self.solve_button)
+        layout.addLayout(buttons_layout)
 
     def update_inputs(self, config_data):
         # Clear existing inputs
@@ -194,6 +241,7 @@ class DetailedInputTab(QWidget):
         # Add new inputs based on configuration
         for i, element_config in enumerate(config_data):
             group = ElementInputGroup(i + 1, element_config)
+            group.changed.connect(self.on_element_changed)
             self.element_groups.append(group)
             self.input_layout.addWidget(group)
 
@@ -207,5 +255,17 @@ class DetailedInputTab(QWidget):
         self.solve_button.setEnabled(valid)
         return valid
 
+    def on_element_changed(self, element_idx: int):
+        self.validate_all()
+        if self.element_groups[element_idx].validate():
+            self.element_changed.emit(element_idx)
+
     def get_input_data(self):
-        return [group.get_data() for group in self.element_groups]
\ No newline at end of file
+        return [group.get_data() for group in self.element_groups]
+
+    def get_center_data(self) -> CenterData:
+        return CenterData(
+            config=CenterConfig(num_elements=len(self.element_groups)),
+            coeffs_functional=[group.get_center_coeffs() for group in self.element_groups],
+            elements=[group.get_element_data() for group in self.element_groups],
+        )
@@ -1,5 +1,10 @@
+from typing import List, Optional
+
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTextEdit,
-                             QPushButton, QHBoxLayout)
+                             QPushButton, QHBoxLayout, QLabel)
+
+from solvers.session import BlockResult
+from utils.helpers import stringify, tab_str
 
 
 class ResultsTab(QWidget):
@@ -333,9 +338,12 @@ Center (second criteria) quality functionality: 764.85"""
         self.copy_button = QPushButton("Copy to Clipboard")
         self.save_button = QPushButton("Save to .txt")
 
+        self.status_label = QLabel()
+
         buttons_layout.addWidget(self.copy_button)
         buttons_layout.addWidget(self.save_button)
         buttons_layout.addStretch()
+        buttons_layout.addWidget(self.status_label)
 
         layout.addWidget(self.results_text)
         layout.addLayout(buttons_layout)
@@ -353,3 +361,34 @@ Center (second criteria) quality functionality: 764.85"""
         if self.results_text.toPlainText():
             with open("results.txt", "w") as f:
                 f.write(self.results_text.toPlainText())
+
+    def show_results(self, results: List[Optional[BlockResult]], updated: List[int]):
+        text = []
+        center_functionality = 0
+        for e, (result) in enumerate(results):
+            if result is None:
+                text.append(f"\nElement {stringify(e)}: waiting for valid input data.")
+                continue
+
+            if not result.solution:
+                text.append(f"\nElement {stringify(result.element_id)}: no optimal solution found.")
+                continue
+
+            text.append(tab_str(f"\nSolution for element {stringify(result.element_id)}", (
+                ("y_e", stringify(result.solution["y_e"])),
+                ("z_e", stringify(result.solution["z_e"])),
+                ("t_0_e", stringify(result.solution["t_0_e"])),
+                ("order", stringify(result.order)),
+            )))
+            text.append(f"\nElement {stringify(result.element_id)} quality functionality: "
+                        f"{stringify(result.element_quality)}")
+            center_functionality += result.center_quality
+
+        text.append(f"\nCenter quality functionality: {stringify(center_functionality)}")
+        self.results_text.setText("\n".join(text))
+
+        solve_time = sum(results[e].solve_time for e in updated if results[e] is not None)
+        self.status_label.setText(f"Updated element(s) {stringify(updated)} in {solve_time * 1000:.0f} ms")
+
+    def show_error(self, message: str):
+        self.status_label.setText(f"Solve failed: {message}")
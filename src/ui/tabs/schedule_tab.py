@@ -0,0 +1,97 @@
+from typing import List, Optional
+
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton
+
+from solvers.session import BlockResult
+from ui.widgets.gantt_view import GanttView, GanttBars
+
+VIOLATION_TOLERANCE = 1e-6
+
+
+def build_gantt_bars(results: List[Optional[BlockResult]], element_idx: Optional[int] = None) -> GanttBars:
+    """
+    Collect the product bars of the solved elements.
+
+    A bar of product i starts at t_0_e[i] and lasts VS_AGGREGATED_PLAN_TIMES[e][i] * y_e[i]. Across elements
+    each element is one row, for a single element each product gets its own row.
+    """
+
+    starts, ends, rows, violated, deadlines, labels = [], [], [], [], [], []
+    for e, (result) in enumerate(results):
+        if result is None or not result.solution or (element_idx is not None and e != element_idx):
+            continue
+
+        element = result.element
+        n1 = element.config.num_aggregated_products
+        t_0_e = np.asarray(result.solution["t_0_e"], dtype=float)
+        y_e = np.asarray(result.solution["y_e"][:n1], dtype=float)
+        z_e = np.asarray(result.solution["z_e"], dtype=float)
+
+        starts.append(t_0_e)
+        ends.append(t_0_e + element.aggregated_plan_times * y_e)
+        violated.append(z_e > VIOLATION_TOLERANCE)
+        deadlines.append(np.asarray(element.directive_terms, dtype=float))
+        if element_idx is None:
+            rows.append(np.full(n1, len(labels)))
+            labels.append(f"Element {element.config.id}")
+        else:
+            rows.append(np.arange(n1))
+            labels.extend(f"Product {i}" for i in range(n1))
+
+    if not starts:
+        return GanttBars(np.empty(0), np.empty(0), np.empty(0, dtype=int), np.empty(0, dtype=bool), np.empty(0), [])
+
+    return GanttBars(np.concatenate(starts), np.concatenate(ends), np.concatenate(rows),
+                     np.concatenate(violated), np.concatenate(deadlines), labels)
+
+
+class ScheduleTab(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.results: List[Optional[BlockResult]] = []
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        # View selection
+        controls_layout = QHBoxLayout()
+        self.view_combo = QComboBox()
+        self.view_combo.addItem("All elements")
+        self.fit_button = QPushButton("Fit")
+        legend = QLabel("Bars: production intervals, red: deadline violated (z_e > 0), lines: directive terms")
+        controls_layout.addWidget(QLabel("Show:"))
+        controls_layout.addWidget(self.view_combo)
+        controls_layout.addWidget(self.fit_button)
+        controls_layout.addStretch()
+        controls_layout.addWidget(legend)
+
+        self.gantt_view = GanttView()
+
+        layout.addLayout(controls_layout)
+        layout.addWidget(self.gantt_view)
+
+        # Connect signals
+        self.view_combo.currentIndexChanged.connect(lambda: self.update_view(fit=True))
+        self.fit_button.clicked.connect(self.gantt_view.fit)
+
+    def show_results(self, results: List[Optional[BlockResult]], updated: List[int]):
+        first = not any(self.results)
+        self.results = results
+
+        # Keep the selection while the number of elements is unchanged
+        if self.view_combo.count() != len(results) + 1:
+            self.view_combo.blockSignals(True)
+            self.view_combo.clear()
+            self.view_combo.addItem("All elements")
+            self.view_combo.addItems([f"Element {e}" for e in range(len(results))])
+            self.view_combo.blockSignals(False)
+            first = True
+
+        self.update_view(fit=first)
+
+    def update_view(self, fit: bool = False):
+        index = self.view_combo.currentIndex()
+        element_idx = None if index <= 0 else index - 1
+        self.gantt_view.set_bars(build_gantt_bars(self.results, element_idx), fit=fit)
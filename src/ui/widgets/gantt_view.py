@@ -0,0 +1,185 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from PyQt5.QtCore import Qt, QRectF, QLineF
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsScene, QGraphicsView
+
+ROW_HEIGHT = 20.0
+BAR_MARGIN = 3.0
+MAX_SINGLE_BARS = 2000  # Above this number of visible bars, they are aggregated per pixel bins
+BIN_PIXELS = 2  # Width and minimal height of an aggregation bin in pixels
+MIN_LABEL_PIXELS = 10  # Row labels are drawn only when rows are at least this tall
+
+BAR_COLOR = QColor(70, 130, 180)
+VIOLATION_COLOR = QColor(220, 20, 60)
+DEADLINE_COLOR = QColor(90, 90, 90)
+
+
+@dataclass(frozen=True)
+class GanttBars:
+    """Flat arrays of schedule bars: one entry per product."""
+
+    starts: np.ndarray
+    ends: np.ndarray
+    rows: np.ndarray
+    violated: np.ndarray
+    deadlines: np.ndarray
+    labels: List[str]
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.labels)
+
+
+class GanttBarsItem(QGraphicsItem):
+    """
+    Single graphics item painting all schedule bars with level-of-detail aggregation.
+
+    When few bars are visible they are drawn one by one together with their deadlines. Otherwise,
+    the visible bars are merged into pixel-sized bins painted as one image, so painting cost
+    depends on the viewport size and not on the number of bars.
+    """
+
+    def __init__(self, bars: GanttBars):
+        super().__init__()
+        self.bars = bars
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+        left = float(bars.starts.min()) if len(bars.starts) else 0.
+        right = float(max(bars.ends.max(), bars.deadlines.max())) if len(bars.ends) else 1.
+        self.rect = QRectF(left, 0, max(right - left, 1.), bars.num_rows * ROW_HEIGHT)
+
+    def boundingRect(self) -> QRectF:
+        return self.rect
+
+    def paint(self, painter: QPainter, option, widget=None):
+        exposed = option.exposedRect
+        x0, x1 = exposed.left(), exposed.right()
+        row0, row1 = int(exposed.top() // ROW_HEIGHT), int(exposed.bottom() // ROW_HEIGHT)
+
+        bars = self.bars
+        visible = np.flatnonzero((bars.starts <= x1) & (bars.ends >= x0) & (bars.rows >= row0) & (bars.rows <= row1))
+        if not len(visible):
+            return
+
+        transform = painter.worldTransform()
+        scale_x, scale_y = abs(transform.m11()), abs(transform.m22())
+        painter.setPen(Qt.NoPen)
+
+        if len(visible) > MAX_SINGLE_BARS:
+            self.paint_aggregated(painter, visible, x0, x1, row0, row1, scale_x, scale_y)
+        else:
+            self.paint_bars(painter, visible, scale_x)
+
+    def paint_bars(self, painter: QPainter, visible: np.ndarray, scale_x: float) -> None:
+        """Draw each visible bar and its deadline."""
+
+        bars = self.bars
+        min_width = 1. / scale_x  # Keep zero-length bars visible as one pixel
+        for violated, color in ((False, BAR_COLOR), (True, VIOLATION_COLOR)):
+            painter.setBrush(color)
+            painter.drawRects([
+                QRectF(bars.starts[i], bars.rows[i] * ROW_HEIGHT + BAR_MARGIN,
+                       max(bars.ends[i] - bars.starts[i], min_width), ROW_HEIGHT - 2 * BAR_MARGIN)
+                for i in visible[bars.violated[visible] == violated]
+            ])
+
+        pen = QPen(DEADLINE_COLOR)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.drawLines([
+            QLineF(bars.deadlines[i], bars.rows[i] * ROW_HEIGHT, bars.deadlines[i], (bars.rows[i] + 1) * ROW_HEIGHT)
+            for i in visible
+        ])
+
+    def paint_aggregated(self, painter: QPainter, visible: np.ndarray, x0: float, x1: float,
+                         row0: int, row1: int, scale_x: float, scale_y: float) -> None:
+        """Draw the occupancy of pixel bins covered by at least one visible bar as a single image."""
+
+        bars = self.bars
+        num_x = max(1, int((x1 - x0) * scale_x / BIN_PIXELS))
+        bin_width = (x1 - x0) / num_x
+        rows_per_bin = max(1, int(np.ceil(BIN_PIXELS / (ROW_HEIGHT * scale_y))))
+        num_y = (row1 - row0) // rows_per_bin + 1
+
+        x_start = np.clip(((bars.starts[visible] - x0) / bin_width).astype(np.int64), 0, num_x - 1)
+        x_end = np.clip(((bars.ends[visible] - x0) / bin_width).astype(np.int64), 0, num_x - 1)
+        offsets = (bars.rows[visible] - row0) // rows_per_bin * (num_x + 1)
+
+        pixels = np.zeros((num_y, num_x), dtype=np.uint32)
+        for violated, color in ((False, BAR_COLOR), (True, VIOLATION_COLOR)):
+            mask = bars.violated[visible] == violated
+
+            # Difference array per bin row: +1 where a bar starts, -1 after it ends
+            diff = (np.bincount(offsets[mask] + x_start[mask], minlength=num_y * (num_x + 1))
+                    - np.bincount(offsets[mask] + x_end[mask] + 1, minlength=num_y * (num_x + 1)))
+            occupied = np.cumsum(diff.reshape(num_y, num_x + 1), axis=1)[:, :num_x] > 0
+            pixels[occupied] = color.rgba()
+
+        image = QImage(pixels.data, num_x, num_y, num_x * 4, QImage.Format_ARGB32)
+        painter.drawImage(QRectF(x0, row0 * ROW_HEIGHT, num_x * bin_width, num_y * rows_per_bin * ROW_HEIGHT), image)
+
+
+class GanttView(QGraphicsView):
+    """Zoomable and pannable Gantt chart of the schedule bars."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QGraphicsScene(self))
+        self.scene().setItemIndexMethod(QGraphicsScene.NoIndex)
+        self.bars: Optional[GanttBars] = None
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        self.setOptimizationFlags(QGraphicsView.DontSavePainterState | QGraphicsView.DontAdjustForAntialiasing)
+
+    def set_bars(self, bars: GanttBars, fit: bool = True) -> None:
+        """Replace the displayed schedule, keeping the current zoom unless fit is requested."""
+
+        self.scene().clear()
+        self.bars = bars
+        item = GanttBarsItem(bars)
+        self.scene().addItem(item)
+        self.scene().setSceneRect(item.boundingRect())
+        if fit:
+            self.fit()
+
+    def fit(self) -> None:
+        """Fit the time axis into the viewport width and shrink the rows to fit its height."""
+
+        if self.bars is None:
+            return
+
+        rect = self.scene().sceneRect()
+        self.resetTransform()
+        self.scale(max(self.viewport().width() - 1, 1) / rect.width(),
+                   min(1., max(self.viewport().height() - 1, 1) / max(rect.height(), 1.)))
+
+    def wheelEvent(self, event):
+        """Zoom the time axis, or both axes with Ctrl held."""
+
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        if event.modifiers() & Qt.ControlModifier:
+            self.scale(factor, factor)
+        else:
+            self.scale(factor, 1.)
+
+    def drawForeground(self, painter: QPainter, rect: QRectF):
+        """Draw the labels of the visible rows at the left edge of the viewport."""
+
+        if self.bars is None or abs(self.transform().m22()) * ROW_HEIGHT < MIN_LABEL_PIXELS:
+            return
+
+        row0 = max(0, int(rect.top() // ROW_HEIGHT))
+        row1 = min(self.bars.num_rows - 1, int(rect.bottom() // ROW_HEIGHT))
+
+        painter.save()
+        painter.resetTransform()
+        painter.setPen(Qt.black)
+        for row in range(row0, row1 + 1):
+            top = self.mapFromScene(rect.left(), row * ROW_HEIGHT).y()
+            painter.drawText(4, top, 200, int(ROW_HEIGHT * abs(self.transform().m22())),
+                             Qt.AlignVCenter, self.bars.labels[row])
+        painter.restore()
@@ -1,20 +1,31 @@
-from dataclasses import replace
+from dataclasses import dataclass, replace
 from enum import ReprEnum
 from numbers import Number
-from typing import Union, List, Any, Sequence, Optional, TypeVar, Protocol, Iterable
+from typing import Union, List, Any, Sequence, Optional, TypeVar, Protocol, Iterable, Tuple, Callable, TYPE_CHECKING
 
 from numpy import ndarray, argsort, array, flip
-from ortools.linear_solver.pywraplp import Variable
-from tabulate import tabulate
 
 from models.element import ElementData, ElementType
 
+if TYPE_CHECKING:
+    from ortools.linear_solver.pywraplp import Variable
+
+D = TypeVar("D")
+
+
+def tab_str(subscription: str, data: Sequence[Sequence[str]], headers: List[str] = ("Parameter", "Value")) -> str:
+    """Formats a table with the given data and headers as a string."""
+
+    from tabulate import tabulate
+
+    table = tabulate(data, headers, "grid")
+    return f"\n{subscription}:\n{table}"
+
 
 def tab_out(subscription: str, data: Sequence[Sequence[str]], headers: List[str] = ("Parameter", "Value")) -> None:
     """Pretty-prints a table with the given data and headers."""
 
-    print(f"\n{subscription}:")
-    print(tabulate(data, headers, "grid"))
+    print(tab_str(subscription, data, headers))
 
 
 def stringify(tensor: Union[ReprEnum, Number, Iterable[Any], ndarray], indent: int = 4, precision: int = 2) -> str:
@@ -87,9 +98,34 @@ def stringify(tensor: Union[ReprEnum, Number, Iterable[Any], ndarray], indent: i
 
 
 def copy_element_coeffs(element: ElementData, coeffs_functional: Optional[ndarray] = None) -> ElementData:
-    """Creates a copy of an ElementData instance with optionally modified coeffs_functional."""
+    """
+    Creates a copy of an ElementData instance with optionally modified coeffs_functional.
+
+    The copy shares the derived structures of the element, none of which depend on coeffs_functional.
+    """
+
+    if coeffs_functional is None:
+        return element
+    copy = replace(element, coeffs_functional=coeffs_functional)
+    object.__setattr__(copy, "_derived", element._derived)
+    return copy
+
+
+def derived(element: ElementData, name: str, key: Tuple, compute: Callable[[], D]) -> D:
+    """
+    Structure derived from an element, computed once and cached on the element under name.
+
+    key holds everything the structure depends on, down to the bytes of the arrays it reads: arrays of an
+    ElementData are read-only but may view a buffer its owner still writes, so a cached structure is only
+    returned while its key is unchanged and recomputed otherwise.
+    """
 
-    return element if coeffs_functional is None else replace(element, coeffs_functional=coeffs_functional)
+    cached = element._derived.get(name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    value = compute()
+    element._derived[name] = (key, value)
+    return value
 
 
 def calculate_priority_order(element: ElementData) -> List[int]:
@@ -98,22 +134,67 @@ def calculate_priority_order(element: ElementData) -> List[int]:
     else the original order is kept. This implements the non-decreasing priority requirement.
     """
 
-    return list(range(element.config.num_aggregated_products)) if not element.config.free_order else flip(argsort(
-        element.aggregated_plan_times * element.num_directive_products / element.directive_terms)).tolist()
+    def compute() -> Tuple[int, ...]:
+        if not element.config.free_order:
+            return tuple(range(element.config.num_aggregated_products))
+        return tuple(flip(argsort(
+            element.aggregated_plan_times * element.num_directive_products / element.directive_terms)).tolist())
+
+    key = (element.config.free_order, element.config.num_aggregated_products, element.aggregated_plan_times.tobytes(),
+           element.num_directive_products.tobytes(), element.directive_terms.tobytes())
+    return list(derived(element, "priority_order", key, compute))
+
+
+@dataclass(frozen=True)
+class CompletionTimes:
+    """
+    Structure of the completion times of the products of an element for a priority order.
+
+    T_e[i] = t_0_e[starts[i]] + coefficients[i] * y_e[products[i]] for parallel elements, and
+    T_e[i] = t_0_e[starts[i]] + sum_j={0..i-1}(coefficients[j] * y_e[products[j]]) for sequential (cumulative) ones.
+    """
+
+    starts: Tuple[int, ...]
+    products: Tuple[int, ...]
+    coefficients: Tuple[float, ...]
+    cumulative: bool
+
+
+def completion_time_structure(element: ElementData, order: List[int]) -> CompletionTimes:
+    """Completion time structure of an element for a priority order, cached on the element."""
+
+    n1 = element.config.num_aggregated_products
+    times = element.aggregated_plan_times.tolist()
 
+    def compute() -> CompletionTimes:
+        if element.config.type == ElementType.PARALLEL:
+            return CompletionTimes(tuple(range(n1)), tuple(range(n1)), tuple(times), False)
+        return CompletionTimes((order[0],) * n1, tuple(order), tuple(times[j] for j in order), True)
 
-def get_completion_times(element: ElementData, y_e: List[Variable], t_0_e: List[Variable],
+    key = (int(element.config.type), tuple(order), element.aggregated_plan_times.tobytes())
+    return derived(element, "completion_times", key, compute)
+
+
+def get_completion_times(element: ElementData, y_e: List["Variable"], t_0_e: List["Variable"],
                          order: List[int]) -> List[Any]:
     """
     Create completion time expressions for element products based on priority order.
+
+    Sequential sums are built incrementally, each completion time extending the sum of the previous one,
+    instead of summing every prefix from scratch.
     """
 
-    if element.config.type == ElementType.PARALLEL:
-        return [t_0_e[i] + element.aggregated_plan_times[i] * y_e[i]
-                for i in range(element.config.num_aggregated_products)]
-    elif element.config.type == ElementType.SEQUENTIAL:
-        return [t_0_e[order[0]] + lp_sum(element.aggregated_plan_times[order[j]] * y_e[order[j]] for j in range(i))
-                for i in range(element.config.num_aggregated_products)]
+    structure = completion_time_structure(element, order)
+    if not structure.cumulative:
+        return [t_0_e[start] + coefficient * y_e[product]
+                for start, product, coefficient in zip(structure.starts, structure.products, structure.coefficients)]
+
+    completion_times, prefix = list(), None
+    for start, product, coefficient in zip(structure.starts, structure.products, structure.coefficients):
+        completion_times.append(t_0_e[start] if prefix is None else t_0_e[start] + prefix)
+        term = coefficient * y_e[product]
+        prefix = term if prefix is None else prefix + term
+    return completion_times
 
 
 class SupportsAdd(Protocol):
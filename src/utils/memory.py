@@ -0,0 +1,187 @@
+import os
+import threading
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from utils.helpers import tab_str
+
+# Mode of memory accounting while it is enabled; worker processes inherit it and account their spans too
+MEMORY_ENV = "TLOPS_MEMORY"
+MODES = ("python", "rss")
+
+T = TypeVar("T")
+
+_mode: Optional[str] = None
+_local = threading.local()
+
+
+@dataclass
+class MemoryFrame:
+    """Memory at the start of a span and the largest Python allocation peak seen inside it so far."""
+
+    current: int
+    rss: Optional[int]
+    peak: int
+
+
+def enable(mode: str = "python") -> None:
+    """
+    Account memory in every span, also in worker processes: Python allocations (tracemalloc) and process RSS in
+    the "python" mode, or only RSS in the "rss" mode, which costs nothing compared to the several times slower
+    model building under tracemalloc.
+    """
+
+    global _mode
+    assert mode in MODES, f"Unknown memory accounting mode {mode}, expected one of {list(MODES)}"
+    _mode = mode
+    if mode == "python" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    os.environ[MEMORY_ENV] = mode
+
+
+def disable() -> None:
+    global _mode
+    if _mode == "python":
+        tracemalloc.stop()
+    _mode = None
+    os.environ.pop(MEMORY_ENV, None)
+
+
+def is_enabled() -> bool:
+    return _mode is not None
+
+
+def rss() -> Optional[int]:
+    """Resident set size of this process in bytes, None where /proc is not available."""
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def stack() -> List[MemoryFrame]:
+    if not hasattr(_local, "frames"):
+        _local.frames = list()
+    return _local.frames
+
+
+def begin() -> MemoryFrame:
+    """
+    Start accounting a span.
+
+    tracemalloc keeps a single peak, reset at the start of every span; the peak of the enclosing span up to this
+    point is kept in its frame, so nested spans do not hide the peaks of their parents.
+    """
+
+    if _mode != "python":
+        return MemoryFrame(current=0, rss=rss(), peak=0)
+
+    current, peak = tracemalloc.get_traced_memory()
+    frames = stack()
+    if frames:
+        frames[-1].peak = max(frames[-1].peak, peak)
+    tracemalloc.reset_peak()
+    frame = MemoryFrame(current=current, rss=rss(), peak=current)
+    frames.append(frame)
+    return frame
+
+
+def end(frame: MemoryFrame) -> Dict[str, int]:
+    """
+    Finish accounting a span: Python bytes still allocated and the peak above the start, and the RSS growth.
+    """
+
+    usage = dict()
+    if _mode == "python":
+        current, peak = tracemalloc.get_traced_memory()
+        frames = stack()
+        frames.pop()
+        peak = max(frame.peak, peak)
+        if frames:
+            frames[-1].peak = max(frames[-1].peak, peak)
+        usage.update(alloc_bytes=current - frame.current, peak_bytes=peak - frame.current)
+
+    resident = rss()
+    if resident is not None and frame.rss is not None:
+        usage.update(rss_bytes=resident, rss_delta_bytes=resident - frame.rss)
+    return usage
+
+
+def excluded(function: Callable[[], T]) -> T:
+    """Call function without counting its temporary Python allocations in the peak of the current span."""
+
+    if _mode != "python":
+        return function()
+    frames = stack()
+    if frames:
+        frames[-1].peak = max(frames[-1].peak, tracemalloc.get_traced_memory()[1])
+    try:
+        return function()
+    finally:
+        tracemalloc.reset_peak()
+
+
+def megabytes(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value / 2 ** 20:.2f}"
+
+
+def accumulate(totals: Dict[str, Any], args: Dict[str, Any]) -> None:
+    """Keep the largest Python peak and RSS growth of the spans of a phase or element."""
+
+    for key, name in (("peak", "peak_bytes"), ("rss", "rss_delta_bytes")):
+        if name in args:
+            totals[key] = max(totals[key] or 0, args[name])
+
+
+def phase_report(events: List[Dict[str, Any]], elements: int = 10) -> str:
+    """
+    Timings and memory of the spans of a trace (utils.tracing.read_events) recorded with memory accounting.
+
+    Phases are the span names over all processes, with their total time, the largest Python peak and RSS growth,
+    and for model building the bytes per constraint and nonzero. Elements are the f_opt and block sub-solves of
+    each element id, the largest peaks first.
+    """
+
+    phases: Dict[str, Dict[str, Any]] = dict()
+    per_element: Dict[Any, Dict[str, Any]] = dict()
+    for event in events:
+        args = event.get("args", dict())
+        if event.get("ph") != "X" or not {"peak_bytes", "rss_delta_bytes"} & set(args):
+            continue
+        phase = phases.setdefault(event["name"], {"count": 0, "seconds": 0., "peak": None, "rss": None,
+                                                  "constraints": 0, "nonzeros": 0, "build_peak": 0})
+        phase["count"] += 1
+        phase["seconds"] += event["dur"] / 1e6
+        accumulate(phase, args)
+        if "nonzeros" in args:
+            # Python peak of the model build, or its RSS growth (the C++ model included) without tracemalloc
+            phase["constraints"] += args["constraints"]
+            phase["nonzeros"] += args["nonzeros"]
+            phase["build_peak"] += args.get("peak_bytes", max(args.get("rss_delta_bytes", 0), 0))
+
+        if "element" in args:
+            element = per_element.setdefault(args["element"], {"seconds": 0., "peak": None, "rss": None})
+            element["seconds"] += event["dur"] / 1e6
+            accumulate(element, args)
+
+    rows = [(name, phase["count"], f"{phase['seconds']:.3f}", megabytes(phase["peak"]), megabytes(phase["rss"]),
+             f"{phase['build_peak'] / phase['constraints']:.0f}" if phase["constraints"] else "-",
+             f"{phase['build_peak'] / phase['nonzeros']:.0f}" if phase["nonzeros"] else "-")
+            for name, phase in sorted(phases.items(), key=lambda item: -item[1]["seconds"])]
+    report = tab_str("Phases", rows, ["Phase", "Spans", "Time (s)", "Peak Python (MB)", "Max RSS growth (MB)",
+                                      "Bytes / constraint", "Bytes / nonzero"])
+
+    if per_element:
+        largest = sorted(per_element.items(), key=lambda item: -(item[1]["peak"] or item[1]["rss"] or 0))[:elements]
+        report += "\n" + tab_str(f"Elements, {len(largest)} of {len(per_element)} with the largest peaks", [
+            (element, f"{values['seconds']:.3f}", megabytes(values["peak"]), megabytes(values["rss"]))
+            for element, values in largest
+        ], ["Element", "Time (s)", "Peak Python (MB)", "Max RSS growth (MB)"])
+    return report
+
+
+if os.environ.get(MEMORY_ENV) in MODES:
+    enable(os.environ[MEMORY_ENV])
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from time import time_ns
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar, Union
+
+from utils import memory
+
+# Directory of the trace files of all processes; child processes inherit it and trace into the same directory
+TRACE_DIR_ENV = "TLOPS_TRACE_DIR"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_directory: Optional[Path] = None
+_events: List[Dict[str, Any]] = list()
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(directory: Union[str, Path]) -> None:
+    """
+    Record spans into directory, also in the worker processes started from now on.
+
+    Each process appends its events to its own file when its outermost span of a thread ends, since worker
+    processes may exit without running any cleanup; write_trace() merges the files into one trace.
+    """
+
+    global _directory
+    _directory = Path(directory)
+    _directory.mkdir(parents=True, exist_ok=True)
+    os.environ[TRACE_DIR_ENV] = str(_directory)
+
+
+def disable() -> None:
+    global _directory
+    flush()
+    _directory = None
+    os.environ.pop(TRACE_DIR_ENV, None)
+
+
+def is_enabled() -> bool:
+    return _directory is not None
+
+
+@contextmanager
+def span(name: str, category: str = "solver", **args: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Record the duration of the block as a Chrome trace complete event, doing nothing while tracing is disabled.
+
+    Yields the args of the event, to which the block may add values known only at its end. With memory
+    accounting enabled (utils.memory), the Python allocations and RSS growth of the block are added to the args.
+    """
+
+    if _directory is None:
+        yield args
+        return
+
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    frame = memory.begin() if memory.is_enabled() else None
+    start = time_ns()
+    try:
+        yield args
+    finally:
+        end = time_ns()
+        if frame is not None:
+            args.update(memory.end(frame))
+        event = {"name": name, "cat": category, "ph": "X", "ts": start / 1000, "dur": (end - start) / 1000,
+                 "pid": os.getpid(), "tid": threading.get_native_id(), "args": args}
+        with _lock:
+            _events.append(event)
+        _local.depth = depth
+        if depth == 0:
+            flush()
+
+
+def traced(name: str, category: str = "solver") -> Callable[[F], F]:
+    """Decorator recording every call of a function as a span."""
+
+    def decorator(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _directory is None:
+                return function(*args, **kwargs)
+            with span(name, category):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def flush() -> None:
+    """Append the recorded events of this process to its trace file."""
+
+    global _events
+    if _directory is None:
+        return
+    with _lock:
+        events, _events = _events, list()
+    if not events:
+        return
+
+    from multiprocessing import current_process
+
+    path = _directory / f"{os.getpid()}.jsonl"
+    lines = list()
+    if not path.exists():
+        # Process name shown by the trace viewers
+        lines.append({"name": "process_name", "ph": "M", "pid": os.getpid(),
+                      "args": {"name": current_process().name}})
+    lines.extend(events)
+    with open(path, "a") as f:
+        f.write("".join(json.dumps(line) + "\n" for line in lines))
+
+
+def read_events() -> List[Dict[str, Any]]:
+    """Events recorded so far by all processes."""
+
+    flush()
+    assert _directory is not None, "Tracing is not enabled"
+    events = list()
+    for trace_file in sorted(_directory.glob("*.jsonl")):
+        with open(trace_file) as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+    return events
+
+
+def write_trace(path: Union[str, Path]) -> int:
+    """Merge the trace files of all processes into a Chrome / Perfetto trace JSON file, returning the event count."""
+
+    events = read_events()
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+
+def _reset_in_child() -> None:
+    # A forked child starts without the unflushed events and open spans of its parent
+    global _events, _local
+    _events = list()
+    _local = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_in_child)
+
+if os.environ.get(TRACE_DIR_ENV):
+    enable(os.environ[TRACE_DIR_ENV])
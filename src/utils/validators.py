@@ -0,0 +1,144 @@
+from typing import Any, List
+
+import numpy as np
+
+from models.center import CenterData
+from models.element import ElementData, ARRAY_FIELDS, element_shapes
+from utils.tracing import traced
+
+MAX_REPORTED_VIOLATIONS = 50
+
+# Arrays that must be non-negative: functional coefficients are checked by ElementSolver for both the element and
+# the center coefficients, as center solvers solve the element problems with the center coefficients
+NON_NEGATIVE_FIELDS = ("coeffs_functional",)
+
+
+def mark_validated(data: Any) -> None:
+    """Record on CenterData or ElementData that it passed validation, so solvers skip their own checks."""
+
+    object.__setattr__(data, "_validated", True)
+
+
+def is_validated(data: Any) -> bool:
+    return getattr(data, "_validated", False)
+
+
+def config_violations(elements: List[ElementData]) -> List[str]:
+    """Violations of the element configurations, checked for all elements at once."""
+
+    configs = np.array([(element.config.id, element.config.num_decision_variables,
+                         element.config.num_aggregated_products, element.config.num_soft_deadline_products,
+                         element.config.num_constraints) for element in elements], dtype=np.int64).reshape(-1, 5)
+    ids, n, n1, n2, m = configs.T
+
+    violations = list()
+    for mask, message in (
+            (ids < 0, "config.id must be non-negative"),
+            (n <= 0, "config.num_decision_variables must be positive"),
+            (n1 <= 0, "config.num_aggregated_products must be positive"),
+            (n2 < 0, "config.num_soft_deadline_products must be non-negative"),
+            (m <= 0, "config.num_constraints must be positive"),
+            (n1 > n, "config.num_aggregated_products must not exceed config.num_decision_variables"),
+            (n2 > n1, "config.num_soft_deadline_products must not exceed config.num_aggregated_products"),
+    ):
+        violations.extend(f"elements[{e}].{message}, got {configs[e].tolist()}" for e in np.flatnonzero(mask))
+    return violations
+
+
+def value_violations(name: str, indices: List[int], arrays: List[np.ndarray], non_negative: bool) -> List[str]:
+    """NaN (and negative) values of one field of the given elements, checked on the concatenated arrays."""
+
+    if not arrays:
+        return list()
+
+    sizes = np.array([array.size for array in arrays])
+    values = np.concatenate([array.ravel() for array in arrays])
+    bad = np.isnan(values)
+    if non_negative:
+        bad |= values < 0
+
+    bad = np.flatnonzero(bad)
+    owners = np.repeat(np.arange(len(arrays)), sizes)[bad]
+    positions = bad - np.concatenate([[0], np.cumsum(sizes)])[owners]
+    requirement = "a non-negative number" if non_negative else "a number"
+    return [f"{name}[{e}][{i}] must be {requirement}, got {values[j]}"
+            for e, i, j in zip(np.asarray(indices)[owners].tolist(), positions.tolist(), bad.tolist())]
+
+
+def shared_resources_violations(data: CenterData) -> List[str]:
+    """Violations of the dimensions and values of the shared resources of a system."""
+
+    shared, violations = data.shared_resources, list()
+    r = shared.num_resources
+    if shared.limits.shape != (r,) or len(shared.costs) != len(data.elements):
+        return [f"shared_resources needs a limits vector and one cost matrix per element, got limits of shape "
+                f"{shared.limits.shape} and {len(shared.costs)} cost matrices"]
+
+    indices, arrays = list(), list()
+    for e, (costs, element) in enumerate(zip(shared.costs, data.elements)):
+        shape = (r, element.config.num_decision_variables)
+        if costs.shape == shape:
+            indices.append(e)
+            arrays.append(costs)
+        else:
+            violations.append(f"shared_resources.costs[{e}] has invalid dimensions. Expected {shape}, got {costs.shape}")
+    violations.extend(value_violations("shared_resources.costs", indices, arrays, True))
+    violations.extend(value_violations("shared_resources.limits", [0], [shared.limits], False))
+    return violations
+
+
+@traced("validate", "data")
+def validate_center_data(data: CenterData, force: bool = False) -> None:
+    """
+    Validate a whole system at once, raising one AssertionError listing all violations.
+
+    Dimensions are compared per array and values are checked by vectorized predicates over all elements.
+    On success the system and its elements are marked as validated, so solvers created from them skip
+    their per-value checks, and validating them again is free unless forced.
+    """
+
+    if is_validated(data) and not force:
+        return
+
+    violations = list()
+    num_elements = data.config.num_elements
+    if len(data.elements) != num_elements or len(data.coeffs_functional) != num_elements:
+        violations.append(f"config.num_elements is {num_elements}, got {len(data.elements)} elements "
+                          f"and {len(data.coeffs_functional)} center coefficient vectors")
+    violations.extend(config_violations(data.elements))
+
+    # Values are checked only for arrays of the expected shape, the others are reported as invalid dimensions
+    valid_arrays = {name: (list(), list()) for name in ARRAY_FIELDS}
+    center_coeffs = (list(), list())
+    for e, (element, coeffs) in enumerate(zip(data.elements, data.coeffs_functional)):
+        shapes = element_shapes(element.config)
+        for name, shape in shapes.items():
+            array = getattr(element, name)
+            if array.shape == shape:
+                valid_arrays[name][0].append(e)
+                valid_arrays[name][1].append(array)
+            else:
+                violations.append(f"elements[{e}].{name} has invalid dimensions. Expected {shape}, got {array.shape}")
+        if coeffs.shape == shapes["coeffs_functional"]:
+            center_coeffs[0].append(e)
+            center_coeffs[1].append(coeffs)
+        else:
+            violations.append(f"coeffs_functional[{e}] has invalid dimensions. "
+                              f"Expected {shapes['coeffs_functional']}, got {coeffs.shape}")
+
+    if data.shared_resources is not None:
+        violations.extend(shared_resources_violations(data))
+
+    for name, (indices, arrays) in valid_arrays.items():
+        violations.extend(value_violations(f"elements.{name}", indices, arrays, name in NON_NEGATIVE_FIELDS))
+    violations.extend(value_violations("coeffs_functional", *center_coeffs, True))
+
+    if violations:
+        reported = violations[:MAX_REPORTED_VIOLATIONS]
+        if len(violations) > MAX_REPORTED_VIOLATIONS:
+            reported.append(f"... and {len(violations) - MAX_REPORTED_VIOLATIONS} more")
+        raise AssertionError(f"Invalid center data, {len(violations)} violations:\n  " + "\n  ".join(reported))
+
+    mark_validated(data)
+    for element in data.elements:
+        mark_validated(element)